@@ -0,0 +1,370 @@
+# statically load vulkan library
+from vulkan import *
+
+import bisect
+
+MIB = 1024 * 1024
+
+def align_up(value, alignment):
+
+    return (value + alignment - 1) // alignment * alignment
+
+class FreeListStrategy:
+
+    # first fit over a sorted list of free ranges, neighbouring ranges are
+    # merged again when an allocation is freed
+    def __init__(self, size):
+
+        self.size = size
+        self.freeRanges = [(0, size),]
+
+        # offset handed out -> (start, length) actually taken, alignment padding included
+        self.allocations = {}
+
+    def allocate(self, size, alignment):
+
+        for i,(start, length) in enumerate(self.freeRanges):
+
+            offset = align_up(start, alignment)
+            end = offset + size
+            if end > start + length:
+                continue
+
+            del self.freeRanges[i]
+            if end < start + length:
+                self.freeRanges.insert(i, (end, start + length - end))
+
+            self.allocations[offset] = (start, end - start)
+            return offset
+
+        return None
+
+    def free(self, offset):
+
+        start, length = self.allocations.pop(offset)
+        i = bisect.bisect(self.freeRanges, (start, 0))
+
+        if i < len(self.freeRanges) and start + length == self.freeRanges[i][0]:
+            length += self.freeRanges[i][1]
+            del self.freeRanges[i]
+
+        if i > 0 and sum(self.freeRanges[i - 1]) == start:
+            start = self.freeRanges[i - 1][0]
+            length += self.freeRanges[i - 1][1]
+            del self.freeRanges[i - 1]
+            i -= 1
+
+        self.freeRanges.insert(i, (start, length))
+
+    def free_sizes(self):
+
+        return [length for _,length in self.freeRanges]
+
+class BuddyStrategy:
+
+    # power of two blocks that are split in halves on demand, a freed block
+    # merges with its buddy whenever that one is free as well
+    def __init__(self, size, minBlockSize = 256):
+
+        self.size = 1 << (size.bit_length() - 1)
+        self.minBlockSize = minBlockSize
+        self.maxOrder = (self.size // minBlockSize).bit_length() - 1
+
+        self.freeBlocks = [set() for _ in range(self.maxOrder + 1)]
+        self.freeBlocks[self.maxOrder].add(0)
+
+        # offset handed out -> order of its block
+        self.allocations = {}
+
+    def block_size(self, order):
+
+        return self.minBlockSize << order
+
+    def allocate(self, size, alignment):
+
+        # blocks are aligned to their own size, so a big enough block is aligned too
+        blocks = -(-max(size, alignment) // self.minBlockSize)
+        order = (blocks - 1).bit_length()
+
+        current = order
+        while current <= self.maxOrder and not self.freeBlocks[current]:
+            current += 1
+        if current > self.maxOrder:
+            return None
+
+        offset = min(self.freeBlocks[current])
+        self.freeBlocks[current].remove(offset)
+
+        while current > order:
+            current -= 1
+            self.freeBlocks[current].add(offset + self.block_size(current))
+
+        self.allocations[offset] = order
+        return offset
+
+    def free(self, offset):
+
+        order = self.allocations.pop(offset)
+
+        while order < self.maxOrder:
+            buddy = offset ^ self.block_size(order)
+            if buddy not in self.freeBlocks[order]:
+                break
+            self.freeBlocks[order].remove(buddy)
+            offset = min(offset, buddy)
+            order += 1
+
+        self.freeBlocks[order].add(offset)
+
+    def free_sizes(self):
+
+        return [
+            self.block_size(order)
+            for order,blocks in enumerate(self.freeBlocks) for _ in blocks
+        ]
+
+STRATEGIES = {
+    "freelist": FreeListStrategy,
+    "buddy": BuddyStrategy,
+}
+
+class VulkanMemoryBackend:
+
+    # everything the allocator needs from the device, a fake object with the
+    # same attributes and methods lets it run without a gpu
+    def __init__(self, device, physicalDevice):
+
+        self.device = device
+
+        memoryProperties = vkGetPhysicalDeviceMemoryProperties(physicalDevice)
+        self.memoryTypeFlags = [
+            memoryProperties.memoryTypes[i].propertyFlags
+            for i in range(memoryProperties.memoryTypeCount)
+        ]
+
+        limits = vkGetPhysicalDeviceProperties(physicalDevice).limits
+        self.bufferImageGranularity = limits.bufferImageGranularity
+
+    def allocate_memory(self, size, memoryTypeIndex):
+
+        allocInfo = VkMemoryAllocateInfo(
+            allocationSize = size, memoryTypeIndex = memoryTypeIndex
+        )
+        return vkAllocateMemory(self.device, allocInfo, None)
+
+    def free_memory(self, memory):
+
+        vkFreeMemory(self.device, memory, None)
+
+    def map_memory(self, memory, size):
+
+        return vkMapMemory(self.device, memory, 0, size, 0)
+
+    def unmap_memory(self, memory):
+
+        vkUnmapMemory(self.device, memory)
+
+class MemoryBlock:
+
+
+    def __init__(self):
+
+        self.memory = None
+        self.size = 0
+        self.memoryTypeIndex = None
+        self.strategy = None
+
+        # host visible blocks stay mapped for their whole lifetime
+        self.mapped = None
+
+        self.allocationCount = 0
+        self.usedBytes = 0
+
+class Allocation:
+
+
+    def __init__(self):
+
+        self.memory = None
+        self.offset = 0
+        self.size = 0
+
+        # writable view of the allocation's bytes, for host visible memory only
+        self.mapped = None
+
+        self.block = None
+
+class AllocatorStats:
+
+
+    def __init__(self):
+
+        self.blockCount = 0
+        self.bytesAllocated = 0
+        self.bytesUsed = 0
+        self.allocationCount = 0
+
+        # 0 when each block's free space is one range, close to 1 when it is
+        # scattered, averaged over the blocks weighted by their size
+        self.fragmentation = 0.0
+
+class Allocator:
+
+
+    def __init__(self, device, physicalDevice, blockSize = 64 * MIB,
+        strategy = "freelist", backend = None
+    ):
+
+        self.device = device
+        if backend is None:
+            backend = VulkanMemoryBackend(device, physicalDevice)
+        self.backend = backend
+
+        self.blockSize = blockSize
+        self.strategy = STRATEGIES[strategy]
+
+        # (memory type, linear resource) -> blocks
+        self.blocks = {}
+
+    def find_memory_type(self, typeFilter, properties):
+
+        for i,flags in enumerate(self.backend.memoryTypeFlags):
+            if typeFilter & (1 << i) and (flags & properties) == properties:
+                return i
+
+        raise ValueError(f"No memory type with properties {properties:#x} in {typeFilter:#x}")
+
+    def create_block(self, memoryTypeIndex, size):
+
+        # oversized requests get a block of their own
+        blockSize = self.blockSize
+        while blockSize < size:
+            blockSize *= 2
+
+        block = MemoryBlock()
+        block.memory = self.backend.allocate_memory(blockSize, memoryTypeIndex)
+        block.size = blockSize
+        block.memoryTypeIndex = memoryTypeIndex
+        block.strategy = self.strategy(blockSize)
+
+        if self.backend.memoryTypeFlags[memoryTypeIndex] & VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT:
+            block.mapped = self.backend.map_memory(block.memory, blockSize)
+
+        return block
+
+    def allocate(self, requirements, properties, linear = True):
+
+        memoryTypeIndex = self.find_memory_type(requirements.memoryTypeBits, properties)
+
+        # linear resources (buffers) and optimal tiling images must not share a
+        # bufferImageGranularity page, so give each kind its own blocks
+        if self.backend.bufferImageGranularity > 1:
+            key = (memoryTypeIndex, linear)
+        else:
+            key = (memoryTypeIndex, True)
+        blocks = self.blocks.setdefault(key, [])
+
+        for block in blocks:
+            offset = block.strategy.allocate(requirements.size, requirements.alignment)
+            if offset is not None:
+                break
+        else:
+            block = self.create_block(memoryTypeIndex, requirements.size)
+            blocks.append(block)
+            offset = block.strategy.allocate(requirements.size, requirements.alignment)
+
+        block.allocationCount += 1
+        block.usedBytes += requirements.size
+
+        allocation = Allocation()
+        allocation.memory = block.memory
+        allocation.offset = offset
+        allocation.size = requirements.size
+        allocation.block = block
+        if block.mapped is not None:
+            allocation.mapped = memoryview(block.mapped)[offset:offset + requirements.size]
+
+        return allocation
+
+    def free(self, allocation):
+
+        block = allocation.block
+        block.strategy.free(allocation.offset)
+        block.allocationCount -= 1
+        block.usedBytes -= allocation.size
+        allocation.mapped = None
+
+        # keep one block per kind around to avoid churn, release the others once empty
+        for blocks in self.blocks.values():
+            if block in blocks and block.allocationCount == 0 and len(blocks) > 1:
+                blocks.remove(block)
+                self.release_block(block)
+
+    def release_block(self, block):
+
+        if block.mapped is not None:
+            block.mapped = None
+            self.backend.unmap_memory(block.memory)
+        self.backend.free_memory(block.memory)
+
+    def create_buffer(self, size, usage, properties):
+
+        bufferInfo = VkBufferCreateInfo(
+            size = size, usage = usage, sharingMode = VK_SHARING_MODE_EXCLUSIVE
+        )
+        buffer = vkCreateBuffer(self.device, bufferInfo, None)
+
+        requirements = vkGetBufferMemoryRequirements(self.device, buffer)
+        allocation = self.allocate(requirements, properties, linear = True)
+        vkBindBufferMemory(self.device, buffer, allocation.memory, allocation.offset)
+
+        return buffer, allocation
+
+    def destroy_buffer(self, buffer, allocation):
+
+        vkDestroyBuffer(self.device, buffer, None)
+        self.free(allocation)
+
+    def allocate_image(self, image, properties):
+
+        requirements = vkGetImageMemoryRequirements(self.device, image)
+        allocation = self.allocate(requirements, properties, linear = False)
+        vkBindImageMemory(self.device, image, allocation.memory, allocation.offset)
+
+        return allocation
+
+    def destroy_image(self, image, allocation):
+
+        vkDestroyImage(self.device, image, None)
+        self.free(allocation)
+
+    def stats(self):
+
+        stats = AllocatorStats()
+        weightedFragmentation = 0.0
+
+        for blocks in self.blocks.values():
+            for block in blocks:
+                stats.blockCount += 1
+                stats.bytesAllocated += block.size
+                stats.bytesUsed += block.usedBytes
+                stats.allocationCount += block.allocationCount
+
+                # free ranges of different blocks can never be merged, so
+                # each block is only compared with itself
+                freeSizes = block.strategy.free_sizes()
+                if freeSizes:
+                    weightedFragmentation += block.size * (1.0 - max(freeSizes) / sum(freeSizes))
+
+        if stats.bytesAllocated:
+            stats.fragmentation = weightedFragmentation / stats.bytesAllocated
+
+        return stats
+
+    def destroy(self):
+
+        for blocks in self.blocks.values():
+            for block in blocks:
+                self.release_block(block)
+
+        self.blocks = {}
@@ -0,0 +1,354 @@
+# statically load vulkan library
+from vulkan import *
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import glfw
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import instancing_benchmark
+import instrumentation
+import pipeline_benchmark
+import pipeline_registry
+from main import App, HeadlessApp
+
+SCENARIOS = ("triangle", "instances", "pipelines", "resize")
+
+# frames traced for allocations, tracemalloc slows them down a lot so they
+# are kept apart from the timed frames
+ALLOCATION_FRAMES = 20
+
+class Scenario:
+
+
+    # setup prepares the engine, before_frame runs ahead of every frame and
+    # teardown puts the engine back the way setup found it
+    def __init__(self, engine):
+
+        self.engine = engine
+
+    def setup(self):
+        pass
+
+    def before_frame(self, frameIndex):
+        pass
+
+    def teardown(self):
+        pass
+
+class TriangleScenario(Scenario):
+
+
+    # the triangle generated by the vertex shader, i.e. the engine's fixed cost
+    pass
+
+class InstancesScenario(Scenario):
+
+
+    def __init__(self, engine, instanceCount = 100000):
+
+        super().__init__(engine)
+        self.instanceCount = instanceCount
+
+    def setup(self):
+
+        rng = np.random.default_rng(0)
+        self.engine.load_mesh(*instancing_benchmark.make_triangle())
+        self.engine.set_instances(
+            instancing_benchmark.make_instances(self.instanceCount, rng)
+        )
+
+class PipelinesScenario(Scenario):
+
+
+    # binds a different pipeline variant every frame
+    def setup(self):
+
+        engine = self.engine
+
+        descriptions = [
+            description for description in pipeline_benchmark.make_descriptions()
+            if not description.vertexBindings
+        ]
+        self.registry = pipeline_registry.PipelineRegistry(
+            engine.device, engine.pipelineLayout, engine.renderpass,
+            engine.shaderRegistry, engine.pipelineCache.pipelineCache
+        )
+        self.registry.create_batch(descriptions)
+        self.variants = [self.registry.get(description) for description in descriptions]
+
+        self.enginePipeline = engine.pipeline
+
+    def before_frame(self, frameIndex):
+
+        self.engine.pipeline = self.variants[frameIndex % len(self.variants)]
+
+    def teardown(self):
+
+        vkDeviceWaitIdle(self.engine.device)
+        self.engine.pipeline = self.enginePipeline
+        self.registry.destroy()
+
+class ResizeScenario(Scenario):
+
+
+    # resizes the window every few frames, each resize recreates the swapchain
+    def __init__(self, engine, interval = 10):
+
+        super().__init__(engine)
+        self.interval = interval
+        self.sizes = [(640, 480), (800, 600), (1024, 768), (512, 384)]
+
+    def setup(self):
+
+        if self.engine.headless:
+            raise ValueError("the resize scenario needs a window")
+
+    def before_frame(self, frameIndex):
+
+        if frameIndex % self.interval == 0:
+            width, height = self.sizes[(frameIndex // self.interval) % len(self.sizes)]
+            glfw.set_window_size(self.engine.window, width, height)
+
+    def teardown(self):
+
+        glfw.set_window_size(self.engine.window, *self.sizes[0])
+
+SCENARIO_TYPES = {
+    "triangle": TriangleScenario,
+    "instances": InstancesScenario,
+    "pipelines": PipelinesScenario,
+    "resize": ResizeScenario,
+}
+
+def peak_rss():
+
+    # in bytes, ru_maxrss is reported in kilobytes on linux and bytes on macos
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak
+    return peak * 1024
+
+def git_commit():
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output = True, text = True, check = True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def device_name(engine):
+
+    # the bindings already decode the name
+    return vkGetPhysicalDeviceProperties(engine.physicalDevice).deviceName
+
+def render_frame(app, scenario, frameIndex):
+
+    if not app.graphicsEngine.headless:
+        glfw.poll_events()
+
+    scenario.before_frame(frameIndex)
+    app.graphicsEngine.render()
+
+def measure_allocations(app, scenario, frameCount):
+
+    # bytes allocated within a frame, whether or not they were freed again,
+    # and blocks still allocated once it returned
+    allocatedBytes = []
+    allocatedBlocks = []
+
+    tracemalloc.start()
+    for i in range(frameCount):
+        blocksBefore = sys.getallocatedblocks()
+        tracemalloc.reset_peak()
+        before,_ = tracemalloc.get_traced_memory()
+
+        render_frame(app, scenario, i)
+
+        _,peak = tracemalloc.get_traced_memory()
+        allocatedBytes.append(peak - before)
+        allocatedBlocks.append(sys.getallocatedblocks() - blocksBefore)
+    tracemalloc.stop()
+
+    return float(np.mean(allocatedBytes)), float(np.mean(allocatedBlocks))
+
+def measure_struct_constructions(app, scenario, frameCount):
+
+    # structs built by the bindings in each frame, a steady state frame builds
+    # none: the median shows the steady state and the maximum any spike
+    vulkanInstrumentation = instrumentation.Instrumentation()
+    vulkanInstrumentation.install(app.graphicsEngine)
+    try:
+        for i in range(frameCount):
+            render_frame(app, scenario, i)
+    finally:
+        vulkanInstrumentation.uninstall()
+
+    builtPerFrame = vulkanInstrumentation.per_frame_structs()
+    return float(np.median(builtPerFrame)), int(builtPerFrame.max())
+
+def run_scenario(app, name, frameCount = None, seconds = None, warmupFrames = 30):
+
+    engine = app.graphicsEngine
+    scenario = SCENARIO_TYPES[name](engine)
+    scenario.setup()
+
+    for i in range(warmupFrames):
+        render_frame(app, scenario, i)
+    vkDeviceWaitIdle(engine.device)
+
+    # either a fixed number of frames, or as many as fit in the time given
+    frameTimes = []
+    start = time.perf_counter()
+    deadline = start + seconds if seconds is not None else None
+    frameStart = start
+    while True:
+        if frameCount is not None and len(frameTimes) >= frameCount:
+            break
+        if deadline is not None and frameStart >= deadline:
+            break
+
+        render_frame(app, scenario, warmupFrames + len(frameTimes))
+
+        frameEnd = time.perf_counter()
+        frameTimes.append(frameEnd - frameStart)
+        frameStart = frameEnd
+    vkDeviceWaitIdle(engine.device)
+    elapsed = time.perf_counter() - start
+
+    bytesPerFrame, blocksPerFrame = measure_allocations(app, scenario, ALLOCATION_FRAMES)
+    structsPerFrame, maxStructsPerFrame = measure_struct_constructions(
+        app, scenario, ALLOCATION_FRAMES
+    )
+
+    scenario.teardown()
+
+    frameTimes = np.array(frameTimes) * 1000.0
+    return {
+        "frames": len(frameTimes),
+        "seconds": elapsed,
+        "fps": len(frameTimes) / elapsed,
+        "frameTimeMs": {
+            "mean": float(np.mean(frameTimes)),
+            "p50": float(np.percentile(frameTimes, 50)),
+            "p95": float(np.percentile(frameTimes, 95)),
+            "p99": float(np.percentile(frameTimes, 99)),
+            "max": float(np.max(frameTimes)),
+        },
+        "allocatedBytesPerFrame": bytesPerFrame,
+        "allocatedBlocksPerFrame": blocksPerFrame,
+        "structsPerFrame": structsPerFrame,
+        "maxStructsPerFrame": maxStructsPerFrame,
+        "peakRssBytes": peak_rss(),
+    }
+
+def run(scenarios = SCENARIOS, headless = True, frameCount = 500, seconds = None,
+    warmupFrames = 30, width = 640, height = 480, outputDirectory = "benchmark_results"
+):
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "headless": headless,
+        "width": width,
+        "height": height,
+        "scenarios": {},
+    }
+
+    # every scenario gets a fresh engine, none inherits the state of another.
+    # Heavy scenarios take seconds per frame on a software rasterizer, so
+    # frames are waited for however long they take.
+    for name in scenarios:
+        if name == "resize" and headless:
+            print(f"{name:>10}: skipped, offscreen targets can't be resized")
+            continue
+
+        if headless:
+            app = HeadlessApp(width, height, "Benchmark", frameTimeout = UINT64_MAX)
+        else:
+            app = App(width, height, "Benchmark", frameTimeout = UINT64_MAX)
+        try:
+            results["device"] = device_name(app.graphicsEngine)
+            result = run_scenario(app, name, frameCount, seconds, warmupFrames)
+        except VkTimeout:
+            # a driver may still give up on a wait, the other scenarios run anyway
+            results["scenarios"][name] = {"failed": "timed out"}
+            print(f"{name:>10}: failed, a frame timed out")
+            continue
+        finally:
+            app.close()
+
+        results["scenarios"][name] = result
+        frameTime = result["frameTimeMs"]
+        print(
+            f"{name:>10}: {result['fps']:8.1f} fps,"
+            f" p50 {frameTime['p50']:.3f} ms, p95 {frameTime['p95']:.3f} ms,"
+            f" p99 {frameTime['p99']:.3f} ms,"
+            f" {result['allocatedBytesPerFrame']:.0f} bytes allocated and"
+            f" {result['structsPerFrame']:.1f} structs built per frame"
+            f" (at most {result['maxStructsPerFrame']})"
+        )
+
+    # one file per run, named after the commit so runs can be compared over time
+    os.makedirs(outputDirectory, exist_ok = True)
+    commit = (results["commit"] or "unknown")[:12]
+    filepath = os.path.join(
+        outputDirectory, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json"
+    )
+    with open(filepath, 'w') as file:
+        json.dump(results, file, indent = 2)
+    print(f"Results written to {filepath}")
+
+    return results
+
+def parse_arguments(argv = None):
+
+    parser = argparse.ArgumentParser(description = "Benchmarks the render loop")
+    # argparse checks an empty list or a default against choices as a whole,
+    # so the names are checked, and none given replaced by all, after parsing
+    parser.add_argument("scenarios", nargs = "*", default = None,
+        help = f"any of {', '.join(SCENARIOS)}, all of them by default")
+    parser.add_argument("--windowed", action = "store_true")
+    parser.add_argument("--frames", type = int, default = 500)
+    parser.add_argument("--seconds", type = float, default = None,
+        help = "run for this long instead of a fixed number of frames")
+    parser.add_argument("--warmup", type = int, default = 30)
+    parser.add_argument("--output", default = "benchmark_results")
+    arguments = parser.parse_args(argv)
+
+    for name in arguments.scenarios or []:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}, choose from {', '.join(SCENARIOS)}")
+    if not arguments.scenarios:
+        arguments.scenarios = SCENARIOS
+
+    return arguments
+
+if __name__ == "__main__":
+
+    arguments = parse_arguments()
+
+    run(
+        arguments.scenarios, headless = not arguments.windowed,
+        frameCount = None if arguments.seconds is not None else arguments.frames,
+        seconds = arguments.seconds, warmupFrames = arguments.warmup,
+        outputDirectory = arguments.output
+    )
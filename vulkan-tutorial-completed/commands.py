@@ -63,4 +63,41 @@ def make_command_buffers(inputChunk):
         commandbuffer = vkAllocateCommandBuffers(inputChunk.device, allocInfo)[0]
         return commandbuffer
     except:
-        return None
\ No newline at end of file
+        return None
+
+def free_command_buffers(device, commandPool, commandbuffers):
+
+    vkFreeCommandBuffers(
+        device = device, commandPool = commandPool,
+        commandBufferCount = len(commandbuffers), pCommandBuffers = commandbuffers
+    )
+
+def begin_single_time_commands(device, commandPool):
+
+    allocInfo = VkCommandBufferAllocateInfo(
+        commandPool = commandPool,
+        level = VK_COMMAND_BUFFER_LEVEL_PRIMARY,
+        commandBufferCount = 1
+    )
+    commandBuffer = vkAllocateCommandBuffers(device, allocInfo)[0]
+
+    beginInfo = VkCommandBufferBeginInfo(
+        flags = VK_COMMAND_BUFFER_USAGE_ONE_TIME_SUBMIT_BIT
+    )
+    vkBeginCommandBuffer(commandBuffer, beginInfo)
+
+    return commandBuffer
+
+def end_single_time_commands(device, commandPool, queue, commandBuffer):
+
+    vkEndCommandBuffer(commandBuffer)
+
+    submitInfo = VkSubmitInfo(
+        commandBufferCount = 1, pCommandBuffers = [commandBuffer,]
+    )
+    vkQueueSubmit(queue, 1, submitInfo, VK_NULL_HANDLE)
+
+    # only used while loading, so simply wait for the queue to finish
+    vkQueueWaitIdle(queue)
+
+    free_command_buffers(device, commandPool, [commandBuffer,])
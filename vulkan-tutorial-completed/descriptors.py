@@ -0,0 +1,174 @@
+# statically load vulkan library
+from vulkan import *
+
+# descriptors of each type a pool holds per set it can allocate
+POOL_SIZE_RATIOS = {
+    VK_DESCRIPTOR_TYPE_UNIFORM_BUFFER: 2,
+    VK_DESCRIPTOR_TYPE_UNIFORM_BUFFER_DYNAMIC: 1,
+    VK_DESCRIPTOR_TYPE_STORAGE_BUFFER: 2,
+    VK_DESCRIPTOR_TYPE_COMBINED_IMAGE_SAMPLER: 4,
+}
+
+class DescriptorLayoutCache:
+
+
+    def __init__(self, device):
+
+        self.device = device
+
+        # bindings -> layout, every distinct set of bindings is created once
+        self.layouts = {}
+
+    def get(self, bindings):
+
+        # bindings is a sequence of
+        # (binding, descriptorType, descriptorCount, stageFlags) tuples
+        key = tuple(sorted(tuple(binding) for binding in bindings))
+
+        layout = self.layouts.get(key)
+        if layout is not None:
+            return layout
+
+        layoutBindings = [
+            VkDescriptorSetLayoutBinding(
+                binding = binding, descriptorType = descriptorType,
+                descriptorCount = descriptorCount, stageFlags = stageFlags
+            )
+            for binding, descriptorType, descriptorCount, stageFlags in key
+        ]
+        layoutInfo = VkDescriptorSetLayoutCreateInfo(
+            bindingCount = len(layoutBindings), pBindings = layoutBindings
+        )
+
+        layout = vkCreateDescriptorSetLayout(self.device, layoutInfo, None)
+        self.layouts[key] = layout
+
+        return layout
+
+    def destroy(self):
+
+        for layout in self.layouts.values():
+            vkDestroyDescriptorSetLayout(self.device, layout, None)
+
+        self.layouts = {}
+
+class DescriptorAllocator:
+
+
+    # sets are never freed one by one, the whole allocator is reset at once
+    # when everything allocated from it is no longer in use
+    def __init__(self, device, setsPerPool = 64, maxSetsPerPool = 4096):
+
+        self.device = device
+        self.setsPerPool = setsPerPool
+        self.maxSetsPerPool = maxSetsPerPool
+
+        # the last used pool is the one allocations are tried from
+        self.usedPools = []
+        self.freePools = []
+
+    def create_pool(self):
+
+        poolSizes = [
+            VkDescriptorPoolSize(type = descriptorType, descriptorCount = ratio * self.setsPerPool)
+            for descriptorType, ratio in POOL_SIZE_RATIOS.items()
+        ]
+        poolInfo = VkDescriptorPoolCreateInfo(
+            maxSets = self.setsPerPool,
+            poolSizeCount = len(poolSizes), pPoolSizes = poolSizes
+        )
+        pool = vkCreateDescriptorPool(self.device, poolInfo, None)
+
+        # each pool is bigger than the last, so a busy allocator settles on a few
+        self.setsPerPool = min(self.setsPerPool * 2, self.maxSetsPerPool)
+
+        return pool
+
+    def grab_pool(self):
+
+        if self.freePools:
+            pool = self.freePools.pop()
+        else:
+            pool = self.create_pool()
+        self.usedPools.append(pool)
+
+        return pool
+
+    def allocate(self, layout, count = 1):
+
+        if not self.usedPools:
+            self.grab_pool()
+
+        allocInfo = VkDescriptorSetAllocateInfo(
+            descriptorPool = self.usedPools[-1],
+            descriptorSetCount = count, pSetLayouts = [layout,] * count
+        )
+
+        try:
+            return list(vkAllocateDescriptorSets(self.device, allocInfo))
+        except (VkErrorOutOfPoolMemory, VkErrorFragmentedPool):
+            # the current pool is full, carry on in a fresh one
+            allocInfo.descriptorPool = self.grab_pool()
+            return list(vkAllocateDescriptorSets(self.device, allocInfo))
+
+    def reset(self):
+
+        # frames reset their allocator every time, mostly with nothing in it,
+        # so the lists are left alone then and cleared in place otherwise
+        if not self.usedPools:
+            return
+
+        for pool in self.usedPools:
+            vkResetDescriptorPool(self.device, pool, 0)
+
+        self.freePools.extend(self.usedPools)
+        self.usedPools.clear()
+
+    def destroy(self):
+
+        for pool in self.usedPools + self.freePools:
+            vkDestroyDescriptorPool(self.device, pool, None)
+
+        self.usedPools = []
+        self.freePools = []
+
+class DescriptorWriter:
+
+
+    # collects descriptor writes so they all go to the driver in one call
+    def __init__(self):
+
+        self.writes = []
+
+    def write_buffer(self, descriptorSet, binding, descriptorType, buffer, offset, size):
+
+        bufferInfo = VkDescriptorBufferInfo(buffer = buffer, offset = offset, range = size)
+        self.writes.append(
+            VkWriteDescriptorSet(
+                dstSet = descriptorSet, dstBinding = binding, dstArrayElement = 0,
+                descriptorCount = 1, descriptorType = descriptorType,
+                pBufferInfo = [bufferInfo,]
+            )
+        )
+
+    def write_image(self, descriptorSet, binding, descriptorType, imageView, sampler,
+        imageLayout = VK_IMAGE_LAYOUT_SHADER_READ_ONLY_OPTIMAL
+    ):
+
+        imageInfo = VkDescriptorImageInfo(
+            sampler = sampler, imageView = imageView, imageLayout = imageLayout
+        )
+        self.writes.append(
+            VkWriteDescriptorSet(
+                dstSet = descriptorSet, dstBinding = binding, dstArrayElement = 0,
+                descriptorCount = 1, descriptorType = descriptorType,
+                pImageInfo = [imageInfo,]
+            )
+        )
+
+    def flush(self, device):
+
+        if self.writes:
+            vkUpdateDescriptorSets(device, len(self.writes), self.writes, 0, None)
+
+        self.writes = []
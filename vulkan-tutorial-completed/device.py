@@ -17,34 +17,47 @@ def check_device_extension_support(device, requestedExtensions):
     
     return True
 
-def is_suitable(device):
+def is_suitable(device, headless = False):
 
-    requestedExtensions = [
-        VK_KHR_SWAPCHAIN_EXTENSION_NAME
-    ]
+    # a swapchain is only needed to present to a window
+    requestedExtensions = []
+    if not headless:
+        requestedExtensions.append(VK_KHR_SWAPCHAIN_EXTENSION_NAME)
 
     if check_device_extension_support(device, requestedExtensions):
         return True
 
     return False
 
-def choose_physical_device(instance):
+def choose_physical_device(instance, headless = False):
 
     availableDevices = vkEnumeratePhysicalDevices(instance)
 
     # check if a suitable device can be found
     for device in availableDevices:
-        if is_suitable(device):
+        if is_suitable(device, headless):
             return device
 
     return None
 
+def choose_device_features(physicalDevice):
+
+    # optional features are only turned on when the gpu has them
+    supportedFeatures = vkGetPhysicalDeviceFeatures(physicalDevice)
+
+    return VkPhysicalDeviceFeatures(
+        multiDrawIndirect = supportedFeatures.multiDrawIndirect,
+        drawIndirectFirstInstance = supportedFeatures.drawIndirectFirstInstance
+    )
+
 def create_logical_device(physicalDevice, instance, surface):
 
     indices = queue_families.find_queue_families(physicalDevice, instance, surface)
     uniqueIndices = [indices.graphicsFamily,]
-    if indices.graphicsFamily != indices.presentFamily:
+    if indices.presentFamily is not None and indices.graphicsFamily != indices.presentFamily:
         uniqueIndices.append(indices.presentFamily)
+    if indices.transferFamily is not None and indices.transferFamily not in uniqueIndices:
+        uniqueIndices.append(indices.transferFamily)
     
     queueCreateInfo = []
     for queueFamilyIndex in uniqueIndices:
@@ -56,13 +69,13 @@ def create_logical_device(physicalDevice, instance, surface):
             )
         )
 
-    deviceFeatures = VkPhysicalDeviceFeatures()
+    deviceFeatures = choose_device_features(physicalDevice)
 
     enabledLayers = []
     
-    deviceExtensions = [
-        VK_KHR_SWAPCHAIN_EXTENSION_NAME,
-    ]
+    deviceExtensions = []
+    if surface is not None:
+        deviceExtensions.append(VK_KHR_SWAPCHAIN_EXTENSION_NAME)
 
     createInfo = VkDeviceCreateInfo(
         queueCreateInfoCount = len(queueCreateInfo),
@@ -81,15 +94,28 @@ def create_logical_device(physicalDevice, instance, surface):
 def get_queues(physicalDevice, logicalDevice, instance, surface):
 
     indices = queue_families.find_queue_families(physicalDevice, instance, surface)
-    return [
-        vkGetDeviceQueue(
+    graphicsQueue = vkGetDeviceQueue(
+        device = logicalDevice,
+        queueFamilyIndex = indices.graphicsFamily,
+        queueIndex = 0
+    )
+
+    # without a surface nothing is ever presented
+    presentQueue = None
+    if indices.presentFamily is not None:
+        presentQueue = vkGetDeviceQueue(
             device = logicalDevice,
-            queueFamilyIndex = indices.graphicsFamily,
+            queueFamilyIndex = indices.presentFamily,
             queueIndex = 0
-        ),
-        vkGetDeviceQueue(
+        )
+
+    # uploads go through the graphics queue when there is no transfer family
+    transferQueue = None
+    if indices.transferFamily is not None:
+        transferQueue = vkGetDeviceQueue(
             device = logicalDevice,
-            queueFamilyIndex = indices.presentFamily,
+            queueFamilyIndex = indices.transferFamily,
             queueIndex = 0
-        ),
-    ]
+        )
+
+    return [graphicsQueue, presentQueue, transferQueue]
@@ -0,0 +1,59 @@
+# statically load vulkan library
+from vulkan import *
+
+class DispatchTable:
+
+
+    def __init__(self, handle, loader):
+
+        self.handle = handle
+        self.loader = loader
+
+        # number of procedures resolved through the loader so far
+        self.lookupCount = 0
+
+    def __getattr__(self, name):
+
+        # only reached the first time a procedure is requested, afterwards
+        # it is a plain attribute of the table
+        if not name.startswith("vk"):
+            raise AttributeError(name)
+
+        self.lookupCount += 1
+        procedure = self.loader(self.handle, name)
+        setattr(self, name, procedure)
+
+        return procedure
+
+# one table per instance and per device, shared by every module
+instanceTables = {}
+deviceTables = {}
+
+def get_instance_dispatch(instance):
+
+    if instance not in instanceTables:
+        instanceTables[instance] = DispatchTable(instance, vkGetInstanceProcAddr)
+
+    return instanceTables[instance]
+
+def get_device_dispatch(device):
+
+    if device not in deviceTables:
+        deviceTables[device] = DispatchTable(device, vkGetDeviceProcAddr)
+
+    return deviceTables[device]
+
+def release_instance_dispatch(instance):
+
+    instanceTables.pop(instance, None)
+
+def release_device_dispatch(device):
+
+    deviceTables.pop(device, None)
+
+def lookup_count():
+
+    return (
+        sum(table.lookupCount for table in instanceTables.values())
+        + sum(table.lookupCount for table in deviceTables.values())
+    )
@@ -0,0 +1,113 @@
+# statically load vulkan library
+from vulkan import *
+
+class FramePacket:
+
+
+    # every struct and array a frame hands to vulkan, built once per frame in
+    # flight and patched in place afterwards. The bindings turn python lists
+    # into fresh c arrays on every call, these already are c arrays, and the
+    # structs are passed by pointer so they go through untouched.
+    def __init__(self):
+
+        self.fences = None
+        self.imageFences = None
+        self.commandBuffers = None
+        self.waitSemaphores = None
+        self.waitStages = None
+        self.signalSemaphores = None
+        self.swapchains = None
+        self.descriptorSets = None
+        self.clearValues = None
+
+        # struct and pointer to it, the struct is kept for its attributes
+        self.submitInfo = None
+        self.pSubmitInfo = None
+        self.presentInfo = None
+        self.pPresentInfo = None
+        self.beginInfo = None
+        self.pBeginInfo = None
+        self.renderpassInfo = None
+        self.pRenderpassInfo = None
+        self.viewport = None
+        self.pViewport = None
+        self.scissor = None
+        self.pScissor = None
+
+        # nested members are looked up once, every lookup builds a new cdata
+        self.renderArea = None
+        self.clearColor = None
+
+def create_frame_packet(frame, imageIndex, headless):
+
+    # imageIndex is the engine's acquire target, presenting reads it directly
+    packet = FramePacket()
+
+    packet.fences = ffi.new("VkFence[1]", [frame.inFlightFence,])
+    packet.imageFences = ffi.new("VkFence[1]")
+    packet.commandBuffers = ffi.new("VkCommandBuffer[1]")
+    packet.descriptorSets = ffi.new("VkDescriptorSet[1]")
+    packet.clearValues = ffi.new("VkClearValue[1]")
+
+    if headless:
+        # nothing to wait on or present, the fence alone marks completion
+        packet.submitInfo = VkSubmitInfo(
+            commandBufferCount = 1, pCommandBuffers = packet.commandBuffers
+        )
+    else:
+        packet.waitSemaphores = ffi.new("VkSemaphore[1]", [frame.imageAvailable,])
+        packet.waitStages = ffi.new(
+            "VkPipelineStageFlags[1]", [VK_PIPELINE_STAGE_COLOR_ATTACHMENT_OUTPUT_BIT,]
+        )
+        packet.signalSemaphores = ffi.new("VkSemaphore[1]", [frame.renderFinished,])
+        packet.swapchains = ffi.new("VkSwapchainKHR[1]")
+
+        packet.submitInfo = VkSubmitInfo(
+            waitSemaphoreCount = 1, pWaitSemaphores = packet.waitSemaphores,
+            pWaitDstStageMask = packet.waitStages,
+            commandBufferCount = 1, pCommandBuffers = packet.commandBuffers,
+            signalSemaphoreCount = 1, pSignalSemaphores = packet.signalSemaphores
+        )
+        packet.presentInfo = VkPresentInfoKHR(
+            waitSemaphoreCount = 1, pWaitSemaphores = packet.signalSemaphores,
+            swapchainCount = 1, pSwapchains = packet.swapchains,
+            pImageIndices = imageIndex
+        )
+        packet.pPresentInfo = ffi.addressof(packet.presentInfo)
+    packet.pSubmitInfo = ffi.addressof(packet.submitInfo)
+
+    packet.beginInfo = VkCommandBufferBeginInfo()
+    packet.pBeginInfo = ffi.addressof(packet.beginInfo)
+
+    # render pass, framebuffer and extent are filled in when recording
+    packet.renderpassInfo = VkRenderPassBeginInfo(
+        clearValueCount = 1, pClearValues = packet.clearValues
+    )
+    packet.pRenderpassInfo = ffi.addressof(packet.renderpassInfo)
+    packet.renderArea = packet.renderpassInfo.renderArea
+    packet.clearColor = packet.clearValues[0].color.float32
+
+    packet.viewport = VkViewport(minDepth = 0.0, maxDepth = 1.0)
+    packet.pViewport = ffi.addressof(packet.viewport)
+    packet.scissor = VkRect2D()
+    packet.pScissor = ffi.addressof(packet.scissor)
+
+    return packet
+
+def prepare_recording(packet, renderPass, framebuffer, extent, clearColor):
+
+    renderpassInfo = packet.renderpassInfo
+    renderpassInfo.renderPass = renderPass
+    renderpassInfo.framebuffer = framebuffer
+    packet.renderArea.extent = extent
+
+    # unpacked, a slice would be another temporary
+    color = packet.clearColor
+    color[0], color[1], color[2], color[3] = clearColor
+
+    # transformation from image to framebuffer: stretch
+    packet.viewport.width = extent.width
+    packet.viewport.height = extent.height
+
+    # transformation from image to framebuffer: cutout
+    packet.scissor.extent = extent
@@ -10,6 +10,9 @@ class SwapChainFrame:
         self.framebuffer = None
         self.commandbuffer = None
 
+        # only set for images the engine allocated itself (headless rendering)
+        self.allocation = None
+
 class framebufferInput:
 
     def __init__(self):
@@ -18,25 +21,76 @@ class framebufferInput:
         self.renderpass = None
         self.swapchainExtent = None
 
+        # framebuffers are taken from here when given
+        self.framebufferCache = None
+
+class FramebufferCache:
+
+
+    def __init__(self, device):
+
+        self.device = device
+
+        # (render pass, image views, width, height) -> framebuffer
+        self.framebuffers = {}
+
+    def get(self, renderpass, attachments, extent):
+
+        key = (renderpass, tuple(attachments), extent.width, extent.height)
+
+        framebuffer = self.framebuffers.get(key)
+        if framebuffer is None:
+            framebuffer = create_framebuffer(self.device, renderpass, attachments, extent)
+            self.framebuffers[key] = framebuffer
+
+        return framebuffer
+
+    def evict_views(self, imageViews):
+
+        # must be called before the views are destroyed, a new view could
+        # otherwise get the same handle and be matched with a stale framebuffer
+        imageViews = set(imageViews)
+
+        for key in list(self.framebuffers):
+            if imageViews.intersection(key[1]):
+                vkDestroyFramebuffer(self.device, self.framebuffers.pop(key), None)
+
+    def destroy(self):
+
+        for framebuffer in self.framebuffers.values():
+            vkDestroyFramebuffer(self.device, framebuffer, None)
+
+        self.framebuffers = {}
+
+def create_framebuffer(device, renderpass, attachments, extent):
+
+    framebufferInfo = VkFramebufferCreateInfo(
+        renderPass = renderpass,
+        attachmentCount = len(attachments),
+        pAttachments = attachments,
+        width = extent.width,
+        height = extent.height,
+        layers=1
+    )
+
+    return vkCreateFramebuffer(device, framebufferInfo, None)
+
 def make_framebuffers(inputChunk, frames):
 
     for i,frame in enumerate(frames):
 
         attachments = [frame.image_view,]
 
-        framebufferInfo = VkFramebufferCreateInfo(
-            renderPass = inputChunk.renderpass,
-            attachmentCount = 1,
-            pAttachments = attachments,
-            width = inputChunk.swapchainExtent.width,
-            height = inputChunk.swapchainExtent.height,
-            layers=1
-        )
-
         try:
-            frame.framebuffer = vkCreateFramebuffer(
-                inputChunk.device, framebufferInfo, None
-            )
+            if inputChunk.framebufferCache is None:
+                frame.framebuffer = create_framebuffer(
+                    inputChunk.device, inputChunk.renderpass, attachments,
+                    inputChunk.swapchainExtent
+                )
+            else:
+                frame.framebuffer = inputChunk.framebufferCache.get(
+                    inputChunk.renderpass, attachments, inputChunk.swapchainExtent
+                )
             
         except:
             print(f"Failed to make framebuffer for frame {i}")
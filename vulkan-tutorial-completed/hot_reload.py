@@ -0,0 +1,138 @@
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+
+SOURCE_EXTENSIONS = (".vert", ".frag", ".geom", ".tesc", ".tese", ".comp")
+
+class CompileResult:
+
+
+    def __init__(self, sourcePath, spirvPath, succeeded, message):
+
+        self.sourcePath = sourcePath
+        self.spirvPath = spirvPath
+        self.succeeded = succeeded
+        self.message = message
+
+def find_compiler():
+
+    for compiler in ("glslc", "glslangValidator"):
+        path = shutil.which(compiler)
+        if path is not None:
+            return path
+
+    return None
+
+def spirv_path(sourcePath):
+
+    # follows the names already in shaders/: shader.vert -> vert.spv,
+    # mesh.vert -> mesh_vert.spv
+    directory, filename = os.path.split(sourcePath)
+    name, extension = os.path.splitext(filename)
+    stage = extension[1:]
+
+    if name == "shader":
+        return os.path.join(directory, f"{stage}.spv")
+
+    return os.path.join(directory, f"{name}_{stage}.spv")
+
+def compile_shader(compiler, sourcePath, spirvPath):
+
+    # compiled next to the target then renamed over it, so a pipeline
+    # being built never reads a half written file
+    directory = os.path.dirname(os.path.abspath(spirvPath))
+    descriptor, temporaryPath = tempfile.mkstemp(dir = directory, suffix = ".spv.tmp")
+    os.close(descriptor)
+
+    if os.path.basename(compiler).startswith("glslangValidator"):
+        command = [compiler, "-V", sourcePath, "-o", temporaryPath]
+    else:
+        command = [compiler, sourcePath, "-o", temporaryPath]
+
+    try:
+        completed = subprocess.run(command, capture_output = True, text = True)
+    except OSError as error:
+        os.unlink(temporaryPath)
+        return CompileResult(sourcePath, spirvPath, False, str(error))
+
+    if completed.returncode != 0:
+        os.unlink(temporaryPath)
+        return CompileResult(
+            sourcePath, spirvPath, False, (completed.stdout + completed.stderr).strip()
+        )
+
+    os.replace(temporaryPath, spirvPath)
+    return CompileResult(sourcePath, spirvPath, True, "")
+
+class ShaderWatcher:
+
+
+    # polls a directory of glsl sources from a background thread, compiles the
+    # ones that changed and queues the results. The render loop drains the
+    # queue between frames and never waits on a compile.
+    def __init__(self, directory, compiler = None, pollInterval = 0.5):
+
+        self.directory = directory
+        self.compiler = compiler or find_compiler()
+        self.pollInterval = pollInterval
+
+        self.results = queue.Queue()
+        self.stopEvent = threading.Event()
+
+        # sources are only compiled once they change after the watcher starts
+        self.modificationTimes = self.scan()
+
+        self.thread = threading.Thread(target = self.run, daemon = True)
+
+    def scan(self):
+
+        modificationTimes = {}
+
+        for filename in os.listdir(self.directory):
+            if filename.endswith(SOURCE_EXTENSIONS):
+                path = os.path.join(self.directory, filename)
+                try:
+                    modificationTimes[path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    # removed between listing and stat
+                    continue
+
+        return modificationTimes
+
+    def start(self):
+
+        if self.compiler is None:
+            print("No glslc or glslangValidator found, shader hot reload is disabled")
+            return
+
+        self.thread.start()
+
+    def run(self):
+
+        while not self.stopEvent.wait(self.pollInterval):
+
+            modificationTimes = self.scan()
+            for path,modificationTime in modificationTimes.items():
+                if self.modificationTimes.get(path) != modificationTime:
+                    self.results.put(compile_shader(self.compiler, path, spirv_path(path)))
+
+            self.modificationTimes = modificationTimes
+
+    def poll(self):
+
+        # every result finished since the last call, without blocking
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def stop(self):
+
+        self.stopEvent.set()
+        if self.thread.is_alive():
+            self.thread.join()
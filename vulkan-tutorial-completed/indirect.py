@@ -0,0 +1,149 @@
+# statically load vulkan library
+from vulkan import *
+
+import numpy as np
+
+import memory
+
+# layout of VkDrawIndexedIndirectCommand, one per object in the draw buffer
+DRAW_COMMAND_DTYPE = np.dtype([
+    ("indexCount", np.uint32),
+    ("instanceCount", np.uint32),
+    ("firstIndex", np.uint32),
+    ("vertexOffset", np.int32),
+    ("firstInstance", np.uint32),
+])
+
+# where each mesh of a batch starts in the shared vertex and index buffers
+MESH_RANGE_DTYPE = np.dtype([
+    ("indexCount", np.uint32),
+    ("firstIndex", np.uint32),
+    ("vertexOffset", np.int32),
+])
+
+class MeshBatch:
+
+
+    def __init__(self):
+
+        self.vertexDtype = None
+        self.vertexBuffer = None
+        self.vertexAllocation = None
+
+        # vertices at binding 0 and instances at binding 1, kept as c arrays
+        # so recording doesn't build new ones from python lists
+        self.bindBuffers = ffi.new("VkBuffer[2]")
+        self.bindOffsets = ffi.new("VkDeviceSize[2]")
+
+        self.indexBuffer = None
+        self.indexAllocation = None
+        self.indexType = VK_INDEX_TYPE_UINT32
+
+        self.ranges = None
+
+class DrawBuffer:
+
+
+    def __init__(self):
+
+        self.buffer = None
+        self.allocation = None
+        self.drawCount = 0
+
+        # host copy of the commands, for gpus that can't draw them indirectly
+        self.commands = None
+
+def create_mesh_batch(allocator, commandPool, queue, meshes):
+
+    # meshes is a list of (vertices, indices) pairs sharing one vertex dtype.
+    # they are packed into a single vertex and index buffer so every object
+    # can be drawn without binding anything in between.
+    vertexCounts = np.array([len(vertices) for vertices,_ in meshes])
+    indexCounts = np.array([np.size(indices) for _,indices in meshes])
+
+    batch = MeshBatch()
+    batch.vertexDtype = meshes[0][0].dtype
+
+    batch.ranges = np.zeros(len(meshes), dtype = MESH_RANGE_DTYPE)
+    batch.ranges["indexCount"] = indexCounts
+    batch.ranges["firstIndex"][1:] = np.cumsum(indexCounts)[:-1]
+    batch.ranges["vertexOffset"][1:] = np.cumsum(vertexCounts)[:-1]
+
+    vertices = np.concatenate([vertices for vertices,_ in meshes])
+    indices = np.concatenate([np.ravel(indices) for _,indices in meshes]).astype(np.uint32)
+
+    batch.vertexBuffer, batch.vertexAllocation = memory.create_device_local_buffer(
+        allocator, commandPool, queue, vertices, VK_BUFFER_USAGE_VERTEX_BUFFER_BIT
+    )
+    batch.indexBuffer, batch.indexAllocation = memory.create_device_local_buffer(
+        allocator, commandPool, queue, indices, VK_BUFFER_USAGE_INDEX_BUFFER_BIT
+    )
+
+    return batch
+
+def build_draw_commands(batch, meshIds):
+
+    # one command per object, drawing its mesh with its own instance data
+    meshIds = np.asarray(meshIds)
+    ranges = batch.ranges[meshIds]
+
+    drawCommands = np.zeros(len(meshIds), dtype = DRAW_COMMAND_DTYPE)
+    drawCommands["indexCount"] = ranges["indexCount"]
+    drawCommands["instanceCount"] = 1
+    drawCommands["firstIndex"] = ranges["firstIndex"]
+    drawCommands["vertexOffset"] = ranges["vertexOffset"]
+    drawCommands["firstInstance"] = np.arange(len(meshIds))
+
+    return drawCommands
+
+def create_draw_buffer(allocator, commandPool, queue, drawCommands):
+
+    drawBuffer = DrawBuffer()
+    drawBuffer.drawCount = len(drawCommands)
+    drawBuffer.commands = drawCommands
+
+    drawBuffer.buffer, drawBuffer.allocation = memory.create_device_local_buffer(
+        allocator, commandPool, queue, drawCommands, VK_BUFFER_USAGE_INDIRECT_BUFFER_BIT
+    )
+
+    return drawBuffer
+
+def record_draws(commandBuffer, batch, drawBuffer, instanceBuffer, features, maxDrawCount):
+
+    batch.bindBuffers[0] = batch.vertexBuffer
+    batch.bindBuffers[1] = instanceBuffer.buffer
+    vkCmdBindVertexBuffers(commandBuffer, 0, 2, batch.bindBuffers, batch.bindOffsets)
+    vkCmdBindIndexBuffer(commandBuffer, batch.indexBuffer, 0, batch.indexType)
+
+    stride = DRAW_COMMAND_DTYPE.itemsize
+
+    # with multi draw the whole scene is a handful of calls whatever the object count
+    if features.multiDrawIndirect and features.drawIndirectFirstInstance:
+        for first in range(0, drawBuffer.drawCount, maxDrawCount):
+            vkCmdDrawIndexedIndirect(
+                commandBuffer, drawBuffer.buffer, first * stride,
+                min(maxDrawCount, drawBuffer.drawCount - first), stride
+            )
+
+    # without it each command still comes from the gpu buffer, one call apiece
+    elif features.drawIndirectFirstInstance:
+        for i in range(drawBuffer.drawCount):
+            vkCmdDrawIndexedIndirect(commandBuffer, drawBuffer.buffer, i * stride, 1, stride)
+
+    # indirect draws must then start at instance 0, so draw from the host copy
+    else:
+        for command in drawBuffer.commands.tolist():
+            indexCount, instanceCount, firstIndex, vertexOffset, firstInstance = command
+            vkCmdDrawIndexed(
+                commandBuffer, indexCount, instanceCount,
+                firstIndex, vertexOffset, firstInstance
+            )
+
+def destroy_mesh_batch(allocator, batch):
+
+    allocator.destroy_buffer(batch.vertexBuffer, batch.vertexAllocation)
+    allocator.destroy_buffer(batch.indexBuffer, batch.indexAllocation)
+
+def destroy_draw_buffer(allocator, drawBuffer):
+
+    allocator.destroy_buffer(drawBuffer.buffer, drawBuffer.allocation)
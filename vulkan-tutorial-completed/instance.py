@@ -18,7 +18,7 @@ def check_extension_support(extensionsToCheck):
 
     return True
 
-def create_instance(applicationName):
+def create_instance(applicationName, headless = False):
 
     vulkanVersion = VK_MAKE_VERSION(1, 0, 0)
 
@@ -27,7 +27,11 @@ def create_instance(applicationName):
             apiVersion = vulkanVersion
     )
 
-    requiredExtensions = glfw.get_required_instance_extensions()
+    # without a window there's no surface, so no extensions are needed
+    if headless:
+        requiredExtensions = []
+    else:
+        requiredExtensions = glfw.get_required_instance_extensions()
     print("------------- Required Extensions -------------")
     for extension in requiredExtensions:
         print(f"{extension}")
@@ -0,0 +1,39 @@
+# statically load vulkan library
+from vulkan import *
+
+import numpy as np
+
+import memory
+
+# layout of the per instance data read by shaders/instanced.vert. transform is
+# column major like glsl expects, so transform[i] is the matrix's i-th column.
+INSTANCE_DTYPE = np.dtype([
+    ("transform", np.float32, (4, 4)),
+    ("color", np.float32, (3,)),
+])
+
+class InstanceBuffer:
+
+
+    def __init__(self):
+
+        self.dtype = None
+        self.buffer = None
+        self.allocation = None
+        self.count = 0
+
+def create_instance_buffer(allocator, commandPool, queue, instances):
+
+    instanceBuffer = InstanceBuffer()
+    instanceBuffer.dtype = instances.dtype
+    instanceBuffer.count = len(instances)
+
+    instanceBuffer.buffer, instanceBuffer.allocation = memory.create_device_local_buffer(
+        allocator, commandPool, queue, instances, VK_BUFFER_USAGE_VERTEX_BUFFER_BIT
+    )
+
+    return instanceBuffer
+
+def destroy_instance_buffer(allocator, instanceBuffer):
+
+    allocator.destroy_buffer(instanceBuffer.buffer, instanceBuffer.allocation)
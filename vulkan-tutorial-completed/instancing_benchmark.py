@@ -0,0 +1,84 @@
+# statically load vulkan library
+from vulkan import *
+
+import time
+
+import numpy as np
+
+import instancing
+import mesh
+from main import Engine
+
+INSTANCE_COUNTS = (1000, 100000, 1000000)
+
+def make_triangle():
+
+    # same clockwise triangle the built-in vertex shader draws
+    vertices = np.zeros(3, dtype = mesh.VERTEX_DTYPE)
+    vertices["position"] = [[0.0, -0.5], [0.5, 0.5], [-0.5, 0.5]]
+    vertices["color"] = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+
+    indices = np.array([0, 1, 2], dtype = np.uint32)
+
+    return vertices, indices
+
+def make_instances(count, rng):
+
+    instances = np.zeros(count, dtype = instancing.INSTANCE_DTYPE)
+
+    # small copies scattered over the screen, column 3 holds the translation
+    transforms = instances["transform"]
+    transforms[:, 0, 0] = 0.02
+    transforms[:, 1, 1] = 0.02
+    transforms[:, 2, 2] = 1.0
+    transforms[:, 3, 3] = 1.0
+    transforms[:, 3, :2] = rng.uniform(-1.0, 1.0, (count, 2))
+
+    instances["color"] = rng.uniform(0.0, 1.0, (count, 3))
+
+    return instances
+
+def measure_frame_time(engine, frameCount, warmupFrames):
+
+    for _ in range(warmupFrames):
+        engine.render()
+    vkDeviceWaitIdle(engine.device)
+
+    start = time.perf_counter()
+    for _ in range(frameCount):
+        engine.render()
+    vkDeviceWaitIdle(engine.device)
+
+    return (time.perf_counter() - start) / frameCount
+
+def run(instanceCounts = INSTANCE_COUNTS, frameCount = 100, warmupFrames = 10):
+
+    rng = np.random.default_rng(0)
+
+    # a million instances take seconds per frame on a software rasterizer, so
+    # frames are waited for however long they take
+    engine = Engine(
+        640, 480, None, "Instancing Benchmark", headless = True, frameTimeout = UINT64_MAX
+    )
+    engine.load_mesh(*make_triangle())
+
+    results = {}
+    for count in instanceCounts:
+        engine.set_instances(make_instances(count, rng))
+        try:
+            results[count] = measure_frame_time(engine, frameCount, warmupFrames)
+        except VkTimeout:
+            # e.g. a driver that gives up on the wait itself, the count is
+            # reported as failed and the rest still run
+            vkDeviceWaitIdle(engine.device)
+            results[count] = None
+            print(f"{count:>9} instances: timed out")
+            continue
+        print(f"{count:>9} instances: {results[count] * 1000:.2f} ms/frame")
+
+    engine.close()
+
+    return results
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,285 @@
+# statically load vulkan library
+from vulkan import *
+
+import functools
+import os
+import sys
+import time
+import types
+
+import numpy as np
+import vulkan._vulkan as vulkanBindings
+
+import dispatch
+
+def project_modules():
+
+    # every loaded module living next to this one, they all pulled the
+    # vulkan functions into their globals with a star import
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    return [
+        module for module in list(sys.modules.values())
+        if getattr(module, "__file__", None)
+        and os.path.dirname(os.path.abspath(module.__file__)) == directory
+    ]
+
+def is_vulkan_callable(name, value):
+
+    # vk* are commands, Vk* build structs. Exceptions such as VkNotReady are
+    # classes and stay untouched, except clauses have to keep matching them.
+    return isinstance(value, types.FunctionType) and name[:2] in ("vk", "Vk")
+
+class Instrumentation:
+
+
+    # nothing here runs until install is called: the project keeps calling the
+    # vulkan bindings directly, so leaving the hooks in costs nothing. Once
+    # installed, every vk*/Vk* name in the project's modules and dispatch
+    # tables is swapped for a wrapper counting calls and wall time, and the
+    # bindings' struct constructor counts every struct built, nested ones too.
+    def __init__(self):
+
+        # name -> [calls, seconds]
+        self.calls = {}
+
+        # c type -> structs built
+        self.structs = {}
+
+        self.frameCount = 0
+        self.installed = False
+
+        # what each rendered frame did on its own, so a one off spike isn't
+        # averaged away: one {name: (calls, seconds)} and one {c type: built}
+        # per frame, plus the totals at the end of the last frame
+        self.frameCalls = []
+        self.frameStructs = []
+        self.lastCalls = {}
+        self.lastStructs = {}
+
+        # (namespace, name, original) to put back on uninstall
+        self.patched = []
+        self.patchedLoaders = []
+
+    def wrap(self, name, function):
+
+        counter = self.calls.setdefault(name, [0, 0.0])
+        perf_counter = time.perf_counter
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                counter[0] += 1
+                counter[1] += perf_counter() - start
+
+        return wrapper
+
+    def wrap_new(self, new):
+
+        structs = self.structs
+
+        @functools.wraps(new)
+        def wrapper(ctype, **kwargs):
+            structs[ctype] = structs.get(ctype, 0) + 1
+            return new(ctype, **kwargs)
+
+        return wrapper
+
+    def patch(self, namespace, name, value):
+
+        self.patched.append((namespace, name, namespace.get(name)))
+        namespace[name] = value
+
+    def install(self, engine = None, modules = None):
+
+        if self.installed:
+            return
+        self.installed = True
+
+        if modules is None:
+            modules = project_modules()
+
+        for module in modules:
+            namespace = vars(module)
+            for name, value in list(namespace.items()):
+                if is_vulkan_callable(name, value):
+                    self.patch(namespace, name, self.wrap(name, value))
+
+        self.patch(vars(vulkanBindings), "_new", self.wrap_new(vulkanBindings._new))
+
+        # procedures already resolved are wrapped in place, those resolved
+        # later are wrapped by the loader
+        for table in list(dispatch.instanceTables.values()) + list(dispatch.deviceTables.values()):
+            namespace = vars(table)
+            for name, value in list(namespace.items()):
+                if name.startswith("vk") and callable(value):
+                    self.patch(namespace, name, self.wrap(name, value))
+
+            self.patchedLoaders.append((table, table.loader))
+            table.loader = self.wrap_loader(table, table.loader)
+
+        # frames are counted around the engine's render, no hook inside it
+        if engine is not None:
+            self.patch(vars(engine), "render", self.wrap_render(engine.render))
+
+    def wrap_loader(self, table, loader):
+
+        def wrapped_loader(handle, name):
+            procedure = loader(handle, name)
+            wrapper = self.wrap(name, procedure)
+            # the table sets the attribute itself, remember what to restore
+            self.patched.append((vars(table), name, procedure))
+            return wrapper
+
+        return wrapped_loader
+
+    def wrap_render(self, render):
+
+        @functools.wraps(render)
+        def wrapper(*args, **kwargs):
+            # whatever ran between two frames, e.g. loading, isn't the frame's
+            self.mark_totals()
+            try:
+                return render(*args, **kwargs)
+            finally:
+                self.frameCount += 1
+                self.record_frame()
+
+        return wrapper
+
+    def mark_totals(self):
+
+        self.lastCalls = {name: tuple(counter) for name, counter in self.calls.items()}
+        self.lastStructs = dict(self.structs)
+
+    def record_frame(self):
+
+        calls = {}
+        for name, (count, seconds) in self.calls.items():
+            lastCount, lastSeconds = self.lastCalls.get(name, (0, 0.0))
+            if count != lastCount:
+                calls[name] = (count - lastCount, seconds - lastSeconds)
+
+        structs = {
+            ctype: count - self.lastStructs.get(ctype, 0)
+            for ctype, count in self.structs.items()
+            if count != self.lastStructs.get(ctype, 0)
+        }
+
+        self.frameCalls.append(calls)
+        self.frameStructs.append(structs)
+        self.mark_totals()
+
+    def per_frame_calls(self, name):
+
+        # calls and seconds of one function in every recorded frame
+        calls = np.array([frame.get(name, (0, 0.0))[0] for frame in self.frameCalls])
+        seconds = np.array([frame.get(name, (0, 0.0))[1] for frame in self.frameCalls])
+
+        return calls, seconds
+
+    def per_frame_structs(self, ctype = None):
+
+        # structs built in every recorded frame, of one type or of all of them
+        if ctype is None:
+            return np.array([sum(frame.values()) for frame in self.frameStructs], dtype = np.int64)
+
+        return np.array([frame.get(ctype, 0) for frame in self.frameStructs], dtype = np.int64)
+
+    def uninstall(self):
+
+        if not self.installed:
+            return
+        self.installed = False
+
+        for namespace, name, original in reversed(self.patched):
+            if original is None:
+                # e.g. render, the engine's own method rather than an attribute
+                namespace.pop(name, None)
+            else:
+                namespace[name] = original
+        self.patched = []
+
+        for table, loader in self.patchedLoaders:
+            table.loader = loader
+        self.patchedLoaders = []
+
+    def reset(self):
+
+        for counter in self.calls.values():
+            counter[0] = 0
+            counter[1] = 0.0
+        self.structs.clear()
+        self.frameCount = 0
+        self.frameCalls = []
+        self.frameStructs = []
+        self.mark_totals()
+
+    def report(self, top = 25):
+
+        # per frame distributions, the median is the steady state and the
+        # maximum the worst single frame. Without recorded frames the run
+        # totals are shown instead.
+        if not self.frameCalls:
+            return self.report_totals(top)
+
+        frameSeconds = np.array([
+            sum(seconds for _, seconds in frame.values()) for frame in self.frameCalls
+        ])
+        ranked = sorted(
+            (name for name, (calls, _) in self.calls.items() if calls),
+            key = lambda name: self.per_frame_calls(name)[1].sum(), reverse = True
+        )
+        totalSeconds = frameSeconds.sum() or 1.0
+
+        lines = [
+            f"{len(self.frameCalls)} frames in vulkan calls:"
+            f" median {np.median(frameSeconds) * 1000:.3f} ms,"
+            f" worst {frameSeconds.max() * 1000:.3f} ms",
+            f"{'function':<40}{'calls med':>10}{'max':>6}{'us med':>10}{'us max':>10}{'share':>8}",
+        ]
+        for name in ranked[:top]:
+            calls, seconds = self.per_frame_calls(name)
+            lines.append(
+                f"{name:<40}{np.median(calls):>10.1f}{calls.max():>6}"
+                f"{np.median(seconds) * 1e6:>10.1f}{seconds.max() * 1e6:>10.1f}"
+                f"{seconds.sum() / totalSeconds:>8.1%}"
+            )
+
+        lines.append("")
+        builtPerFrame = self.per_frame_structs()
+        lines.append(
+            f"structs built per frame: median {np.median(builtPerFrame):.1f},"
+            f" max {builtPerFrame.max()}"
+        )
+        lines.append(f"{'struct':<40}{'built med':>10}{'max':>6}")
+        ctypes = sorted(
+            {ctype for frame in self.frameStructs for ctype in frame},
+            key = lambda ctype: self.per_frame_structs(ctype).max(), reverse = True
+        )
+        for ctype in ctypes[:top]:
+            built = self.per_frame_structs(ctype)
+            lines.append(f"{ctype:<40}{np.median(built):>10.1f}{built.max():>6}")
+
+        return "\n".join(lines)
+
+    def report_totals(self, top = 25):
+
+        ranked = sorted(
+            ((name, calls, seconds) for name, (calls, seconds) in self.calls.items() if calls),
+            key = lambda entry: entry[2], reverse = True
+        )
+
+        lines = [f"{'function':<40}{'calls':>10}{'ms':>10}"]
+        for name, calls, seconds in ranked[:top]:
+            lines.append(f"{name:<40}{calls:>10}{seconds * 1000:>10.2f}")
+
+        lines.append("")
+        lines.append(f"{'struct':<40}{'built':>10}")
+        for ctype, count in sorted(self.structs.items(), key = lambda entry: entry[1], reverse = True)[:top]:
+            lines.append(f"{ctype:<40}{count:>10}")
+
+        return "\n".join(lines)
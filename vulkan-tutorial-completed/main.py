@@ -5,13 +5,39 @@ from vulkan import *
 import glfw
 import glfw.GLFW as GLFW_CONSTANTS
 
+import collections
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
 import instance
 
+import dispatch
 import device
+import queue_families
+import allocator
 import swapchain
 import pipeline
+import pipeline_cache
 import framebuffer
+import offscreen
+import readback
+import mesh
+import instancing
+import texture
+import indirect
 import commands
+import uploads
+import shaders
+import hot_reload
+import descriptors
+import uniforms
+import frame_packets
+import profiler
+import instrumentation
 
 class Sync:
 
@@ -37,9 +63,29 @@ class Sync:
         except:
             return None
 
+class InFlightFrame:
+
+    def __init__(self):
+
+        self.commandbuffer = None
+        self.inFlightFence = None
+        self.imageAvailable = None
+        self.renderFinished = None
+
+        # transient descriptor sets, all released together once the frame's fence signals
+        self.descriptorAllocator = None
+
+        # structs handed to vulkan by this frame, built once and patched in place
+        self.packet = None
+
 class Engine:
 
-    def __init__(self, width, height, window, appName):
+    def __init__(self, width, height, window, appName, maxFramesInFlight = 2,
+        staticScene = False, pipelineCacheFilepath = "pipeline_cache.bin",
+        headless = False, offscreenImageCount = None, readbackEnabled = False,
+        allocatorStrategy = "freelist", hotReload = False, profile = False,
+        frameTimeout = 1000000000
+    ):
 
         # glfw window parameters
         self.width = width
@@ -47,14 +93,125 @@ class Engine:
 
         self.window = window
         self.appName = appName
+
+        # headless engines render into images they allocate themselves instead
+        # of a swapchain, so they need neither glfw nor a surface
+        self.headless = headless
+        if offscreenImageCount is None:
+            offscreenImageCount = maxFramesInFlight
+        self.offscreenImageCount = offscreenImageCount
+        self.nextImage = 0
+
+        # copy every rendered image into host visible memory, only offscreen
+        # images are left in a layout that can be copied from
+        if readbackEnabled and not headless:
+            raise ValueError("readback is only supported by headless engines")
+        self.readbackEnabled = readbackEnabled
+
+        # number of frames the cpu may record ahead of the gpu
+        self.maxFramesInFlight = maxFramesInFlight
+
+        # nanoseconds to wait for a fence or an image before VkTimeout is raised,
+        # heavy scenes on a software rasterizer need UINT64_MAX
+        self.frameTimeout = frameTimeout
+        self.currentFrame = 0
+
+        # a static scene records one command buffer per swapchain image up front
+        # and only records them again once something marks them as dirty
+        self.staticScene = staticScene
+        self.commandsDirty = True
+
+        # color used for the background
+        self.clearColor = [0.67, 0.08, 0.16, 1.0]
+
+        # buffers and images are sub-allocated from large device memory blocks
+        self.allocatorStrategy = allocatorStrategy
+
+        # geometry drawn by the engine, without a mesh the vertex shader
+        # generates a single triangle by itself
+        self.mesh = None
+        self.instanceBuffer = None
+
+        # meshes still being uploaded by the transfer queue, with their tickets
+        self.pendingMeshes = []
+
+        # a scene of many meshes is drawn from a gpu side buffer of draw commands
+        self.meshBatch = None
+        self.drawBuffer = None
+        self.texture = None
+        self.vertexFilepath = "shaders/vert.spv"
+        self.fragmentFilepath = "shaders/frag.spv"
+
+        # decoded images are cached, so loading the same files again skips the decode
+        self.textureLoader = texture.TextureLoader()
+        self.textures = []
+
+        # per frame data lives in a ring of persistently mapped uniform slots,
+        # per draw data is pushed while recording. Both are staged here, in the
+        # column major layout the shaders expect, and copied into place each frame.
+        self.camera = np.identity(4, dtype = np.float32)
+        self.pushConstants = np.zeros((), dtype = uniforms.PUSH_CONSTANT_DTYPE)
+        self.pushConstants["model"] = np.identity(4, dtype = np.float32)
+        self.pushConstantData = ffi.from_buffer(self.pushConstants)
+
+        # glsl sources in shaders/ are recompiled on a background thread when
+        # they change, and the pipeline is swapped between two frames
+        self.shaderWatcher = None
+
+        # gpu timestamps and cpu timings of every frame, read back a few frames late
+        self.profile = profile
+        self.profiler = None
+
+        # compiled pipelines are kept on disk between runs
+        self.pipelineCacheFilepath = pipelineCacheFilepath
+        self.pipelineTimings = {}
+
+        # set when the window is resized or the swapchain stops matching the surface
+        self.framebufferResized = False
+
+        # glfw may only be called from the main thread, an engine rendering on
+        # another one is told the framebuffer size by the app instead
+        self.windowSize = None
+        self.recreatingSwapchain = False
+        self.recreateTimes = []
+
+        # pipeline creation time skipped by resizes that kept the pipeline
+        self.pipelineTimeSaved = 0.0
+
+        # acquired image index, written in place by vkAcquireNextImageKHR
+        self.imageIndex = ffi.new("uint32_t*")
         
         self.make_instance()
         self.make_device()
+        self.make_pipeline_cache()
+
+        # render passes and framebuffers are shared by everything with the same
+        # attachments, and survive swapchain recreation when still compatible
+        self.renderPasses = pipeline.RenderPassCache(self.device)
+        self.framebuffers = framebuffer.FramebufferCache(self.device)
+
+        self.shaderRegistry = shaders.ShaderRegistry(self.device)
+        self.descriptorLayouts = descriptors.DescriptorLayoutCache(self.device)
+        self.frameSetLayout = self.descriptorLayouts.get(uniforms.FRAME_SET_BINDINGS)
+        self.textureSetLayout = self.descriptorLayouts.get(texture.TEXTURE_SET_BINDINGS)
+
+        # sets that live until the engine closes, e.g. one per texture
+        self.descriptorAllocator = descriptors.DescriptorAllocator(self.device)
+        self.samplers = texture.SamplerCache(self.device)
         self.make_pipeline()
         self.finalize_setup()
+
+        if hotReload:
+            self.shaderWatcher = hot_reload.ShaderWatcher("shaders")
+            self.shaderWatcher.start()
     
     def make_instance(self):
-        self.instance = instance.create_instance(self.appName)
+        self.instance = instance.create_instance(self.appName, self.headless)
+        self.instanceProcedures = dispatch.get_instance_dispatch(self.instance)
+
+        self.surface = None
+        if self.headless:
+            return
 
         vulkanSurface = ffi.new("VkSurfaceKHR*")
         if (glfw.create_window_surface(
@@ -68,21 +225,59 @@ class Engine:
     
     def make_device(self):
 
-        self.physicalDevice = device.choose_physical_device(self.instance)
+        self.physicalDevice = device.choose_physical_device(self.instance, self.headless)
         self.device = device.create_logical_device(
             physicalDevice = self.physicalDevice, instance = self.instance, 
             surface = self.surface
         )
+        self.deviceProcedures = dispatch.get_device_dispatch(self.device)
+        self.deviceFeatures = device.choose_device_features(self.physicalDevice)
+        self.maxDrawIndirectCount = vkGetPhysicalDeviceProperties(
+            self.physicalDevice
+        ).limits.maxDrawIndirectCount
         queues = device.get_queues(
             physicalDevice = self.physicalDevice, logicalDevice = self.device, 
             instance = self.instance, surface = self.surface
         )
         self.graphicsQueue = queues[0]
         self.presentQueue = queues[1]
+        self.transferQueue = queues[2]
+
+        self.allocator = allocator.Allocator(
+            self.device, self.physicalDevice, strategy = self.allocatorStrategy
+        )
+
+        # asynchronous uploads use the transfer queue when the gpu has one
+        queueFamilyIndices = queue_families.find_queue_families(
+            self.physicalDevice, self.instance, self.surface
+        )
+        self.graphicsFamily = queueFamilyIndices.graphicsFamily
+        self.uploads = uploads.UploadScheduler(
+            self.allocator, queueFamilyIndices.graphicsFamily, self.graphicsQueue,
+            queueFamilyIndices.transferFamily, self.transferQueue
+        )
+
+        if self.headless:
+            self.make_offscreen_targets()
+        else:
+            self.make_swapchain()
+
+    def make_offscreen_targets(self):
+
+        bundle = offscreen.create_offscreen_targets(
+            self.allocator, self.width, self.height, self.offscreenImageCount
+        )
+
+        self.swapchain = None
+        self.swapchainFrames = bundle.frames
+        self.swapchainFormat = bundle.format
+        self.swapchainExtent = bundle.extent
+
+    def make_swapchain(self, oldSwapchain = VK_NULL_HANDLE):
         
         bundle = swapchain.create_swapchain(
             self.instance, self.device, self.physicalDevice, self.surface,
-            self.width, self.height
+            self.width, self.height, oldSwapchain
         )
 
         self.swapchain = bundle.swapchain
@@ -90,34 +285,104 @@ class Engine:
         self.swapchainFormat = bundle.format
         self.swapchainExtent = bundle.extent
 
+    def make_pipeline_cache(self):
+
+        self.pipelineCache = pipeline_cache.load_pipeline_cache(
+            self.device, self.physicalDevice, self.pipelineCacheFilepath
+        )
+
     def make_pipeline(self):
 
+        vertexBindings = []
+        vertexAttributes = []
+        if self.mesh is not None:
+            binding, vertexAttributes = mesh.vertex_input_descriptions(self.mesh.vertexDtype)
+            vertexBindings.append(binding)
+        elif self.meshBatch is not None:
+            binding, vertexAttributes = mesh.vertex_input_descriptions(
+                self.meshBatch.vertexDtype
+            )
+            vertexBindings.append(binding)
+
+        if self.instanceBuffer is not None:
+            binding, instanceAttributes = mesh.vertex_input_descriptions(
+                self.instanceBuffer.dtype, binding = 1,
+                inputRate = VK_VERTEX_INPUT_RATE_INSTANCE,
+                firstLocation = len(vertexAttributes)
+            )
+            vertexBindings.append(binding)
+            vertexAttributes = vertexAttributes + instanceAttributes
+
         inputBundle = pipeline.InputBundle(
             device = self.device,
             swapchainImageFormat = self.swapchainFormat,
-            swapchainExtent = self.swapchainExtent,
 
             # paths to the shader spir-v files
-            vertexFilepath = "shaders/vert.spv",
-            fragmentFilepath = "shaders/frag.spv"
+            vertexFilepath = self.vertexFilepath,
+            fragmentFilepath = self.fragmentFilepath,
+            pipelineCache = self.pipelineCache.pipelineCache,
+            renderPass = self.renderPasses.get(self.swapchainFormat, self.final_layout()),
+            finalLayout = self.final_layout(),
+            vertexBindings = vertexBindings,
+            vertexAttributes = vertexAttributes,
+            setLayouts = [self.frameSetLayout, self.textureSetLayout],
+            pushConstantRanges = uniforms.push_constant_ranges(),
+            shaderRegistry = self.shaderRegistry
         )
 
+        start = time.perf_counter()
         outputBundle = pipeline.create_graphics_pipeline(inputBundle)
+        elapsed = time.perf_counter() - start
+
+        # compare these between a first run and later runs to see what the cache saves
+        cacheState = "warm" if self.pipelineCache.warm else "cold"
+        self.pipelineTimings["graphics"] = elapsed
+        print(f"Created graphics pipeline in {elapsed * 1000:.2f} ms ({cacheState} cache)")
 
         self.pipelineLayout = outputBundle.pipelineLayout
         self.renderpass = outputBundle.renderPass
         self.pipeline = outputBundle.pipeline
+        self.shaderModules = outputBundle.shaderModules
+
+    def destroy_pipeline(self):
+
+        vkDestroyPipeline(self.device, self.pipeline, None)
+        vkDestroyPipelineLayout(self.device, self.pipelineLayout, None)
+        pipeline.release_shader_modules(self.shaderRegistry, self.shaderModules)
     
-    def finalize_setup(self):
+    def final_layout(self):
+
+        # offscreen images are left ready to be copied out, not presented
+        if self.headless:
+            return VK_IMAGE_LAYOUT_TRANSFER_SRC_OPTIMAL
+
+        return VK_IMAGE_LAYOUT_PRESENT_SRC_KHR
+
+    def make_framebuffers(self):
 
         framebufferInput = framebuffer.framebufferInput()
         framebufferInput.device = self.device
         framebufferInput.renderpass = self.renderpass
         framebufferInput.swapchainExtent = self.swapchainExtent
+        framebufferInput.framebufferCache = self.framebuffers
         framebuffer.make_framebuffers(
             framebufferInput, self.swapchainFrames
         )
 
+    def make_frame_command_buffers(self):
+
+        commandbufferInput = commands.commandbufferInputChunk()
+        commandbufferInput.device = self.device
+        commandbufferInput.commandPool = self.commandPool
+        commandbufferInput.frames = self.swapchainFrames
+        return commands.make_command_buffers(
+            commandbufferInput
+        )
+    
+    def finalize_setup(self):
+
+        self.make_framebuffers()
+
         commandPoolInput = commands.commandPoolInputChunk()
         commandPoolInput.device = self.device
         commandPoolInput.physicalDevice = self.physicalDevice
@@ -127,165 +392,945 @@ class Engine:
             commandPoolInput
         )
 
+        self.mainCommandbuffer = self.make_frame_command_buffers()
+
+        self.make_frames_in_flight()
+        self.make_uniform_ring()
+
+        # timestamps are written per uniform slot, they are reused just as often
+        if self.profile:
+            self.profiler = profiler.Profiler(
+                self.device, self.physicalDevice, self.graphicsFamily,
+                self.uniform_slot_count()
+            )
+
+        # one staging buffer per image, the image fence also guards its buffer
+        if self.readbackEnabled:
+            self.readbackBuffers = readback.create_readback_buffers(
+                self.allocator, self.swapchainExtent, len(self.swapchainFrames)
+            )
+
+        if self.staticScene:
+            self.record_static_commands()
+
+    def make_frames_in_flight(self):
+
+        # each in flight frame owns its own command buffer and sync objects
+        self.framesInFlight = [InFlightFrame() for _ in range(self.maxFramesInFlight)]
+
         commandbufferInput = commands.commandbufferInputChunk()
         commandbufferInput.device = self.device
         commandbufferInput.commandPool = self.commandPool
-        commandbufferInput.frames = self.swapchainFrames
-        self.mainCommandbuffer = commands.make_command_buffers(
-            commandbufferInput
+        commandbufferInput.frames = self.framesInFlight
+        commands.make_command_buffers(commandbufferInput)
+
+        for frame in self.framesInFlight:
+            frame.inFlightFence = Sync.make_fence(self.device)
+            frame.imageAvailable = Sync.make_semaphore(self.device)
+            frame.renderFinished = Sync.make_semaphore(self.device)
+            frame.descriptorAllocator = descriptors.DescriptorAllocator(self.device)
+            frame.packet = frame_packets.create_frame_packet(
+                frame, self.imageIndex, self.headless
+            )
+
+        # fence of the in flight frame currently using each swapchain image
+        self.imagesInFlight = [None,] * len(self.swapchainFrames)
+
+    def uniform_slot_count(self):
+
+        # static command buffers are recorded per image and bind that image's
+        # slot, otherwise each frame in flight has its own
+        if self.staticScene:
+            return len(self.swapchainFrames)
+
+        return self.maxFramesInFlight
+
+    def make_uniform_ring(self):
+
+        self.uniformRing = uniforms.create_uniform_ring(
+            self.allocator, self.physicalDevice, self.frameSetLayout,
+            self.uniform_slot_count()
+        )
+
+    def destroy_swapchain_frames(self, frames):
+
+        commands.free_command_buffers(
+            self.device, self.commandPool, 
+            [frame.commandbuffer for frame in frames] + [self.mainCommandbuffer,]
+        )
+
+        self.framebuffers.evict_views([frame.image_view for frame in frames])
+        for frame in frames:
+            vkDestroyImageView(
+                device = self.device, imageView = frame.image_view, pAllocator = None
+            )
+
+    def recreate_swapchain(self):
+
+        self.recreatingSwapchain = True
+
+        # cleared before the size is read: the app sets the size first and the
+        # flag second, so a resize landing from here on raises the flag again
+        # and the next frame recreates once more instead of losing it
+        self.framebufferResized = False
+
+        # a minimized window has nothing to present to, wait until it comes back.
+        # A render thread can't wait for glfw events, it tries again next frame.
+        if self.windowSize is not None:
+            self.width, self.height = self.windowSize
+            if self.width == 0 or self.height == 0:
+                self.framebufferResized = True
+                self.recreatingSwapchain = False
+                return
+        else:
+            self.width, self.height = glfw.get_framebuffer_size(self.window)
+            while self.width == 0 or self.height == 0:
+                glfw.wait_events()
+                self.width, self.height = glfw.get_framebuffer_size(self.window)
+
+        start = time.perf_counter()
+
+        vkDeviceWaitIdle(self.device)
+
+        oldSwapchain = self.swapchain
+        oldFrames = self.swapchainFrames
+        oldFormat = self.swapchainFormat
+
+        self.make_swapchain(oldSwapchain)
+        self.destroy_swapchain_frames(oldFrames)
+        self.deviceProcedures.vkDestroySwapchainKHR(self.device, oldSwapchain, None)
+
+        # viewport and scissor are dynamic, so the pipeline only has to be
+        # rebuilt when the image format changes, the cache then hands out the
+        # render pass matching the new format
+        if self.swapchainFormat != oldFormat:
+            self.destroy_pipeline()
+            self.make_pipeline()
+        else:
+            self.pipelineTimeSaved += self.pipelineTimings["graphics"]
+
+        self.make_framebuffers()
+        self.mainCommandbuffer = self.make_frame_command_buffers()
+        self.imagesInFlight = [None,] * len(self.swapchainFrames)
+        if len(self.uniformRing.views) != self.uniform_slot_count():
+            uniforms.destroy_uniform_ring(self.allocator, self.uniformRing)
+            self.make_uniform_ring()
+            if self.profiler is not None:
+                self.profiler.set_slot_count(self.uniform_slot_count())
+        self.mark_commands_dirty()
+
+        self.recreatingSwapchain = False
+
+        elapsed = time.perf_counter() - start
+        self.recreateTimes.append(elapsed)
+        print(
+            f"Recreated swapchain at {self.swapchainExtent.width}x{self.swapchainExtent.height}"
+            f" in {elapsed * 1000:.2f} ms"
+            f" ({self.pipelineTimeSaved * 1000:.2f} ms of pipeline creation saved so far)"
         )
 
-        self.inFlightFence = Sync.make_fence(self.device)
-        self.imageAvailable = Sync.make_semaphore(self.device)
-        self.renderFinished = Sync.make_semaphore(self.device)
+    def rebuild_pipeline(self):
+
+        # the render pass doesn't depend on the pipeline state, the cache keeps it
+        self.destroy_pipeline()
+        self.make_pipeline()
+
+        self.mark_commands_dirty()
+
+    def apply_shader_reloads(self):
+
+        pipelineShaders = {
+            os.path.normpath(self.vertexFilepath), os.path.normpath(self.fragmentFilepath)
+        }
+
+        affected = False
+        for result in self.shaderWatcher.poll():
+            if not result.succeeded:
+                print(f"Failed to compile {result.sourcePath}, keeping the old pipeline")
+                print(result.message)
+                continue
+
+            print(f"Recompiled {result.sourcePath}")
+            if os.path.normpath(result.spirvPath) in pipelineShaders:
+                affected = True
 
-    def record_draw_commands(self, commandBuffer, imageIndex):
+        if affected:
+            self.swap_pipeline()
 
-        beginInfo = VkCommandBufferBeginInfo()
+    def swap_pipeline(self):
 
+        # the new pipeline is built while the old one keeps drawing, and only
+        # replaces it once it was created successfully
+        oldPipeline = self.pipeline
+        oldPipelineLayout = self.pipelineLayout
+        oldShaderModules = self.shaderModules
+
+        # a failed creation releases the layout and shader modules it took
+        # itself, e.g. a .spv that vanished is an OSError rather than a VkError
         try:
-            vkBeginCommandBuffer(commandBuffer, beginInfo)
-        except:
-            print("Failed to begin recording command buffer")
-        
-        renderpassInfo = VkRenderPassBeginInfo(
-            renderPass = self.renderpass,
-            framebuffer = self.swapchainFrames[imageIndex].framebuffer,
-            renderArea = [[0,0], self.swapchainExtent]
+            self.make_pipeline()
+        except (VkError, OSError) as error:
+            print(f"Failed to create the reloaded pipeline, keeping the old one: {error!r}")
+            return
+
+        # frames in flight may still be drawing with the old pipeline
+        vkDeviceWaitIdle(self.device)
+        vkDestroyPipeline(self.device, oldPipeline, None)
+        vkDestroyPipelineLayout(self.device, oldPipelineLayout, None)
+        pipeline.release_shader_modules(self.shaderRegistry, oldShaderModules)
+
+        self.mark_commands_dirty()
+
+    def load_mesh(self, vertices, indices):
+
+        # vertices is a structured array laid out like mesh.VERTEX_DTYPE (or any
+        # dtype matching the vertex shader), indices are triangle list indices
+        self.install_mesh(
+            mesh.create_mesh(
+                self.allocator, self.commandPool, self.graphicsQueue, vertices, indices
+            )
         )
+
+    def load_mesh_async(self, vertices, indices):
+
+        # same as load_mesh, but the copies run on the transfer queue while
+        # frames keep being drawn with the current mesh, which is swapped out
+        # between two frames once the upload completed
+        newMesh, tickets = mesh.create_mesh_async(self.uploads, vertices, indices)
+        self.uploads.flush()
+        self.pendingMeshes.append((newMesh, tickets))
+
+    def install_uploads(self):
+
+        if not self.uploads.inFlight:
+            return
+
+        self.uploads.poll()
+
+        while self.pendingMeshes:
+            newMesh, tickets = self.pendingMeshes[0]
+            if not all(ticket.complete for ticket in tickets):
+                break
+            self.pendingMeshes.pop(0)
+            self.install_mesh(newMesh)
+
+    def install_mesh(self, newMesh):
+
+        vkDeviceWaitIdle(self.device)
+
+        previousMesh = self.mesh
+        if previousMesh is not None:
+            mesh.destroy_mesh(self.allocator, previousMesh)
+        self.destroy_scene()
+
+        self.mesh = newMesh
+
+        # the pipeline only depends on the vertex layout, keep it when that is unchanged
+        if previousMesh is not None and previousMesh.vertexDtype == newMesh.vertexDtype:
+            self.mark_commands_dirty()
+            return
+
+        # instances or a texture already set keep being drawn with the new mesh
+        if self.instanceBuffer is None and self.texture is None:
+            self.vertexFilepath = "shaders/mesh_vert.spv"
+        self.rebuild_pipeline()
+
+    def set_instances(self, instances):
+
+        # instances is a structured array laid out like instancing.INSTANCE_DTYPE,
+        # the loaded mesh is then drawn once per element in a single draw call
+        if self.mesh is None:
+            raise ValueError("a mesh must be loaded before setting instances")
+        if self.texture is not None:
+            raise ValueError("textured meshes can't be instanced")
+
+        vkDeviceWaitIdle(self.device)
+
+        if self.instanceBuffer is not None:
+            instancing.destroy_instance_buffer(self.allocator, self.instanceBuffer)
+
+        self.instanceBuffer = instancing.create_instance_buffer(
+            self.allocator, self.commandPool, self.graphicsQueue, instances
+        )
+
+        self.vertexFilepath = "shaders/instanced_vert.spv"
+        self.rebuild_pipeline()
+
+    def load_scene(self, meshes, meshIds, instances):
+
+        # meshes is a list of (vertices, indices) pairs, object i draws
+        # meshes[meshIds[i]] with instances[i] (laid out like instancing.INSTANCE_DTYPE).
+        # all objects are drawn from one indirect buffer, so recording a frame
+        # costs the same whatever the object count.
+        if len(meshIds) != len(instances):
+            raise ValueError("every object needs exactly one instance")
+        if self.texture is not None:
+            raise ValueError("textured meshes can't be instanced")
+
+        vkDeviceWaitIdle(self.device)
+
+        if self.mesh is not None:
+            mesh.destroy_mesh(self.allocator, self.mesh)
+            self.mesh = None
+        self.destroy_scene()
+        if self.instanceBuffer is not None:
+            instancing.destroy_instance_buffer(self.allocator, self.instanceBuffer)
+
+        self.meshBatch = indirect.create_mesh_batch(
+            self.allocator, self.commandPool, self.graphicsQueue, meshes
+        )
+        self.drawBuffer = indirect.create_draw_buffer(
+            self.allocator, self.commandPool, self.graphicsQueue,
+            indirect.build_draw_commands(self.meshBatch, meshIds)
+        )
+        self.instanceBuffer = instancing.create_instance_buffer(
+            self.allocator, self.commandPool, self.graphicsQueue, instances
+        )
+
+        self.vertexFilepath = "shaders/instanced_vert.spv"
+        self.rebuild_pipeline()
+
+    def destroy_scene(self):
+
+        if self.meshBatch is None:
+            return
+
+        indirect.destroy_draw_buffer(self.allocator, self.drawBuffer)
+        indirect.destroy_mesh_batch(self.allocator, self.meshBatch)
+        self.drawBuffer = None
+        self.meshBatch = None
+
+    def set_camera(self, viewProjection):
+
+        # takes effect from the next frame on, without re-recording anything
+        self.camera[...] = np.asarray(viewProjection).T
+
+    def set_model(self, model):
+
+        # push constants are part of the recorded commands
+        self.pushConstants["model"] = np.asarray(model).T
+        self.mark_commands_dirty()
+
+    def allocate_frame_descriptor_set(self, bindings):
+
+        # for sets that are only used by the frame being recorded, they stay valid
+        # until this frame in flight slot comes around again. Static command
+        # buffers outlive that, so they can't use them.
+        layout = self.descriptorLayouts.get(bindings)
+        frame = self.framesInFlight[self.currentFrame]
+
+        return frame.descriptorAllocator.allocate(layout)[0]
+
+    def load_textures(self, filepaths, generateMipmaps = True):
+
+        # files are decoded on the loader's threads, then uploaded together
+        images = self.textureLoader.decode_all(filepaths)
+
+        textures = texture.create_textures(
+            self.allocator, self.commandPool, self.graphicsQueue, self.physicalDevice,
+            images, self.samplers.get(), generateMipmaps = generateMipmaps
+        )
+        self.textures.extend(textures)
+
+        return textures
+
+    def set_texture(self, newTexture):
+
+        # the loaded mesh must have vertices laid out like mesh.TEXTURED_VERTEX_DTYPE
+        if self.mesh is None:
+            raise ValueError("a mesh must be loaded before setting a texture")
+        if self.instanceBuffer is not None:
+            raise ValueError("textured meshes can't be instanced")
+
+        if newTexture.descriptorSet is None:
+            newTexture.descriptorSet = self.descriptorAllocator.allocate(self.textureSetLayout)[0]
+            writer = descriptors.DescriptorWriter()
+            writer.write_image(
+                newTexture.descriptorSet, 0, VK_DESCRIPTOR_TYPE_COMBINED_IMAGE_SAMPLER,
+                newTexture.imageView, newTexture.sampler
+            )
+            writer.flush(self.device)
+
+        # switching between textures only changes the bound set
+        previousTexture = self.texture
+        self.texture = newTexture
+        if previousTexture is not None:
+            self.mark_commands_dirty()
+            return
+
+        vkDeviceWaitIdle(self.device)
+        self.vertexFilepath = "shaders/textured_vert.spv"
+        self.fragmentFilepath = "shaders/textured_frag.spv"
+        self.rebuild_pipeline()
+
+    def mark_commands_dirty(self):
+
+        # anything that changes the pipeline, framebuffers or clear state must
+        # call this so the static command buffers get recorded again
+        self.commandsDirty = True
+
+    def set_clear_color(self, color):
+
+        self.clearColor = list(color)
+        self.mark_commands_dirty()
+
+    def record_static_commands(self):
+
+        # the recorded buffers may still be pending on the gpu
+        vkDeviceWaitIdle(self.device)
+
+        for i,frame in enumerate(self.swapchainFrames):
+            vkResetCommandBuffer(commandBuffer = frame.commandbuffer, flags = 0)
+            self.record_draw_commands(frame.commandbuffer, i, i)
+
+        self.commandsDirty = False
+
+    def record_draw_commands(self, commandBuffer, imageIndex, uniformSlot):
+
+        # the structs are copied by the calls below, so static recording can
+        # go through the same packet for every image
+        packet = self.framesInFlight[self.currentFrame].packet
+        frame_packets.prepare_recording(
+            packet, self.renderpass, self.swapchainFrames[imageIndex].framebuffer,
+            self.swapchainExtent, self.clearColor
+        )
+
+        vkBeginCommandBuffer(commandBuffer, packet.pBeginInfo)
+
+        if self.profiler is not None:
+            self.profiler.record_frame_begin(commandBuffer, uniformSlot)
+            self.profiler.record_timestamp(
+                commandBuffer, uniformSlot, profiler.TIMESTAMP_RENDER_PASS_BEGIN,
+                VK_PIPELINE_STAGE_TOP_OF_PIPE_BIT
+            )
         
-        # color used for the background
-        clearColor = VkClearValue([[0.67, 0.08, 0.16, 1.0]])
-        renderpassInfo.clearValueCount = 1
-        renderpassInfo.pClearValues = ffi.addressof(clearColor)
-        
-        vkCmdBeginRenderPass(commandBuffer, renderpassInfo, VK_SUBPASS_CONTENTS_INLINE)
+        vkCmdBeginRenderPass(commandBuffer, packet.pRenderpassInfo, VK_SUBPASS_CONTENTS_INLINE)
         
         vkCmdBindPipeline(commandBuffer, VK_PIPELINE_BIND_POINT_GRAPHICS, self.pipeline)
-        
-        vkCmdDraw(
-            commandBuffer = commandBuffer, vertexCount = 3, 
-            instanceCount = 1, firstVertex = 0, firstInstance = 0
+
+        vkCmdSetViewport(commandBuffer, 0, 1, packet.pViewport)
+        vkCmdSetScissor(commandBuffer, 0, 1, packet.pScissor)
+
+        packet.descriptorSets[0] = self.uniformRing.descriptorSets[uniformSlot]
+        vkCmdBindDescriptorSets(
+            commandBuffer, VK_PIPELINE_BIND_POINT_GRAPHICS, self.pipelineLayout,
+            0, 1, packet.descriptorSets, 0, None
+        )
+        vkCmdPushConstants(
+            commandBuffer, self.pipelineLayout, VK_SHADER_STAGE_VERTEX_BIT,
+            0, uniforms.PUSH_CONSTANT_DTYPE.itemsize, self.pushConstantData
         )
+
+        if self.texture is not None:
+            packet.descriptorSets[0] = self.texture.descriptorSet
+            vkCmdBindDescriptorSets(
+                commandBuffer, VK_PIPELINE_BIND_POINT_GRAPHICS, self.pipelineLayout,
+                1, 1, packet.descriptorSets, 0, None
+            )
         
-        vkCmdEndRenderPass(commandBuffer)
+        if self.mesh is not None:
+            mesh.record_draw(commandBuffer, self.mesh, self.instanceBuffer)
+        elif self.meshBatch is not None:
+            indirect.record_draws(
+                commandBuffer, self.meshBatch, self.drawBuffer, self.instanceBuffer,
+                self.deviceFeatures, self.maxDrawIndirectCount
+            )
+        else:
+            vkCmdDraw(
+                commandBuffer = commandBuffer, vertexCount = 3, 
+                instanceCount = 1, firstVertex = 0, firstInstance = 0
+            )
         
-        try:
-            vkEndCommandBuffer(commandBuffer)
-        except:
-            print("Failed to end recording command buffer")
+        vkCmdEndRenderPass(commandBuffer)
+
+        if self.profiler is not None:
+            self.profiler.record_timestamp(
+                commandBuffer, uniformSlot, profiler.TIMESTAMP_RENDER_PASS_END,
+                VK_PIPELINE_STAGE_BOTTOM_OF_PIPE_BIT
+            )
+
+        if self.readbackEnabled:
+            readback.record_copy(
+                commandBuffer, self.swapchainFrames[imageIndex].image,
+                self.readbackBuffers[imageIndex], self.swapchainExtent
+            )
+
+        if self.profiler is not None:
+            self.profiler.record_timestamp(
+                commandBuffer, uniformSlot, profiler.TIMESTAMP_FRAME_END,
+                VK_PIPELINE_STAGE_BOTTOM_OF_PIPE_BIT
+            )
+
+        vkEndCommandBuffer(commandBuffer)
     
     def render(self):
 
-        # grab instance procedures
-        vkAcquireNextImageKHR = vkGetDeviceProcAddr(self.device, 'vkAcquireNextImageKHR')
-        vkQueuePresentKHR = vkGetDeviceProcAddr(self.device, 'vkQueuePresentKHR')
+        # applied between frames, compiling happens on the watcher's thread
+        if self.shaderWatcher is not None:
+            self.apply_shader_reloads()
+
+        # same for uploads finished by the transfer queue
+        self.install_uploads()
+
+        if self.staticScene and self.commandsDirty:
+            self.record_static_commands()
 
+        frame = self.framesInFlight[self.currentFrame]
+        packet = frame.packet
+
+        frameProfiler = self.profiler
+        if frameProfiler is not None:
+            frameProfiler.begin_frame()
+
+        # only wait for the frame that last used this slot, the others keep running
         vkWaitForFences(
-            device = self.device, fenceCount = 1, pFences = [self.inFlightFence,], 
-            waitAll = VK_TRUE, timeout = 1000000000
+            device = self.device, fenceCount = 1, pFences = packet.fences, 
+            waitAll = VK_TRUE, timeout = self.frameTimeout
         )
+        if frameProfiler is not None:
+            frameProfiler.mark_phase("fenceWait")
+
+        if self.headless:
+            # offscreen images are simply used in turn
+            imageIndex = self.nextImage
+            self.nextImage = (self.nextImage + 1) % len(self.swapchainFrames)
+        else:
+            # device procedures were resolved once, this is only an attribute
+            # lookup. Headless devices don't enable VK_KHR_swapchain at all.
+            try:
+                self.deviceProcedures.vkAcquireNextImageKHR(
+                    device = self.device, swapchain = self.swapchain, timeout = self.frameTimeout, 
+                    semaphore = frame.imageAvailable, fence = VK_NULL_HANDLE,
+                    pImageIndex = self.imageIndex
+                )
+            except VkErrorOutOfDateKhr:
+                if frameProfiler is not None:
+                    frameProfiler.skip_frame()
+                self.recreate_swapchain()
+                return
+            except VkSuboptimalKhr:
+                # the image was still acquired, present it and recreate afterwards
+                self.framebufferResized = True
+            imageIndex = self.imageIndex[0]
+            if frameProfiler is not None:
+                frameProfiler.mark_phase("acquire")
+
+        # the acquired image may still be in use by another in flight frame
+        imageFence = self.imagesInFlight[imageIndex]
+        if imageFence is not None and imageFence != frame.inFlightFence:
+            packet.imageFences[0] = imageFence
+            vkWaitForFences(
+                device = self.device, fenceCount = 1, pFences = packet.imageFences, 
+                waitAll = VK_TRUE, timeout = self.frameTimeout
+            )
+        self.imagesInFlight[imageIndex] = frame.inFlightFence
+
+        # the fences above guarantee the gpu is done reading this slot
+        if self.staticScene:
+            uniformSlot = imageIndex
+        else:
+            uniformSlot = self.currentFrame
+
+        # and done writing the timestamps of the frame that used it last
+        if frameProfiler is not None:
+            frameProfiler.mark_phase("fenceWait")
+            frameProfiler.collect(uniformSlot)
+
+        self.uniformRing.viewProjections[uniformSlot][...] = self.camera
+
         vkResetFences(
-            device = self.device, fenceCount = 1, pFences = [self.inFlightFence,]
+            device = self.device, fenceCount = 1, pFences = packet.fences
         )
 
-        imageIndex = vkAcquireNextImageKHR(
-            device = self.device, swapchain = self.swapchain, timeout = 1000000000, 
-            semaphore = self.imageAvailable, fence = VK_NULL_HANDLE
-        )
+        # the last submission of this slot is done, so are the sets it used
+        frame.descriptorAllocator.reset()
 
-        commandBuffer = self.swapchainFrames[imageIndex].commandbuffer
-        vkResetCommandBuffer(commandBuffer = commandBuffer, flags = 0)
-        self.record_draw_commands(commandBuffer, imageIndex)
+        if self.staticScene:
+            # replay the buffer recorded for this image, the image fence above
+            # guarantees it is no longer pending
+            commandBuffer = self.swapchainFrames[imageIndex].commandbuffer
+        else:
+            commandBuffer = frame.commandbuffer
+            vkResetCommandBuffer(commandBuffer = commandBuffer, flags = 0)
+            self.record_draw_commands(commandBuffer, imageIndex, uniformSlot)
+        if frameProfiler is not None:
+            frameProfiler.mark_phase("record")
 
-        submitInfo = VkSubmitInfo(
-            waitSemaphoreCount = 1, pWaitSemaphores = [self.imageAvailable,], 
-            pWaitDstStageMask=[VK_PIPELINE_STAGE_COLOR_ATTACHMENT_OUTPUT_BIT,],
-            commandBufferCount = 1, pCommandBuffers = [commandBuffer,], signalSemaphoreCount = 1,
-            pSignalSemaphores = [self.renderFinished,]
+        # headless packets submit without semaphores
+        packet.commandBuffers[0] = commandBuffer
+        vkQueueSubmit(
+            queue = self.graphicsQueue, submitCount = 1, 
+            pSubmits = packet.pSubmitInfo, fence = frame.inFlightFence
         )
+        if frameProfiler is not None:
+            frameProfiler.mark_phase("submit")
 
-        try:
-            vkQueueSubmit(
-                queue = self.graphicsQueue, submitCount = 1, 
-                pSubmits = submitInfo, fence = self.inFlightFence
-            )
-        except:
-            print("Failed to submit draw commands")
+        if self.headless:
+            if frameProfiler is not None:
+                frameProfiler.end_frame(uniformSlot)
+            self.currentFrame = (self.currentFrame + 1) % self.maxFramesInFlight
+            return
         
-        presentInfo = VkPresentInfoKHR(
-            waitSemaphoreCount = 1, pWaitSemaphores = [self.renderFinished,],
-            swapchainCount = 1, pSwapchains = [self.swapchain,],
-            pImageIndices = [imageIndex,]
+        # the image index is read straight from where the acquire wrote it
+        packet.swapchains[0] = self.swapchain
+        try:
+            self.deviceProcedures.vkQueuePresentKHR(self.presentQueue, packet.pPresentInfo)
+        except (VkErrorOutOfDateKhr, VkSuboptimalKhr):
+            self.framebufferResized = True
+        if frameProfiler is not None:
+            frameProfiler.mark_phase("present")
+            frameProfiler.end_frame(uniformSlot)
+
+        self.currentFrame = (self.currentFrame + 1) % self.maxFramesInFlight
+
+        if self.framebufferResized:
+            self.recreate_swapchain()
+
+    def is_image_ready(self, imageIndex):
+
+        try:
+            vkGetFenceStatus(self.device, self.imagesInFlight[imageIndex])
+            return True
+        except VkNotReady:
+            return False
+
+    def wait_for_image(self, imageIndex):
+
+        vkWaitForFences(
+            device = self.device, fenceCount = 1, pFences = [self.imagesInFlight[imageIndex],], 
+            waitAll = VK_TRUE, timeout = self.frameTimeout
         )
-        vkQueuePresentKHR(self.presentQueue, presentInfo)
+
+    def readback_frames(self, frameCount):
+
+        # yields the pixels of each frame as a (height, width, 4) uint8 array once
+        # its fence signals. The copy of one frame overlaps with the rendering of
+        # the next, and the arrays are views onto mapped memory: an array is
+        # overwritten when its image comes around again, copy it to keep it.
+        pending = collections.deque()
+
+        for _ in range(frameCount):
+
+            # never render over a frame that hasn't been handed out yet
+            if len(pending) == len(self.readbackBuffers):
+                imageIndex = pending.popleft()
+                self.wait_for_image(imageIndex)
+                yield self.readbackBuffers[imageIndex].pixels
+
+            pending.append(self.nextImage)
+            self.render()
+
+            while pending and self.is_image_ready(pending[0]):
+                yield self.readbackBuffers[pending.popleft()].pixels
+
+        while pending:
+            imageIndex = pending.popleft()
+            self.wait_for_image(imageIndex)
+            yield self.readbackBuffers[imageIndex].pixels
 
     def close(self):
 
+        if self.shaderWatcher is not None:
+            self.shaderWatcher.stop()
+
         vkDeviceWaitIdle(self.device)
 
-        vkDestroyFence(self.device, self.inFlightFence, None)
-        vkDestroySemaphore(self.device, self.imageAvailable, None)
-        vkDestroySemaphore(self.device, self.renderFinished, None)
+        if self.readbackEnabled:
+            readback.destroy_readback_buffers(self.allocator, self.readbackBuffers)
+
+        for frame in self.framesInFlight:
+            vkDestroyFence(self.device, frame.inFlightFence, None)
+            vkDestroySemaphore(self.device, frame.imageAvailable, None)
+            vkDestroySemaphore(self.device, frame.renderFinished, None)
+            frame.descriptorAllocator.destroy()
 
         vkDestroyCommandPool(self.device, self.commandPool, None)
 
-        vkDestroyPipeline(self.device, self.pipeline, None)
-        vkDestroyPipelineLayout(self.device, self.pipelineLayout, None)
-        vkDestroyRenderPass(self.device, self.renderpass, None)
+        if self.profiler is not None:
+            self.profiler.destroy()
+
+        uniforms.destroy_uniform_ring(self.allocator, self.uniformRing)
+        for loadedTexture in self.textures:
+            texture.destroy_texture(self.allocator, loadedTexture)
+        self.samplers.destroy()
+        self.textureLoader.shutdown()
+
+        self.descriptorAllocator.destroy()
+        self.descriptorLayouts.destroy()
+
+        if self.instanceBuffer is not None:
+            instancing.destroy_instance_buffer(self.allocator, self.instanceBuffer)
+
+        if self.mesh is not None:
+            mesh.destroy_mesh(self.allocator, self.mesh)
+        self.destroy_scene()
+
+        self.uploads.destroy()
+        for pendingMesh,_ in self.pendingMeshes:
+            mesh.destroy_mesh(self.allocator, pendingMesh)
+
+        try:
+            pipeline_cache.save_pipeline_cache(self.device, self.pipelineCache)
+        except (OSError, VkError) as error:
+            print(f"Failed to save pipeline cache: {error}")
+        pipeline_cache.destroy_pipeline_cache(self.device, self.pipelineCache)
+
+        self.destroy_pipeline()
+        self.shaderRegistry.destroy()
+        self.framebuffers.destroy()
+        self.renderPasses.destroy()
         
         for frame in self.swapchainFrames:
             vkDestroyImageView(
                 device = self.device, imageView = frame.image_view, pAllocator = None
             )
-            vkDestroyFramebuffer(
-                device = self.device, framebuffer = frame.framebuffer, pAllocator = None
-            )
         
-        destructionFunction = vkGetDeviceProcAddr(self.device, 'vkDestroySwapchainKHR')
-        destructionFunction(self.device, self.swapchain, None)
+        if self.headless:
+            offscreen.destroy_offscreen_targets(self.allocator, self.swapchainFrames)
+        else:
+            self.deviceProcedures.vkDestroySwapchainKHR(self.device, self.swapchain, None)
+        self.allocator.destroy()
         vkDestroyDevice(
             device = self.device, pAllocator = None
         )
+        dispatch.release_device_dispatch(self.device)
         
-        destructionFunction = vkGetInstanceProcAddr(self.instance, "vkDestroySurfaceKHR")
-        destructionFunction(self.instance, self.surface, None)
+        if not self.headless:
+            self.instanceProcedures.vkDestroySurfaceKHR(self.instance, self.surface, None)
 
         vkDestroyInstance(self.instance, None)
+        dispatch.release_instance_dispatch(self.instance)
 
-        glfw.terminate()
+        if not self.headless:
+            glfw.terminate()
 
 
 class App():
 
-    def __init__(self, width, height, appName):
+    def __init__(self, width, height, appName, threaded = False, **engineOptions):
         self.appName = appName
         self.create_glfw_window(width, height)
 
-        self.graphicsEngine = Engine(width, height, self.window, appName)
+        # remaining keyword arguments configure the engine itself
+        self.graphicsEngine = Engine(
+            width, height, self.window, appName, **engineOptions
+        )
+
+        # a threaded app renders on its own thread, so neither slow event
+        # handling nor fence waits hold up the other side
+        self.threaded = threaded
+        self.renderThread = None
+        self.stopRendering = threading.Event()
+        self.renderError = None
+
+        # (time received, kind, data) pushed by the glfw callbacks and drained
+        # by whichever thread renders. Appending to and popping from a deque
+        # are atomic, so neither side ever takes a lock.
+        self.inputEvents = collections.deque()
+
+        # called as inputHandler(engine, kind, data) for every event, right
+        # before the frame it can affect is rendered
+        self.inputHandler = None
+
+        # seconds from an event arriving until the frame that handled it was
+        # presented, the display's own scanout comes on top
+        self.inputLatencies = collections.deque(maxlen = 4096)
+
+        glfw.set_framebuffer_size_callback(self.window, self.on_framebuffer_resize)
+        glfw.set_window_refresh_callback(self.window, self.on_window_refresh)
+        glfw.set_key_callback(self.window, self.on_key)
+        glfw.set_mouse_button_callback(self.window, self.on_mouse_button)
+        glfw.set_cursor_pos_callback(self.window, self.on_cursor_position)
         
 
     def create_glfw_window(self, width, height):
         glfw.init()
 
         glfw.window_hint(GLFW_CONSTANTS.GLFW_CLIENT_API, GLFW_CONSTANTS.GLFW_NO_API)
-        glfw.window_hint(GLFW_CONSTANTS.GLFW_RESIZABLE, GLFW_CONSTANTS.GLFW_FALSE)
+        glfw.window_hint(GLFW_CONSTANTS.GLFW_RESIZABLE, GLFW_CONSTANTS.GLFW_TRUE)
 
         self.window = glfw.create_window(width, height, self.appName, None, None)
 
+    def on_framebuffer_resize(self, window, width, height):
+        # size before flag, recreate_swapchain relies on that order
+        if self.threaded:
+            self.graphicsEngine.windowSize = (width, height)
+        self.graphicsEngine.framebufferResized = True
+
+    def on_window_refresh(self, window):
+
+        # some platforms block the event loop while the window is being resized,
+        # drawing from here keeps frames coming during the drag. The render
+        # thread isn't blocked by that in the first place.
+        if not self.threaded and not self.graphicsEngine.recreatingSwapchain:
+            self.render_frame()
+
+    def on_key(self, window, key, scancode, action, mods):
+        self.inputEvents.append((time.perf_counter(), "key", (key, action, mods)))
+
+    def on_mouse_button(self, window, button, action, mods):
+        self.inputEvents.append((time.perf_counter(), "mouse button", (button, action, mods)))
+
+    def on_cursor_position(self, window, x, y):
+        self.inputEvents.append((time.perf_counter(), "cursor", (x, y)))
+
+    def render_frame(self):
+
+        # hands the queued input to the handler, then renders and presents the
+        # frame showing its effect
+        eventTimes = []
+        while self.inputEvents:
+            receivedAt, kind, data = self.inputEvents.popleft()
+            if self.inputHandler is not None:
+                self.inputHandler(self.graphicsEngine, kind, data)
+            eventTimes.append(receivedAt)
+
+        self.graphicsEngine.render()
+
+        if eventTimes:
+            presentedAt = time.perf_counter()
+            self.inputLatencies.extend(presentedAt - receivedAt for receivedAt in eventTimes)
+
     def run(self):
+
+        if self.threaded:
+            self.run_threaded()
+            return
+
         while not glfw.window_should_close(self.window):
 
             glfw.poll_events()
+            self.render_frame()
+
+    def run_threaded(self):
+
+        self.graphicsEngine.windowSize = glfw.get_framebuffer_size(self.window)
+        self.stopRendering.clear()
+        self.renderThread = threading.Thread(target = self.render_loop, name = "render")
+        self.renderThread.start()
+
+        # the main thread only handles events, the timeout lets it notice a
+        # render thread that stopped on an error
+        while not glfw.window_should_close(self.window) and self.renderThread.is_alive():
+            glfw.wait_events_timeout(0.01)
+
+        self.stop_render_thread()
+
+        if self.renderError is not None:
+            raise RuntimeError("render thread failed") from self.renderError
+
+    def render_loop(self):
+
+        try:
+            while not self.stopRendering.is_set():
+
+                # nothing to render into while minimized
+                width, height = self.graphicsEngine.windowSize
+                if width == 0 or height == 0:
+                    time.sleep(0.01)
+                    continue
+
+                self.render_frame()
+        except Exception as error:
+            self.renderError = error
+
+    def stop_render_thread(self):
+
+        if self.renderThread is None:
+            return
+
+        # the engine is only closed once nothing renders or runs on the gpu
+        self.stopRendering.set()
+        self.renderThread.join()
+        self.renderThread = None
+        vkDeviceWaitIdle(self.graphicsEngine.device)
+
+    def input_latency_summary(self, percentiles = (50, 95, 99)):
+
+        if not self.inputLatencies:
+            return None
+
+        latencies = np.array(self.inputLatencies) * 1000.0
+        return {f"p{percentile}": float(np.percentile(latencies, percentile)) for percentile in percentiles}
+
+    def close(self):
+        self.stop_render_thread()
+        self.graphicsEngine.close()
+
+
+class HeadlessApp():
+
+    # renders without a window, e.g. on a machine with only a software driver
+    # such as lavapipe (select it with VK_ICD_FILENAMES if several are installed)
+    def __init__(self, width, height, appName, **engineOptions):
+        self.appName = appName
+
+        self.graphicsEngine = Engine(
+            width, height, None, appName, headless = True, **engineOptions
+        )
+
+    def run(self, frameCount):
+
+        start = time.perf_counter()
+        for _ in range(frameCount):
             self.graphicsEngine.render()
+        vkDeviceWaitIdle(self.graphicsEngine.device)
+        elapsed = time.perf_counter() - start
+
+        print(f"Rendered {frameCount} frames in {elapsed:.2f} s ({frameCount / elapsed:.1f} fps)")
 
     def close(self):
         self.graphicsEngine.close()
 
 
 if __name__ == "__main__":
-    vulkanApp = App(640, 480, "Vulkan Tutorial")
-    
-    vulkanApp.run()
+
+    # edit shaders/*.vert or *.frag while running to see them reloaded,
+    # profiled runs write their frame timings to frame_timings.json
+    engineOptions = {
+        "hotReload": "--hot-reload" in sys.argv,
+        "profile": "--profile" in sys.argv,
+    }
+
+    if "--headless" in sys.argv:
+        vulkanApp = HeadlessApp(640, 480, "Vulkan Tutorial", **engineOptions)
+    else:
+        # --threaded renders on a thread of its own, glfw keeps the main one
+        vulkanApp = App(
+            640, 480, "Vulkan Tutorial", threaded = "--threaded" in sys.argv, **engineOptions
+        )
+
+    # counts every vulkan call made from here on, setup is left out
+    vulkanInstrumentation = None
+    if "--instrument" in sys.argv:
+        vulkanInstrumentation = instrumentation.Instrumentation()
+        vulkanInstrumentation.install(vulkanApp.graphicsEngine)
+
+    if "--headless" in sys.argv:
+        vulkanApp.run(1000)
+    else:
+        vulkanApp.run()
+
+    if vulkanInstrumentation is not None:
+        vulkanInstrumentation.uninstall()
+        print(vulkanInstrumentation.report())
+
+    if isinstance(vulkanApp, App) and vulkanApp.input_latency_summary() is not None:
+        print("Input to present latency: " + ", ".join(
+            f"{name} {value:.2f} ms" for name, value in vulkanApp.input_latency_summary().items()
+        ))
+
+    frameProfiler = vulkanApp.graphicsEngine.profiler
+    if frameProfiler is not None:
+        for field, percentiles in frameProfiler.summary().items():
+            print(f"{field:>14}: " + ", ".join(
+                f"{name} {value:.3f} ms" if value is not None else f"{name} -"
+                for name, value in percentiles.items()
+            ))
+        print(
+            f"{frameProfiler.skippedFrames} frames skipped, "
+            f"{frameProfiler.missingTimestamps} without gpu timings"
+        )
+        frameProfiler.export_json("frame_timings.json")
 
     vulkanApp.close()
\ No newline at end of file
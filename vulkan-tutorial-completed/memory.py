@@ -0,0 +1,33 @@
+# statically load vulkan library
+from vulkan import *
+
+import numpy as np
+
+import commands
+
+def create_device_local_buffer(allocator, commandPool, queue, data, usage):
+
+    data = np.ascontiguousarray(data)
+    size = data.nbytes
+
+    # the gpu reads device local memory fastest, but the cpu can't write to it,
+    # so the data goes through a host visible staging buffer first
+    stagingBuffer, stagingAllocation = allocator.create_buffer(
+        size, VK_BUFFER_USAGE_TRANSFER_SRC_BIT,
+        VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT | VK_MEMORY_PROPERTY_HOST_COHERENT_BIT
+    )
+    ffi.memmove(stagingAllocation.mapped, data, size)
+
+    buffer, allocation = allocator.create_buffer(
+        size, VK_BUFFER_USAGE_TRANSFER_DST_BIT | usage,
+        VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT
+    )
+
+    commandBuffer = commands.begin_single_time_commands(allocator.device, commandPool)
+    copyRegion = VkBufferCopy(srcOffset = 0, dstOffset = 0, size = size)
+    vkCmdCopyBuffer(commandBuffer, stagingBuffer, buffer, 1, [copyRegion,])
+    commands.end_single_time_commands(allocator.device, commandPool, queue, commandBuffer)
+
+    allocator.destroy_buffer(stagingBuffer, stagingAllocation)
+
+    return buffer, allocation
@@ -0,0 +1,171 @@
+# statically load vulkan library
+from vulkan import *
+
+import numpy as np
+
+import memory
+
+# layout of the vertices read by shaders/mesh.vert
+VERTEX_DTYPE = np.dtype([
+    ("position", np.float32, (2,)),
+    ("color", np.float32, (3,)),
+])
+
+# layout of the vertices read by shaders/textured.vert
+TEXTURED_VERTEX_DTYPE = np.dtype([
+    ("position", np.float32, (2,)),
+    ("texCoord", np.float32, (2,)),
+])
+
+# vulkan formats for each numpy scalar type and component count
+ATTRIBUTE_FORMATS = {
+    (np.dtype(np.float32), 1): VK_FORMAT_R32_SFLOAT,
+    (np.dtype(np.float32), 2): VK_FORMAT_R32G32_SFLOAT,
+    (np.dtype(np.float32), 3): VK_FORMAT_R32G32B32_SFLOAT,
+    (np.dtype(np.float32), 4): VK_FORMAT_R32G32B32A32_SFLOAT,
+    (np.dtype(np.int32), 1): VK_FORMAT_R32_SINT,
+    (np.dtype(np.int32), 2): VK_FORMAT_R32G32_SINT,
+    (np.dtype(np.int32), 3): VK_FORMAT_R32G32B32_SINT,
+    (np.dtype(np.int32), 4): VK_FORMAT_R32G32B32A32_SINT,
+    (np.dtype(np.uint32), 1): VK_FORMAT_R32_UINT,
+    (np.dtype(np.uint32), 2): VK_FORMAT_R32G32_UINT,
+    (np.dtype(np.uint32), 3): VK_FORMAT_R32G32B32_UINT,
+    (np.dtype(np.uint32), 4): VK_FORMAT_R32G32B32A32_UINT,
+}
+
+INDEX_TYPES = {
+    np.dtype(np.uint16): VK_INDEX_TYPE_UINT16,
+    np.dtype(np.uint32): VK_INDEX_TYPE_UINT32,
+}
+
+class Mesh:
+
+
+    def __init__(self):
+
+        self.vertexDtype = None
+        self.vertexBuffer = None
+        self.vertexAllocation = None
+
+        # bound at binding 0 and the instance buffer, if any, at binding 1.
+        # The bindings turn python lists into new c arrays on every call.
+        self.bindBuffers = ffi.new("VkBuffer[2]")
+        self.bindOffsets = ffi.new("VkDeviceSize[2]")
+
+        self.indexBuffer = None
+        self.indexAllocation = None
+        self.indexCount = 0
+        self.indexType = VK_INDEX_TYPE_UINT32
+
+def vertex_input_descriptions(dtype, binding = 0, 
+    inputRate = VK_VERTEX_INPUT_RATE_VERTEX, firstLocation = 0
+):
+
+    bindingDescription = VkVertexInputBindingDescription(
+        binding = binding, stride = dtype.itemsize, inputRate = inputRate
+    )
+
+    # every field of the structured dtype becomes an attribute, in order.
+    # a matrix field, e.g. (4, 4), takes one location per row.
+    attributeDescriptions = []
+    location = firstLocation
+    for name in dtype.names:
+
+        fieldType, offset = dtype.fields[name][:2]
+        if fieldType.subdtype is None:
+            scalarType, shape = fieldType, (1,)
+        else:
+            scalarType, shape = fieldType.subdtype
+
+        if len(shape) == 2:
+            rows, components = shape
+        else:
+            rows, components = 1, int(np.prod(shape))
+
+        for row in range(rows):
+            attributeDescriptions.append(
+                VkVertexInputAttributeDescription(
+                    binding = binding, location = location,
+                    format = ATTRIBUTE_FORMATS[(scalarType, components)],
+                    offset = offset + row * components * scalarType.itemsize
+                )
+            )
+            location += 1
+
+    return bindingDescription, attributeDescriptions
+
+def prepare_indices(indices):
+
+    indices = np.ascontiguousarray(indices).ravel()
+    if indices.dtype not in INDEX_TYPES:
+        indices = indices.astype(np.uint32)
+
+    return indices
+
+def create_mesh(allocator, commandPool, queue, vertices, indices):
+
+    indices = prepare_indices(indices)
+
+    newMesh = Mesh()
+    newMesh.vertexDtype = vertices.dtype
+    newMesh.indexCount = len(indices)
+    newMesh.indexType = INDEX_TYPES[indices.dtype]
+
+    newMesh.vertexBuffer, newMesh.vertexAllocation = memory.create_device_local_buffer(
+        allocator, commandPool, queue, vertices, VK_BUFFER_USAGE_VERTEX_BUFFER_BIT
+    )
+    newMesh.indexBuffer, newMesh.indexAllocation = memory.create_device_local_buffer(
+        allocator, commandPool, queue, indices, VK_BUFFER_USAGE_INDEX_BUFFER_BIT
+    )
+
+    return newMesh
+
+def create_mesh_async(uploads, vertices, indices):
+
+    # the buffers are filled by the upload scheduler, the mesh can only be
+    # drawn once both returned tickets are complete
+    indices = prepare_indices(indices)
+
+    newMesh = Mesh()
+    newMesh.vertexDtype = vertices.dtype
+    newMesh.indexCount = len(indices)
+    newMesh.indexType = INDEX_TYPES[indices.dtype]
+
+    vertexTicket = uploads.upload_buffer(
+        vertices, VK_BUFFER_USAGE_VERTEX_BUFFER_BIT,
+        VK_PIPELINE_STAGE_VERTEX_INPUT_BIT, VK_ACCESS_VERTEX_ATTRIBUTE_READ_BIT
+    )
+    indexTicket = uploads.upload_buffer(
+        indices, VK_BUFFER_USAGE_INDEX_BUFFER_BIT,
+        VK_PIPELINE_STAGE_VERTEX_INPUT_BIT, VK_ACCESS_INDEX_READ_BIT
+    )
+
+    newMesh.vertexBuffer, newMesh.vertexAllocation = vertexTicket.buffer, vertexTicket.allocation
+    newMesh.indexBuffer, newMesh.indexAllocation = indexTicket.buffer, indexTicket.allocation
+
+    return newMesh, [vertexTicket, indexTicket]
+
+def record_draw(commandBuffer, mesh, instanceBuffer = None):
+
+    # per instance data goes in binding 1, next to the vertices in binding 0
+    mesh.bindBuffers[0] = mesh.vertexBuffer
+    if instanceBuffer is None:
+        bindingCount = 1
+        instanceCount = 1
+    else:
+        mesh.bindBuffers[1] = instanceBuffer.buffer
+        bindingCount = 2
+        instanceCount = instanceBuffer.count
+    vkCmdBindVertexBuffers(commandBuffer, 0, bindingCount, mesh.bindBuffers, mesh.bindOffsets)
+
+    # however many triangles or instances there are, this is a single draw call
+    vkCmdBindIndexBuffer(commandBuffer, mesh.indexBuffer, 0, mesh.indexType)
+    vkCmdDrawIndexed(
+        commandBuffer = commandBuffer, indexCount = mesh.indexCount,
+        instanceCount = instanceCount, firstIndex = 0, vertexOffset = 0, firstInstance = 0
+    )
+
+def destroy_mesh(allocator, mesh):
+
+    allocator.destroy_buffer(mesh.vertexBuffer, mesh.vertexAllocation)
+    allocator.destroy_buffer(mesh.indexBuffer, mesh.indexAllocation)
@@ -0,0 +1,74 @@
+# statically load vulkan library
+from vulkan import *
+
+import framebuffer
+
+class OffscreenBundle:
+
+
+    def __init__(self):
+        
+        self.frames = []
+        self.format = None
+        self.extent = None
+
+def create_offscreen_targets(allocator, width, height, imageCount,
+    format = VK_FORMAT_R8G8B8A8_UNORM
+):
+
+    logicalDevice = allocator.device
+
+    bundle = OffscreenBundle()
+    extent = VkExtent2D(width, height)
+
+    for _ in range(imageCount):
+
+        # stands in for a swapchain image, it can also be copied out afterwards
+        imageInfo = VkImageCreateInfo(
+            imageType = VK_IMAGE_TYPE_2D, format = format,
+            extent = [width, height, 1], mipLevels = 1, arrayLayers = 1,
+            samples = VK_SAMPLE_COUNT_1_BIT, tiling = VK_IMAGE_TILING_OPTIMAL,
+            usage = VK_IMAGE_USAGE_COLOR_ATTACHMENT_BIT | VK_IMAGE_USAGE_TRANSFER_SRC_BIT,
+            sharingMode = VK_SHARING_MODE_EXCLUSIVE,
+            initialLayout = VK_IMAGE_LAYOUT_UNDEFINED
+        )
+        image = vkCreateImage(logicalDevice, imageInfo, None)
+
+        components = VkComponentMapping(
+            r = VK_COMPONENT_SWIZZLE_IDENTITY,
+            g = VK_COMPONENT_SWIZZLE_IDENTITY,
+            b = VK_COMPONENT_SWIZZLE_IDENTITY,
+            a = VK_COMPONENT_SWIZZLE_IDENTITY
+        )
+
+        subresourceRange = VkImageSubresourceRange(
+            aspectMask = VK_IMAGE_ASPECT_COLOR_BIT,
+            baseMipLevel = 0, levelCount = 1,
+            baseArrayLayer = 0, layerCount = 1
+        )
+
+        create_info = VkImageViewCreateInfo(
+            image = image, viewType = VK_IMAGE_VIEW_TYPE_2D,
+            format = format, components = components,
+            subresourceRange = subresourceRange
+        )
+
+        offscreen_frame = framebuffer.SwapChainFrame()
+        offscreen_frame.image = image
+        offscreen_frame.allocation = allocator.allocate_image(
+            image, VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT
+        )
+        offscreen_frame.image_view = vkCreateImageView(
+            device = logicalDevice, pCreateInfo = create_info, pAllocator = None
+        )
+        bundle.frames.append(offscreen_frame)
+
+    bundle.format = format
+    bundle.extent = extent
+
+    return bundle
+
+def destroy_offscreen_targets(allocator, frames):
+
+    for frame in frames:
+        allocator.destroy_image(frame.image, frame.allocation)
@@ -3,43 +3,75 @@ from vulkan import *
 
 import shaders
 
+# the bindings copy a list of stage structs into a new array, which doesn't
+# keep the strings of the original structs alive, so the entry point name
+# lives as long as the module does
+SHADER_ENTRY_POINT = ffi.new("char[]", b"main")
+
 class InputBundle:
 
 
     def __init__(self, device, 
-    swapchainImageFormat, swapchainExtent, 
-    vertexFilepath, fragmentFilepath
+    swapchainImageFormat, 
+    vertexFilepath, fragmentFilepath, pipelineCache = VK_NULL_HANDLE,
+    renderPass = None, finalLayout = VK_IMAGE_LAYOUT_PRESENT_SRC_KHR,
+    vertexBindings = None, vertexAttributes = None,
+    setLayouts = None, pushConstantRanges = None, shaderRegistry = None
     ):
 
         self.device = device
         self.swapchainImageFormat = swapchainImageFormat
-        self.swapchainExtent = swapchainExtent
         self.vertexFilepath = vertexFilepath
         self.fragmentFilepath = fragmentFilepath
+        self.pipelineCache = pipelineCache
+
+        # an existing, compatible render pass to build the pipeline against
+        self.renderPass = renderPass
+
+        # layout the color attachment is left in once the render pass ends
+        self.finalLayout = finalLayout
+
+        # vertex buffer layout, none when the shader generates its own vertices
+        self.vertexBindings = vertexBindings or []
+        self.vertexAttributes = vertexAttributes or []
+
+        # resources the shaders read besides vertices
+        self.setLayouts = setLayouts or []
+        self.pushConstantRanges = pushConstantRanges or []
+
+        # shared modules are taken from here when given, instead of being
+        # created and destroyed along with the pipeline
+        self.shaderRegistry = shaderRegistry
 
 class OuputBundle:
 
 
-    def __init__(self, pipelineLayout, renderPass, pipeline):
+    def __init__(self, pipelineLayout, renderPass, pipeline, shaderModules = None):
 
         self.pipelineLayout = pipelineLayout
         self.renderPass = renderPass
         self.pipeline = pipeline
 
-def create_render_pass(device, swapchainImageFormat):
+        # registry modules held by the pipeline, to be released with it
+        self.shaderModules = shaderModules or []
+
+def create_render_pass(device, swapchainImageFormat, 
+    finalLayout = VK_IMAGE_LAYOUT_PRESENT_SRC_KHR,
+    loadOp = VK_ATTACHMENT_LOAD_OP_CLEAR, storeOp = VK_ATTACHMENT_STORE_OP_STORE
+):
     
     colorAttachment = VkAttachmentDescription(
         format = swapchainImageFormat,
         samples = VK_SAMPLE_COUNT_1_BIT,
 
-        loadOp = VK_ATTACHMENT_LOAD_OP_CLEAR,
-        storeOp = VK_ATTACHMENT_STORE_OP_STORE,
+        loadOp = loadOp,
+        storeOp = storeOp,
 
         stencilLoadOp = VK_ATTACHMENT_LOAD_OP_DONT_CARE,
         stencilStoreOp = VK_ATTACHMENT_STORE_OP_DONT_CARE,
 
         initialLayout=VK_IMAGE_LAYOUT_UNDEFINED,
-        finalLayout=VK_IMAGE_LAYOUT_PRESENT_SRC_KHR 
+        finalLayout=finalLayout
     )
 
     colorAttachmentRef = VkAttachmentReference(
@@ -63,67 +95,183 @@ def create_render_pass(device, swapchainImageFormat):
 
     return vkCreateRenderPass(device, renderPassInfo, None)
 
-def create_pipeline_layout(device):
+class RenderPassCache:
+
+
+    def __init__(self, device):
+
+        self.device = device
+
+        # attachment signature -> render pass
+        self.renderPasses = {}
+
+    def get(self, format, finalLayout = VK_IMAGE_LAYOUT_PRESENT_SRC_KHR,
+        loadOp = VK_ATTACHMENT_LOAD_OP_CLEAR, storeOp = VK_ATTACHMENT_STORE_OP_STORE
+    ):
+
+        # passes with the same attachments are compatible, so one is enough
+        key = (format, finalLayout, loadOp, storeOp)
+
+        renderPass = self.renderPasses.get(key)
+        if renderPass is None:
+            renderPass = create_render_pass(self.device, format, finalLayout, loadOp, storeOp)
+            self.renderPasses[key] = renderPass
+
+        return renderPass
+
+    def destroy(self):
+
+        for renderPass in self.renderPasses.values():
+            vkDestroyRenderPass(self.device, renderPass, None)
+
+        self.renderPasses = {}
+
+def create_pipeline_layout(device, setLayouts = None, pushConstantRanges = None):
+
+    setLayouts = setLayouts or []
+    pushConstantRanges = pushConstantRanges or []
 
     pipelineLayoutInfo = VkPipelineLayoutCreateInfo(
         sType=VK_STRUCTURE_TYPE_PIPELINE_LAYOUT_CREATE_INFO,
-        pushConstantRangeCount = 0,
-        setLayoutCount = 0
+        pushConstantRangeCount = len(pushConstantRanges),
+        pPushConstantRanges = pushConstantRanges,
+        setLayoutCount = len(setLayouts),
+        pSetLayouts = setLayouts
     )
 
     return vkCreatePipelineLayout(
         device = device, pCreateInfo = pipelineLayoutInfo, pAllocator = None
     )
 
-def create_graphics_pipeline(inputBundle):
+def create_shader_module(inputBundle, filepath):
 
-    # vertex input stage
-    # at this stage, no vertex data is being fetched.
+    if inputBundle.shaderRegistry is None:
+        return shaders.create_shader_module(inputBundle.device, filepath)
+
+    return inputBundle.shaderRegistry.acquire(filepath)
+
+def release_shader_modules(shaderRegistry, shaderModules):
+
+    for module in shaderModules:
+        shaderRegistry.release(module)
+
+def free_shader_modules(inputBundle, shaderModules):
+
+    if inputBundle.shaderRegistry is None:
+        for module in shaderModules:
+            vkDestroyShaderModule(inputBundle.device, module, None)
+    else:
+        release_shader_modules(inputBundle.shaderRegistry, shaderModules)
+
+class PipelineDescription:
+
+
+    # everything that distinguishes one graphics pipeline from another built
+    # against the same layout and render pass. Vertex input is given as plain
+    # tuples so descriptions can be compared and hashed:
+    # bindings are (binding, stride, inputRate),
+    # attributes are (location, binding, format, offset)
+    def __init__(self, vertexFilepath, fragmentFilepath,
+        vertexBindings = (), vertexAttributes = (),
+        topology = VK_PRIMITIVE_TOPOLOGY_TRIANGLE_LIST,
+        cullMode = VK_CULL_MODE_BACK_BIT, frontFace = VK_FRONT_FACE_CLOCKWISE,
+        polygonMode = VK_POLYGON_MODE_FILL, blendEnable = False
+    ):
+
+        self.vertexFilepath = vertexFilepath
+        self.fragmentFilepath = fragmentFilepath
+        self.vertexBindings = tuple(tuple(binding) for binding in vertexBindings)
+        self.vertexAttributes = tuple(tuple(attribute) for attribute in vertexAttributes)
+        self.topology = topology
+        self.cullMode = cullMode
+        self.frontFace = frontFace
+        self.polygonMode = polygonMode
+        self.blendEnable = blendEnable
+
+    def key(self):
+
+        return (
+            self.vertexFilepath, self.fragmentFilepath,
+            self.vertexBindings, self.vertexAttributes,
+            self.topology, self.cullMode, self.frontFace,
+            self.polygonMode, self.blendEnable
+        )
+
+    def __eq__(self, other):
+
+        return isinstance(other, PipelineDescription) and self.key() == other.key()
+
+    def __hash__(self):
+
+        return hash(self.key())
+
+def describe_input_bundle(inputBundle):
+
+    return PipelineDescription(
+        inputBundle.vertexFilepath, inputBundle.fragmentFilepath,
+        vertexBindings = [
+            (binding.binding, binding.stride, binding.inputRate)
+            for binding in inputBundle.vertexBindings
+        ],
+        vertexAttributes = [
+            (attribute.location, attribute.binding, attribute.format, attribute.offset)
+            for attribute in inputBundle.vertexAttributes
+        ]
+    )
+
+def make_graphics_pipeline_info(description, pipelineLayout, renderPass,
+    vertexShaderModule, fragmentShaderModule
+):
+
+    # vertex input stage, describes how vertex data is fetched from the bound
+    # vertex buffers, if there are any
+    vertexBindings = [
+        VkVertexInputBindingDescription(binding = binding, stride = stride, inputRate = inputRate)
+        for binding, stride, inputRate in description.vertexBindings
+    ]
+    vertexAttributes = [
+        VkVertexInputAttributeDescription(
+            location = location, binding = binding, format = format, offset = offset
+        )
+        for location, binding, format, offset in description.vertexAttributes
+    ]
     vertexInputInfo = VkPipelineVertexInputStateCreateInfo(
         sType=VK_STRUCTURE_TYPE_PIPELINE_VERTEX_INPUT_STATE_CREATE_INFO,
-        vertexBindingDescriptionCount=0,
-        vertexAttributeDescriptionCount=0
+        vertexBindingDescriptionCount=len(vertexBindings),
+        pVertexBindingDescriptions=vertexBindings,
+        vertexAttributeDescriptionCount=len(vertexAttributes),
+        pVertexAttributeDescriptions=vertexAttributes
     )
 
     # vertex shader transforms vertices appropriately
-    vertexShaderModule = shaders.create_shader_module(inputBundle.device, inputBundle.vertexFilepath)
     vertexShaderStageInfo = VkPipelineShaderStageCreateInfo(
         sType=VK_STRUCTURE_TYPE_PIPELINE_SHADER_STAGE_CREATE_INFO,
         stage=VK_SHADER_STAGE_VERTEX_BIT,
         module=vertexShaderModule,
-        pName="main"
+        pName=SHADER_ENTRY_POINT
     )
 
     # input assembly, which construction method to use with vertices
     inputAssembly = VkPipelineInputAssemblyStateCreateInfo(
         sType=VK_STRUCTURE_TYPE_PIPELINE_INPUT_ASSEMBLY_STATE_CREATE_INFO,
-        topology=VK_PRIMITIVE_TOPOLOGY_TRIANGLE_LIST,
+        topology=description.topology,
         primitiveRestartEnable=VK_FALSE # allows "breaking up" of strip topologies
     )
 
-    # transformation from image to framebuffer: stretch
-    viewport = VkViewport(
-        x=0,
-        y=0,
-        width=inputBundle.swapchainExtent.width,
-        height = inputBundle.swapchainExtent.height,
-        minDepth=0.0,
-        maxDepth=1.0
-    )
-
-    # transformation from image to framebuffer: cutout
-    scissor = VkRect2D(
-        offset=[0,0],
-        extent=inputBundle.swapchainExtent
-    )
-
-    # these two transformations combine to define the state of the viewport
+    # the viewport (stretch) and scissor (cutout) transformations from image
+    # to framebuffer are set while recording, so the pipeline doesn't depend
+    # on the swapchain extent and survives a resize
     viewportState = VkPipelineViewportStateCreateInfo(
         sType=VK_STRUCTURE_TYPE_PIPELINE_VIEWPORT_STATE_CREATE_INFO,
         viewportCount=1,
-        pViewports=viewport,
-        scissorCount=1,
-        pScissors=scissor
+        scissorCount=1
+    )
+
+    dynamicStates = [VK_DYNAMIC_STATE_VIEWPORT, VK_DYNAMIC_STATE_SCISSOR]
+    dynamicState = VkPipelineDynamicStateCreateInfo(
+        sType=VK_STRUCTURE_TYPE_PIPELINE_DYNAMIC_STATE_CREATE_INFO,
+        dynamicStateCount=len(dynamicStates),
+        pDynamicStates=dynamicStates
     )
 
     # rasterizer interpolates between vertices to produce fragments, it
@@ -132,10 +280,10 @@ def create_graphics_pipeline(inputBundle):
         sType=VK_STRUCTURE_TYPE_PIPELINE_RASTERIZATION_STATE_CREATE_INFO,
         depthClampEnable=VK_FALSE,
         rasterizerDiscardEnable=VK_FALSE,
-        polygonMode=VK_POLYGON_MODE_FILL,
+        polygonMode=description.polygonMode,
         lineWidth=1.0,
-        cullMode=VK_CULL_MODE_BACK_BIT,
-        frontFace=VK_FRONT_FACE_CLOCKWISE,
+        cullMode=description.cullMode,
+        frontFace=description.frontFace,
         depthBiasEnable=VK_FALSE # optional transform on depth values
     )
 
@@ -148,22 +296,34 @@ def create_graphics_pipeline(inputBundle):
 
     # fragment shader takes fragments from the rasterizer and colours them
     # appropriately
-    fragmentShaderModule = shaders.create_shader_module(inputBundle.device, inputBundle.fragmentFilepath)
     fragmentShaderStageInfo = VkPipelineShaderStageCreateInfo(
         sType=VK_STRUCTURE_TYPE_PIPELINE_SHADER_STAGE_CREATE_INFO,
         stage=VK_SHADER_STAGE_FRAGMENT_BIT,
         module=fragmentShaderModule,
-        pName="main"
+        pName=SHADER_ENTRY_POINT
     )
 
     shaderStages = [vertexShaderStageInfo, fragmentShaderStageInfo]
 
     # color blending, take the output from the fragment shader then incorporate it with the
     # existing pixel, if it has been set.
-    colorBlendAttachment = VkPipelineColorBlendAttachmentState(
-        colorWriteMask=VK_COLOR_COMPONENT_R_BIT | VK_COLOR_COMPONENT_G_BIT | VK_COLOR_COMPONENT_B_BIT | VK_COLOR_COMPONENT_A_BIT,
-        blendEnable=VK_FALSE # blend function
-    )
+    if description.blendEnable:
+        # standard alpha blending
+        colorBlendAttachment = VkPipelineColorBlendAttachmentState(
+            colorWriteMask=VK_COLOR_COMPONENT_R_BIT | VK_COLOR_COMPONENT_G_BIT | VK_COLOR_COMPONENT_B_BIT | VK_COLOR_COMPONENT_A_BIT,
+            blendEnable=VK_TRUE,
+            srcColorBlendFactor=VK_BLEND_FACTOR_SRC_ALPHA,
+            dstColorBlendFactor=VK_BLEND_FACTOR_ONE_MINUS_SRC_ALPHA,
+            colorBlendOp=VK_BLEND_OP_ADD,
+            srcAlphaBlendFactor=VK_BLEND_FACTOR_ONE,
+            dstAlphaBlendFactor=VK_BLEND_FACTOR_ZERO,
+            alphaBlendOp=VK_BLEND_OP_ADD
+        )
+    else:
+        colorBlendAttachment = VkPipelineColorBlendAttachmentState(
+            colorWriteMask=VK_COLOR_COMPONENT_R_BIT | VK_COLOR_COMPONENT_G_BIT | VK_COLOR_COMPONENT_B_BIT | VK_COLOR_COMPONENT_A_BIT,
+            blendEnable=VK_FALSE # blend function
+        )
     colorBlending = VkPipelineColorBlendStateCreateInfo(
         sType=VK_STRUCTURE_TYPE_PIPELINE_COLOR_BLEND_STATE_CREATE_INFO,
         logicOpEnable=VK_FALSE, # logical operations
@@ -172,10 +332,7 @@ def create_graphics_pipeline(inputBundle):
         blendConstants=[0.0, 0.0, 0.0, 0.0]
     )
 
-    pipelineLayout = create_pipeline_layout(inputBundle.device)
-    renderPass = create_render_pass(inputBundle.device, inputBundle.swapchainImageFormat)
-
-    pipelineInfo = VkGraphicsPipelineCreateInfo(
+    return VkGraphicsPipelineCreateInfo(
         sType=VK_STRUCTURE_TYPE_GRAPHICS_PIPELINE_CREATE_INFO,
         stageCount=2,
         pStages=shaderStages,
@@ -186,19 +343,56 @@ def create_graphics_pipeline(inputBundle):
         pMultisampleState=multisampling,
         pDepthStencilState=None,
         pColorBlendState=colorBlending,
+        pDynamicState=dynamicState,
         layout=pipelineLayout,
         renderPass=renderPass,
         subpass=0 # index to subpass 0, the only subpass
     )
 
-    # vkCreateGraphicsPipelines(device, pipelineCache, createInfoCount, pCreateInfos, pAllocator, pPipelines=None)
-    graphicsPipeline = vkCreateGraphicsPipelines(inputBundle.device, VK_NULL_HANDLE, 1, pipelineInfo, None)[0]
+def create_graphics_pipeline(inputBundle):
 
-    vkDestroyShaderModule(inputBundle.device, vertexShaderModule, None)
-    vkDestroyShaderModule(inputBundle.device, fragmentShaderModule, None)
+    description = describe_input_bundle(inputBundle)
+
+    # whatever was created before a step fails is released again, so e.g. a
+    # failed hot reload doesn't leak a layout and the shader modules it took
+    shaderModules = []
+    pipelineLayout = None
+    renderPass = inputBundle.renderPass
+    try:
+        shaderModules.append(create_shader_module(inputBundle, inputBundle.vertexFilepath))
+        shaderModules.append(create_shader_module(inputBundle, inputBundle.fragmentFilepath))
+        vertexShaderModule, fragmentShaderModule = shaderModules
+
+        pipelineLayout = create_pipeline_layout(
+            inputBundle.device, inputBundle.setLayouts, inputBundle.pushConstantRanges
+        )
+        if inputBundle.renderPass is None:
+            renderPass = create_render_pass(
+                inputBundle.device, inputBundle.swapchainImageFormat, inputBundle.finalLayout
+            )
+
+        pipelineInfo = make_graphics_pipeline_info(
+            description, pipelineLayout, renderPass, vertexShaderModule, fragmentShaderModule
+        )
+
+        # vkCreateGraphicsPipelines(device, pipelineCache, createInfoCount, pCreateInfos, pAllocator, pPipelines=None)
+        graphicsPipeline = vkCreateGraphicsPipelines(inputBundle.device, inputBundle.pipelineCache, 1, pipelineInfo, None)[0]
+    except Exception:
+        if inputBundle.renderPass is None and renderPass is not None:
+            vkDestroyRenderPass(inputBundle.device, renderPass, None)
+        if pipelineLayout is not None:
+            vkDestroyPipelineLayout(inputBundle.device, pipelineLayout, None)
+        free_shader_modules(inputBundle, shaderModules)
+        raise
+
+    # without a registry the modules aren't needed once the pipeline exists
+    if inputBundle.shaderRegistry is None:
+        free_shader_modules(inputBundle, shaderModules)
+        shaderModules = []
 
     return OuputBundle(
         pipelineLayout = pipelineLayout,
         renderPass = renderPass,
-        pipeline = graphicsPipeline
-    )
\ No newline at end of file
+        pipeline = graphicsPipeline,
+        shaderModules = shaderModules
+    )
@@ -0,0 +1,93 @@
+# statically load vulkan library
+from vulkan import *
+
+import itertools
+import time
+
+import mesh
+import pipeline
+import pipeline_registry
+from main import Engine
+
+def mesh_vertex_input():
+
+    binding, attributes = mesh.vertex_input_descriptions(mesh.VERTEX_DTYPE)
+
+    return (
+        [(binding.binding, binding.stride, binding.inputRate),],
+        [
+            (attribute.location, attribute.binding, attribute.format, attribute.offset)
+            for attribute in attributes
+        ]
+    )
+
+def make_descriptions():
+
+    meshBindings, meshAttributes = mesh_vertex_input()
+    shaderSets = [
+        ("shaders/vert.spv", "shaders/frag.spv", [], []),
+        ("shaders/mesh_vert.spv", "shaders/frag.spv", meshBindings, meshAttributes),
+    ]
+    topologies = [
+        VK_PRIMITIVE_TOPOLOGY_TRIANGLE_LIST, VK_PRIMITIVE_TOPOLOGY_TRIANGLE_STRIP,
+        VK_PRIMITIVE_TOPOLOGY_LINE_LIST, VK_PRIMITIVE_TOPOLOGY_POINT_LIST,
+    ]
+    cullModes = [VK_CULL_MODE_NONE, VK_CULL_MODE_BACK_BIT, VK_CULL_MODE_FRONT_BIT]
+    frontFaces = [VK_FRONT_FACE_CLOCKWISE, VK_FRONT_FACE_COUNTER_CLOCKWISE]
+    blendModes = [False, True]
+
+    return [
+        pipeline.PipelineDescription(
+            vertexFilepath, fragmentFilepath,
+            vertexBindings = bindings, vertexAttributes = attributes,
+            topology = topology, cullMode = cullMode, frontFace = frontFace,
+            blendEnable = blendEnable
+        )
+        for (vertexFilepath, fragmentFilepath, bindings, attributes), topology, cullMode, frontFace, blendEnable
+        in itertools.product(shaderSets, topologies, cullModes, frontFaces, blendModes)
+    ]
+
+def measure(engine, descriptions, method):
+
+    # every method starts from an empty cache so none of them profits from
+    # the work of another (the driver may still keep a cache of its own)
+    pipelineCache = vkCreatePipelineCache(engine.device, VkPipelineCacheCreateInfo(), None)
+    registry = pipeline_registry.PipelineRegistry(
+        engine.device, engine.pipelineLayout, engine.renderpass,
+        engine.shaderRegistry, pipelineCache
+    )
+
+    start = time.perf_counter()
+    if method == "one by one":
+        for description in descriptions:
+            registry.get(description)
+    elif method == "single batch":
+        registry.create_batch(descriptions)
+    else:
+        registry.create_parallel(descriptions)
+    elapsed = time.perf_counter() - start
+
+    registry.destroy()
+    vkDestroyPipelineCache(engine.device, pipelineCache, None)
+
+    return elapsed
+
+def run(methods = ("one by one", "single batch", "threaded")):
+
+    engine = Engine(640, 480, None, "Pipeline Benchmark", headless = True)
+    descriptions = make_descriptions()
+
+    results = {}
+    for method in methods:
+        results[method] = measure(engine, descriptions, method)
+        print(
+            f"{method:>12}: {len(descriptions)} pipelines in {results[method] * 1000:.2f} ms"
+            f" ({results[method] * 1000 / len(descriptions):.3f} ms each)"
+        )
+
+    engine.close()
+
+    return results
+
+if __name__ == "__main__":
+    run()
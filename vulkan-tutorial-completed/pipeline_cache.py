@@ -0,0 +1,113 @@
+# statically load vulkan library
+from vulkan import *
+
+import os
+import struct
+import tempfile
+
+# layout of VkPipelineCacheHeaderVersionOne, at the start of every cache blob:
+# headerSize, headerVersion, vendorID, deviceID, pipelineCacheUUID
+HEADER_FORMAT = "=IIII16s"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+class PipelineCacheBundle:
+
+
+    def __init__(self):
+
+        self.pipelineCache = None
+        self.filepath = None
+
+        # whether the cache was seeded with a valid blob from disk
+        self.warm = False
+
+def is_compatible(data, physicalDevice):
+
+    if len(data) < HEADER_SIZE:
+        return False
+
+    headerSize, headerVersion, vendorID, deviceID, cacheUUID = struct.unpack_from(
+        HEADER_FORMAT, data
+    )
+
+    # a blob written by another driver or gpu must not be fed back in
+    properties = vkGetPhysicalDeviceProperties(physicalDevice)
+
+    return (
+        headerSize >= HEADER_SIZE
+        and headerVersion == VK_PIPELINE_CACHE_HEADER_VERSION_ONE
+        and vendorID == properties.vendorID
+        and deviceID == properties.deviceID
+        and cacheUUID == bytes(ffi.buffer(properties.pipelineCacheUUID))
+    )
+
+def read_cache_file(filepath):
+
+    try:
+        with open(filepath, 'rb') as file:
+            return file.read()
+    except OSError:
+        return b""
+
+def load_pipeline_cache(device, physicalDevice, filepath):
+
+    bundle = PipelineCacheBundle()
+    bundle.filepath = filepath
+
+    data = read_cache_file(filepath)
+    if data and is_compatible(data, physicalDevice):
+        bundle.warm = True
+    elif data:
+        print(f"Ignoring incompatible pipeline cache {filepath}")
+
+    if bundle.warm:
+        createInfo = VkPipelineCacheCreateInfo(
+            initialDataSize = len(data),
+            pInitialData = ffi.from_buffer(data)
+        )
+    else:
+        createInfo = VkPipelineCacheCreateInfo()
+
+    bundle.pipelineCache = vkCreatePipelineCache(
+        device = device, pCreateInfo = createInfo, pAllocator = None
+    )
+
+    return bundle
+
+def get_pipeline_cache_data(device, pipelineCache):
+
+    # the wrapper doesn't expose vkGetPipelineCacheData, so query the size
+    # then the contents through the loader directly
+    dataSize = ffi.new("size_t*")
+    result = lib.vkGetPipelineCacheData(device, pipelineCache, dataSize, ffi.NULL)
+    if result != VK_SUCCESS:
+        raise exception_codes[result]
+
+    data = ffi.new("char[]", dataSize[0])
+    result = lib.vkGetPipelineCacheData(device, pipelineCache, dataSize, data)
+    if result != VK_SUCCESS:
+        raise exception_codes[result]
+
+    return ffi.buffer(data, dataSize[0])[:]
+
+def save_pipeline_cache(device, bundle):
+
+    data = get_pipeline_cache_data(device, bundle.pipelineCache)
+
+    # write next to the target then rename over it, so an interrupted write
+    # never leaves a truncated cache behind
+    directory = os.path.dirname(os.path.abspath(bundle.filepath))
+    descriptor, temporaryPath = tempfile.mkstemp(dir = directory, suffix = ".tmp")
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporaryPath, bundle.filepath)
+    except OSError:
+        os.unlink(temporaryPath)
+        raise
+
+def destroy_pipeline_cache(device, bundle):
+
+    vkDestroyPipelineCache(device, bundle.pipelineCache, None)
@@ -0,0 +1,146 @@
+# statically load vulkan library
+from vulkan import *
+
+import concurrent.futures
+
+import pipeline
+
+class PipelineRegistry:
+
+
+    # pipeline variants sharing one layout and render pass, each distinct
+    # description is only ever created once
+    def __init__(self, device, pipelineLayout, renderPass, shaderRegistry,
+        pipelineCache = VK_NULL_HANDLE
+    ):
+
+        self.device = device
+        self.pipelineLayout = pipelineLayout
+        self.renderPass = renderPass
+        self.shaderRegistry = shaderRegistry
+        self.pipelineCache = pipelineCache
+
+        # description -> pipeline
+        self.pipelines = {}
+
+        # description -> shader modules it holds in the registry
+        self.shaderModules = {}
+
+    def get(self, description):
+
+        if description not in self.pipelines:
+            self.create_batch([description,])
+
+        return self.pipelines[description]
+
+    def missing(self, descriptions):
+
+        # drops duplicates and descriptions that already have a pipeline
+        missing = []
+        for description in descriptions:
+            if description not in self.pipelines and description not in missing:
+                missing.append(description)
+
+        return missing
+
+    def make_infos(self, descriptions):
+
+        # shader modules are shared through the registry, which is not thread
+        # safe, so they are always acquired here on the calling thread
+        infos = []
+        for description in descriptions:
+            vertexShaderModule = self.shaderRegistry.acquire(description.vertexFilepath)
+            fragmentShaderModule = self.shaderRegistry.acquire(description.fragmentFilepath)
+            self.shaderModules[description] = [vertexShaderModule, fragmentShaderModule]
+
+            infos.append(
+                pipeline.make_graphics_pipeline_info(
+                    description, self.pipelineLayout, self.renderPass,
+                    vertexShaderModule, fragmentShaderModule
+                )
+            )
+
+        return infos
+
+    def create_batch(self, descriptions):
+
+        # every missing variant in a single vkCreateGraphicsPipelines call,
+        # which lets the driver spread the work over its own threads
+        descriptions = self.missing(descriptions)
+        if not descriptions:
+            return
+
+        infos = self.make_infos(descriptions)
+        try:
+            pipelines = vkCreateGraphicsPipelines(
+                self.device, self.pipelineCache, len(infos), infos, None
+            )
+        except VkError:
+            self.release_failed(descriptions)
+            raise
+
+        for description, graphicsPipeline in zip(descriptions, pipelines):
+            self.pipelines[description] = graphicsPipeline
+
+    def create_parallel(self, descriptions, workerCount = 4):
+
+        # variants split over python threads, the gil is released while the
+        # driver compiles. A pipeline cache must not be used by two threads at
+        # once, so each thread gets its own, merged into ours afterwards.
+        descriptions = self.missing(descriptions)
+        if not descriptions:
+            return
+
+        infos = self.make_infos(descriptions)
+        workerCount = min(workerCount, len(infos))
+        chunks = [
+            (descriptions[i::workerCount], infos[i::workerCount])
+            for i in range(workerCount)
+        ]
+        threadCaches = [
+            vkCreatePipelineCache(self.device, VkPipelineCacheCreateInfo(), None)
+            for _ in range(workerCount)
+        ]
+
+        def create_chunk(chunk, threadCache):
+            chunkDescriptions, chunkInfos = chunk
+            pipelines = vkCreateGraphicsPipelines(
+                self.device, threadCache, len(chunkInfos), chunkInfos, None
+            )
+            return list(zip(chunkDescriptions, pipelines))
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(workerCount) as executor:
+                for created in executor.map(create_chunk, chunks, threadCaches):
+                    for description, graphicsPipeline in created:
+                        self.pipelines[description] = graphicsPipeline
+
+            if self.pipelineCache != VK_NULL_HANDLE:
+                vkMergePipelineCaches(
+                    self.device, self.pipelineCache, len(threadCaches), threadCaches
+                )
+        except VkError:
+            self.release_failed(descriptions)
+            raise
+        finally:
+            for threadCache in threadCaches:
+                vkDestroyPipelineCache(self.device, threadCache, None)
+
+    def release_failed(self, descriptions):
+
+        for description in descriptions:
+            if description not in self.pipelines:
+                pipeline.release_shader_modules(
+                    self.shaderRegistry, self.shaderModules.pop(description)
+                )
+
+    def destroy(self):
+
+        for description, graphicsPipeline in self.pipelines.items():
+            vkDestroyPipeline(self.device, graphicsPipeline, None)
+            pipeline.release_shader_modules(
+                self.shaderRegistry, self.shaderModules.pop(description)
+            )
+
+        self.pipelines = {}
+        self.shaderModules = {}
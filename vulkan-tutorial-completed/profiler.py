@@ -0,0 +1,234 @@
+# statically load vulkan library
+from vulkan import *
+
+import csv
+import json
+import time
+
+import numpy as np
+
+# timestamps written into each frame's command buffer
+TIMESTAMP_FRAME_BEGIN = 0
+TIMESTAMP_RENDER_PASS_BEGIN = 1
+TIMESTAMP_RENDER_PASS_END = 2
+TIMESTAMP_FRAME_END = 3
+TIMESTAMP_COUNT = 4
+
+# one record per frame, all durations in milliseconds. The cpu phases follow
+# Engine.render, gpu durations are nan when the queue has no timestamps.
+FRAME_RECORD_DTYPE = np.dtype([
+    ("frame", np.int64),
+    ("fenceWait", np.float64),
+    ("acquire", np.float64),
+    ("record", np.float64),
+    ("submit", np.float64),
+    ("present", np.float64),
+    ("cpuTotal", np.float64),
+    ("gpuRenderPass", np.float64),
+    ("gpuTotal", np.float64),
+])
+
+class Profiler:
+
+
+    # gpu timestamps of a frame are read back the next time its slot comes
+    # around, after its fence was waited on anyway, so reading never stalls.
+    # Records only land in the ring once that happened, a few frames late.
+    def __init__(self, device, physicalDevice, queueFamilyIndex, slotCount, capacity = 1024):
+
+        self.device = device
+
+        # nanoseconds per timestamp tick
+        self.timestampPeriod = vkGetPhysicalDeviceProperties(
+            physicalDevice
+        ).limits.timestampPeriod
+
+        queueFamilies = vkGetPhysicalDeviceQueueFamilyProperties(physicalDevice)
+        self.gpuTimestamps = queueFamilies[queueFamilyIndex].timestampValidBits > 0
+
+        # completed frames, oldest overwritten first
+        self.records = np.zeros(capacity, dtype = FRAME_RECORD_DTYPE)
+        self.recordCount = 0
+
+        # frames abandoned before submitting, e.g. on an out of date swapchain,
+        # and frames whose gpu timings couldn't be read, they have no record
+        # or a record with nan gpu durations respectively
+        self.skippedFrames = 0
+        self.missingTimestamps = 0
+
+        self.queryPools = []
+        self.pendingValid = []
+        self.set_slot_count(slotCount)
+
+        self.frameNumber = 0
+        self.current = np.zeros((), dtype = FRAME_RECORD_DTYPE)
+        self.frameStart = 0.0
+        self.phaseStart = 0.0
+
+    def set_slot_count(self, slotCount):
+
+        # only called with the device idle, frames still waiting for their
+        # timestamps are completed rather than dropped with the old pools
+        for slot in range(len(self.pendingValid)):
+            self.collect(slot)
+
+        self.destroy_query_pools()
+
+        if self.gpuTimestamps:
+            poolInfo = VkQueryPoolCreateInfo(
+                queryType = VK_QUERY_TYPE_TIMESTAMP, queryCount = TIMESTAMP_COUNT
+            )
+            self.queryPools = [
+                vkCreateQueryPool(self.device, poolInfo, None) for _ in range(slotCount)
+            ]
+
+        # readback targets are allocated once, vkGetQueryPoolResults writes into them
+        self.timestamps = np.zeros((slotCount, TIMESTAMP_COUNT), dtype = np.uint64)
+        self.timestampPointers = [ffi.from_buffer(row) for row in self.timestamps]
+
+        # cpu side of frames whose gpu side isn't known yet
+        self.pending = np.zeros(slotCount, dtype = FRAME_RECORD_DTYPE)
+        self.pendingValid = [False,] * slotCount
+
+    def begin_frame(self):
+
+        self.current[()] = 0
+        self.frameStart = time.perf_counter()
+        self.phaseStart = self.frameStart
+
+    def mark_phase(self, phase):
+
+        # adds the time since the previous mark to the phase
+        now = time.perf_counter()
+        self.current[phase] += (now - self.phaseStart) * 1000.0
+        self.phaseStart = now
+
+    def end_frame(self, slot):
+
+        self.current["frame"] = self.frameNumber
+        self.current["cpuTotal"] = (time.perf_counter() - self.frameStart) * 1000.0
+        self.frameNumber += 1
+
+        self.pending[slot] = self.current
+        self.pendingValid[slot] = True
+
+    def skip_frame(self):
+
+        # the frame begun last won't be submitted, its phases so far are discarded
+        self.skippedFrames += 1
+
+    def collect(self, slot):
+
+        # the slot's previous frame has finished on the gpu, complete its record
+        if not self.pendingValid[slot]:
+            return
+        self.pendingValid[slot] = False
+
+        record = self.pending[slot]
+        record["gpuRenderPass"] = np.nan
+        record["gpuTotal"] = np.nan
+
+        if self.gpuTimestamps:
+            try:
+                vkGetQueryPoolResults(
+                    self.device, self.queryPools[slot], 0, TIMESTAMP_COUNT,
+                    self.timestamps[slot].nbytes, self.timestampPointers[slot],
+                    self.timestamps.itemsize, VK_QUERY_RESULT_64_BIT
+                )
+                ticks = self.timestamps[slot]
+                toMilliseconds = self.timestampPeriod / 1e6
+                record["gpuRenderPass"] = (
+                    int(ticks[TIMESTAMP_RENDER_PASS_END]) - int(ticks[TIMESTAMP_RENDER_PASS_BEGIN])
+                ) * toMilliseconds
+                record["gpuTotal"] = (
+                    int(ticks[TIMESTAMP_FRAME_END]) - int(ticks[TIMESTAMP_FRAME_BEGIN])
+                ) * toMilliseconds
+            except VkNotReady:
+                # e.g. a static command buffer that wasn't submitted for this slot
+                self.missingTimestamps += 1
+
+        self.records[self.recordCount % len(self.records)] = record
+        self.recordCount += 1
+
+    def record_frame_begin(self, commandBuffer, slot):
+
+        if not self.gpuTimestamps:
+            return
+
+        # queries must be reset outside of a render pass before being written again
+        vkCmdResetQueryPool(commandBuffer, self.queryPools[slot], 0, TIMESTAMP_COUNT)
+        vkCmdWriteTimestamp(
+            commandBuffer, VK_PIPELINE_STAGE_TOP_OF_PIPE_BIT,
+            self.queryPools[slot], TIMESTAMP_FRAME_BEGIN
+        )
+
+    def record_timestamp(self, commandBuffer, slot, query, stage):
+
+        if self.gpuTimestamps:
+            vkCmdWriteTimestamp(commandBuffer, stage, self.queryPools[slot], query)
+
+    def frame_records(self):
+
+        # completed records, oldest first
+        capacity = len(self.records)
+        if self.recordCount <= capacity:
+            return self.records[:self.recordCount].copy()
+
+        start = self.recordCount % capacity
+        return np.concatenate([self.records[start:], self.records[:start]])
+
+    def summary(self, percentiles = (50, 95, 99)):
+
+        records = self.frame_records()
+
+        summary = {}
+        for field in FRAME_RECORD_DTYPE.names[1:]:
+            values = records[field]
+            values = values[~np.isnan(values)]
+            summary[field] = {
+                f"p{percentile}": float(np.percentile(values, percentile)) if len(values) else None
+                for percentile in percentiles
+            }
+
+        return summary
+
+    def export_csv(self, filepath):
+
+        records = self.frame_records()
+
+        with open(filepath, 'w', newline = "") as file:
+            writer = csv.writer(file)
+            writer.writerow(FRAME_RECORD_DTYPE.names)
+            writer.writerows(records.tolist())
+
+    def export_json(self, filepath):
+
+        records = self.frame_records()
+
+        # json has no nan, missing gpu timings become null
+        data = {
+            "records": [
+                {
+                    field: (None if isinstance(value, float) and np.isnan(value) else value)
+                    for field, value in zip(FRAME_RECORD_DTYPE.names, record)
+                }
+                for record in records.tolist()
+            ],
+            "summary": self.summary(),
+            "skippedFrames": self.skippedFrames,
+            "missingTimestamps": self.missingTimestamps,
+        }
+
+        with open(filepath, 'w') as file:
+            json.dump(data, file, indent = 2)
+
+    def destroy_query_pools(self):
+
+        for queryPool in self.queryPools:
+            vkDestroyQueryPool(self.device, queryPool, None)
+
+        self.queryPools = []
+
+    def destroy(self):
+
+        self.destroy_query_pools()
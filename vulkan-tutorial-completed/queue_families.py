@@ -1,22 +1,35 @@
 # statically load vulkan library
 from vulkan import *
 
+import dispatch
+
 class QueueFamilyIndices:
 
     def __init__(self):
 
         self.graphicsFamily = None
         self.presentFamily = None
+
+        # a family that can copy but not draw, None when the gpu has none
+        self.transferFamily = None
+
+        # headless rendering has no surface to present to
+        self.needsPresent = True
     
     def is_complete(self):
 
+        if not self.needsPresent:
+            return self.graphicsFamily is not None
+
         return not(self.graphicsFamily is None or self.presentFamily is None)
     
 def find_queue_families(device, instance, surface):
         
     indices = QueueFamilyIndices()
+    indices.needsPresent = surface is not None
 
-    surfaceSupport = vkGetInstanceProcAddr(instance, "vkGetPhysicalDeviceSurfaceSupportKHR")
+    if indices.needsPresent:
+        surfaceSupport = dispatch.get_instance_dispatch(instance).vkGetPhysicalDeviceSurfaceSupportKHR
 
     queueFamilies = vkGetPhysicalDeviceQueueFamilyProperties(device)
 
@@ -25,10 +38,35 @@ def find_queue_families(device, instance, surface):
         if queueFamily.queueFlags & VK_QUEUE_GRAPHICS_BIT:
             indices.graphicsFamily = i
         
-        if surfaceSupport(device, i, surface):
+        if indices.needsPresent and surfaceSupport(device, i, surface):
             indices.presentFamily = i
 
         if indices.is_complete():
             break
 
-    return indices
\ No newline at end of file
+    indices.transferFamily = find_transfer_family(queueFamilies)
+
+    return indices
+
+def find_transfer_family(queueFamilies):
+
+    # a family with only transfer (and maybe sparse) support usually maps to
+    # the gpu's copy engines, which run alongside the graphics work
+    dedicatedFamily = None
+    separateFamily = None
+
+    for i,queueFamily in enumerate(queueFamilies):
+
+        flags = queueFamily.queueFlags
+        if not flags & VK_QUEUE_TRANSFER_BIT or flags & VK_QUEUE_GRAPHICS_BIT:
+            continue
+
+        if not flags & VK_QUEUE_COMPUTE_BIT and dedicatedFamily is None:
+            dedicatedFamily = i
+        elif separateFamily is None:
+            separateFamily = i
+
+    if dedicatedFamily is not None:
+        return dedicatedFamily
+
+    return separateFamily
\ No newline at end of file
@@ -0,0 +1,82 @@
+# statically load vulkan library
+from vulkan import *
+
+import numpy as np
+
+class ReadbackBuffer:
+
+
+    def __init__(self):
+
+        self.buffer = None
+        self.allocation = None
+        self.size = 0
+
+        # numpy view straight onto the mapped memory, no copy is made
+        self.pixels = None
+
+def create_readback_buffers(allocator, extent, count, bytesPerPixel = 4):
+
+    readbackBuffers = []
+
+    for _ in range(count):
+
+        readbackBuffer = ReadbackBuffer()
+        readbackBuffer.size = extent.width * extent.height * bytesPerPixel
+
+        # host coherent, so nothing has to be invalidated before reading
+        readbackBuffer.buffer, readbackBuffer.allocation = allocator.create_buffer(
+            readbackBuffer.size, VK_BUFFER_USAGE_TRANSFER_DST_BIT,
+            VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT | VK_MEMORY_PROPERTY_HOST_COHERENT_BIT
+        )
+
+        # the allocator keeps host visible memory mapped for its whole lifetime
+        readbackBuffer.pixels = np.frombuffer(
+            readbackBuffer.allocation.mapped, dtype = np.uint8
+        ).reshape(
+            extent.height, extent.width, bytesPerPixel
+        )
+
+        readbackBuffers.append(readbackBuffer)
+
+    return readbackBuffers
+
+def record_copy(commandBuffer, image, readbackBuffer, extent):
+
+    # the render pass leaves the image in TRANSFER_SRC_OPTIMAL
+    region = VkBufferImageCopy(
+        bufferOffset = 0, bufferRowLength = 0, bufferImageHeight = 0,
+        imageSubresource = VkImageSubresourceLayers(
+            aspectMask = VK_IMAGE_ASPECT_COLOR_BIT,
+            mipLevel = 0, baseArrayLayer = 0, layerCount = 1
+        ),
+        imageOffset = [0, 0, 0],
+        imageExtent = [extent.width, extent.height, 1]
+    )
+
+    vkCmdCopyImageToBuffer(
+        commandBuffer, image, VK_IMAGE_LAYOUT_TRANSFER_SRC_OPTIMAL,
+        readbackBuffer.buffer, 1, [region,]
+    )
+
+    # make the copied pixels visible to the host once the fence signals. The
+    # bindings define VK_WHOLE_SIZE as -1, which doesn't fit a VkDeviceSize,
+    # so the buffer's own size is given instead
+    barrier = VkBufferMemoryBarrier(
+        srcAccessMask = VK_ACCESS_TRANSFER_WRITE_BIT,
+        dstAccessMask = VK_ACCESS_HOST_READ_BIT,
+        srcQueueFamilyIndex = VK_QUEUE_FAMILY_IGNORED,
+        dstQueueFamilyIndex = VK_QUEUE_FAMILY_IGNORED,
+        buffer = readbackBuffer.buffer, offset = 0, size = readbackBuffer.size
+    )
+
+    vkCmdPipelineBarrier(
+        commandBuffer, VK_PIPELINE_STAGE_TRANSFER_BIT, VK_PIPELINE_STAGE_HOST_BIT,
+        0, 0, None, 1, [barrier,], 0, None
+    )
+
+def destroy_readback_buffers(allocator, readbackBuffers):
+
+    for readbackBuffer in readbackBuffers:
+        readbackBuffer.pixels = None
+        allocator.destroy_buffer(readbackBuffer.buffer, readbackBuffer.allocation)
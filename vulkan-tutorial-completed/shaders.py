@@ -1,6 +1,11 @@
 # statically load vulkan library
 from vulkan import *
 
+import collections
+import hashlib
+import mmap
+import os
+
 def read_shader_src(filename):
 
     with open(filename, 'rb') as file:
@@ -19,4 +24,129 @@ def create_shader_module(device, filename):
     )
     return vkCreateShaderModule(
         device = device, pCreateInfo = createInfo, pAllocator = None
-    )
\ No newline at end of file
+    )
+
+class ShaderModuleEntry:
+
+
+    def __init__(self):
+
+        self.module = None
+        self.digest = None
+
+        # pipelines currently holding the module
+        self.refCount = 0
+
+class ShaderRegistry:
+
+
+    # modules are shared by every pipeline built from the same spir-v, and
+    # kept around for a while once unused in case another pipeline wants them
+    def __init__(self, device, maxUnused = 16):
+
+        self.device = device
+        self.maxUnused = maxUnused
+
+        # content hash -> entry
+        self.entries = {}
+
+        # (path, modification time, size) -> content hash, so a file that
+        # didn't change isn't even read again
+        self.fileDigests = {}
+
+        # module -> content hash
+        self.moduleDigests = {}
+
+        # hashes of modules no pipeline holds, least recently released first
+        self.unused = collections.OrderedDict()
+
+    def file_key(self, filepath):
+
+        stat = os.stat(filepath)
+        return (os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+
+    def acquire(self, filepath):
+
+        fileKey = self.file_key(filepath)
+        digest = self.fileDigests.get(fileKey)
+
+        if digest is None or digest not in self.entries:
+            digest = self.load(filepath, fileKey)
+
+        entry = self.entries[digest]
+        entry.refCount += 1
+        self.unused.pop(digest, None)
+
+        return entry.module
+
+    def load(self, filepath, fileKey):
+
+        # the file is mapped rather than read, the driver copies the code
+        # straight out of the page cache
+        failure = None
+        with open(filepath, 'rb') as file, mmap.mmap(
+            file.fileno(), 0, access = mmap.ACCESS_READ
+        ) as code:
+
+            digest = hashlib.sha256(code).digest()
+            self.fileDigests[fileKey] = digest
+
+            if digest in self.entries:
+                return digest
+
+            createInfo = VkShaderModuleCreateInfo(codeSize = len(code), pCode = code)
+            try:
+                module = vkCreateShaderModule(self.device, createInfo, None)
+            except VkError as error:
+                # the traceback reaches the create info through the bindings'
+                # frames, keeping it would keep the mapping exported
+                failure = error.with_traceback(None)
+            finally:
+                # drop the pointer into the mapping before it is closed,
+                # closing an exported mapping raises BufferError
+                del createInfo
+
+        if failure is not None:
+            raise failure
+
+        entry = ShaderModuleEntry()
+        entry.module = module
+        entry.digest = digest
+        self.entries[digest] = entry
+        self.moduleDigests[module] = digest
+
+        return digest
+
+    def release(self, module):
+
+        digest = self.moduleDigests[module]
+        entry = self.entries[digest]
+        entry.refCount -= 1
+
+        if entry.refCount == 0:
+            self.unused[digest] = entry
+            while len(self.unused) > self.maxUnused:
+                _,evicted = self.unused.popitem(last = False)
+                self.evict(evicted)
+
+    def evict(self, entry):
+
+        vkDestroyShaderModule(self.device, entry.module, None)
+        del self.entries[entry.digest]
+        del self.moduleDigests[entry.module]
+
+    def evict_unused(self):
+
+        while self.unused:
+            _,evicted = self.unused.popitem(last = False)
+            self.evict(evicted)
+
+    def destroy(self):
+
+        for entry in self.entries.values():
+            vkDestroyShaderModule(self.device, entry.module, None)
+
+        self.entries = {}
+        self.fileDigests = {}
+        self.moduleDigests = {}
+        self.unused = collections.OrderedDict()
@@ -0,0 +1,25 @@
+#version 450
+
+layout(location = 0) in vec2 position;
+layout(location = 1) in vec3 color;
+
+// per instance attributes, the matrix takes locations 2 to 5
+layout(location = 2) in mat4 instanceTransform;
+layout(location = 6) in vec3 instanceColor;
+
+layout(location = 0) out vec3 fragColor;
+
+// per frame data, one ring slot per frame in flight
+layout(set = 0, binding = 0) uniform FrameData {
+	mat4 viewProjection;
+} frame;
+
+// per draw data, pushed while recording
+layout(push_constant) uniform PushConstants {
+	mat4 model;
+} push;
+
+void main() {
+	gl_Position = frame.viewProjection * push.model * instanceTransform * vec4(position, 0.0, 1.0);
+	fragColor = color * instanceColor;
+}
@@ -0,0 +1,21 @@
+#version 450
+
+layout(location = 0) in vec2 position;
+layout(location = 1) in vec2 texCoord;
+
+layout(location = 0) out vec2 fragTexCoord;
+
+// per frame data, one ring slot per frame in flight
+layout(set = 0, binding = 0) uniform FrameData {
+	mat4 viewProjection;
+} frame;
+
+// per draw data, pushed while recording
+layout(push_constant) uniform PushConstants {
+	mat4 model;
+} push;
+
+void main() {
+	gl_Position = frame.viewProjection * push.model * vec4(position, 0.0, 1.0);
+	fragTexCoord = texCoord;
+}
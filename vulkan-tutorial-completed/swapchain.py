@@ -1,6 +1,7 @@
 # statically load vulkan library
 from vulkan import *
 
+import dispatch
 import framebuffer
 import queue_families
 
@@ -26,14 +27,13 @@ class SwapChainBundle:
 def query_swapchain_support(instance, physicalDevice, surface):
 
     support = SwapChainSupportDetails()
-    vkGetPhysicalDeviceSurfaceCapabilitiesKHR = vkGetInstanceProcAddr(instance, 'vkGetPhysicalDeviceSurfaceCapabilitiesKHR')
-    support.capabilities = vkGetPhysicalDeviceSurfaceCapabilitiesKHR(physicalDevice, surface)
+    instanceProcedures = dispatch.get_instance_dispatch(instance)
 
-    vkGetPhysicalDeviceSurfaceFormatsKHR = vkGetInstanceProcAddr(instance, 'vkGetPhysicalDeviceSurfaceFormatsKHR')
-    support.formats = vkGetPhysicalDeviceSurfaceFormatsKHR(physicalDevice, surface)
+    support.capabilities = instanceProcedures.vkGetPhysicalDeviceSurfaceCapabilitiesKHR(physicalDevice, surface)
 
-    vkGetPhysicalDeviceSurfacePresentModesKHR = vkGetInstanceProcAddr(instance, 'vkGetPhysicalDeviceSurfacePresentModesKHR')
-    support.presentModes = vkGetPhysicalDeviceSurfacePresentModesKHR(physicalDevice, surface)
+    support.formats = instanceProcedures.vkGetPhysicalDeviceSurfaceFormatsKHR(physicalDevice, surface)
+
+    support.presentModes = instanceProcedures.vkGetPhysicalDeviceSurfacePresentModesKHR(physicalDevice, surface)
 
     return support
 
@@ -70,7 +70,9 @@ def choose_swapchain_extent(width, height, capabilities):
 
     return extent
 
-def create_swapchain(instance, logicalDevice, physicalDevice, surface, width, height):
+def create_swapchain(instance, logicalDevice, physicalDevice, surface, width, height,
+    oldSwapchain = VK_NULL_HANDLE
+):
 
     support = query_swapchain_support(instance, physicalDevice, surface)
 
@@ -104,16 +106,18 @@ def create_swapchain(instance, logicalDevice, physicalDevice, surface, width, he
         imageUsage = VK_IMAGE_USAGE_COLOR_ATTACHMENT_BIT, imageSharingMode = imageSharingMode,
         queueFamilyIndexCount = queueFamilyIndexCount, pQueueFamilyIndices = pQueueFamilyIndices,
         preTransform = support.capabilities.currentTransform, compositeAlpha = VK_COMPOSITE_ALPHA_OPAQUE_BIT_KHR,
-        presentMode = presentMode, clipped = VK_TRUE
+        presentMode = presentMode, clipped = VK_TRUE,
+
+        # lets the driver reuse resources still held by the swapchain being replaced
+        oldSwapchain = oldSwapchain
     )
 
     bundle = SwapChainBundle()
 
-    vkCreateSwapchainKHR = vkGetDeviceProcAddr(logicalDevice, 'vkCreateSwapchainKHR')
-    bundle.swapchain = vkCreateSwapchainKHR(logicalDevice, createInfo, None)
-    vkGetSwapchainImagesKHR = vkGetDeviceProcAddr(logicalDevice, 'vkGetSwapchainImagesKHR')
+    deviceProcedures = dispatch.get_device_dispatch(logicalDevice)
+    bundle.swapchain = deviceProcedures.vkCreateSwapchainKHR(logicalDevice, createInfo, None)
 
-    images = vkGetSwapchainImagesKHR(logicalDevice, bundle.swapchain)
+    images = deviceProcedures.vkGetSwapchainImagesKHR(logicalDevice, bundle.swapchain)
 
     for image in images:
 
@@ -0,0 +1,241 @@
+import os
+import sys
+
+import pytest
+
+# the modules import each other by name, as they do when run from their directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import vulkan
+except OSError:
+    # the bindings open the vulkan loader on import, without one (lavapipe
+    # is enough) none of the modules can even be imported
+    collect_ignore_glob = ["test_*.py"]
+
+class FakeDriver:
+
+
+    # answers the vk* commands of the project's modules without a gpu: every
+    # command records its name, creation commands hand out fresh handles of
+    # the right type and the few queries the engine makes get fixed answers
+    def __init__(self, imageCount):
+
+        self.calls = []
+        self.imageCount = imageCount
+        self.nextHandle = 0
+
+        # buffer handle -> size it was created with
+        self.bufferSizes = {}
+
+    def handle(self, typeName):
+
+        from vulkan import ffi
+
+        self.nextHandle += 1
+        return ffi.cast(typeName, self.nextHandle)
+
+    def command(self, name):
+
+        from vulkan import ffi
+
+        answer = getattr(self, name, None)
+        typeName = None
+        if answer is None and name.startswith("vkCreate"):
+            typeName = "Vk" + name[len("vkCreate"):]
+            try:
+                ffi.typeof(typeName)
+            except ffi.error:
+                typeName = None
+
+        def command(*args, **kwargs):
+            self.calls.append(name)
+            if answer is not None:
+                return answer(*args, **kwargs)
+            if typeName is not None:
+                return self.handle(typeName)
+
+        return command
+
+    def load_procedure(self, handle, name):
+
+        # extension procedures the dispatch tables ask for
+        def procedure(*args, **kwargs):
+            self.calls.append(name)
+            if name == "vkAcquireNextImageKHR":
+                kwargs["pImageIndex"][0] = self.calls.count(name) % self.imageCount
+
+        return procedure
+
+    def vkAllocateCommandBuffers(self, device, allocInfo):
+
+        return [self.handle("VkCommandBuffer") for _ in range(allocInfo.commandBufferCount)]
+
+    def vkAllocateDescriptorSets(self, device, allocInfo):
+
+        return [self.handle("VkDescriptorSet") for _ in range(allocInfo.descriptorSetCount)]
+
+    def vkAllocateMemory(self, device, allocInfo, allocator):
+
+        return self.handle("VkDeviceMemory")
+
+    def vkMapMemory(self, device, memory, offset, size, flags):
+
+        return bytearray(size)
+
+    def vkCreateBuffer(self, device, createInfo, allocator):
+
+        buffer = self.handle("VkBuffer")
+        self.bufferSizes[self.nextHandle] = createInfo.size
+        return buffer
+
+    def vkGetBufferMemoryRequirements(self, device, buffer):
+
+        from vulkan import ffi, VkMemoryRequirements
+
+        return VkMemoryRequirements(
+            size = self.bufferSizes[int(ffi.cast("uintptr_t", buffer))],
+            alignment = 256, memoryTypeBits = 0b11
+        )
+
+    def vkCreateGraphicsPipelines(self, device, pipelineCache, createInfoCount, pCreateInfos,
+        pAllocator
+    ):
+
+        from vulkan import ffi
+
+        # anything but a cache handle fails here, as it does in the bindings
+        ffi.cast("VkPipelineCache", pipelineCache)
+        return [self.handle("VkPipeline") for _ in range(createInfoCount)]
+
+    def vkGetPhysicalDeviceProperties(self, physicalDevice):
+
+        from vulkan import ffi
+        from vulkan._vulkan import StrWrap
+
+        properties = ffi.new("VkPhysicalDeviceProperties*")
+        properties.deviceName = b"Fake Device"
+        properties.limits.maxDrawIndirectCount = 1
+        properties.limits.minUniformBufferOffsetAlignment = 256
+        properties.limits.bufferImageGranularity = 1
+        properties.limits.timestampPeriod = 1.0
+        return StrWrap(properties[0])
+
+    def vkGetPhysicalDeviceMemoryProperties(self, physicalDevice):
+
+        from vulkan import (
+            ffi, VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT,
+            VK_MEMORY_PROPERTY_HOST_COHERENT_BIT, VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT,
+        )
+
+        # type 0 is device local, type 1 host visible
+        properties = ffi.new("VkPhysicalDeviceMemoryProperties*")
+        properties.memoryTypeCount = 2
+        properties.memoryTypes[0].propertyFlags = VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT
+        properties.memoryTypes[1].propertyFlags = (
+            VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT | VK_MEMORY_PROPERTY_HOST_COHERENT_BIT
+        )
+        return properties[0]
+
+    def render_targets(self, bundle, extent):
+
+        import framebuffer
+
+        for _ in range(self.imageCount):
+            frame = framebuffer.SwapChainFrame()
+            frame.image = self.handle("VkImage")
+            frame.image_view = self.handle("VkImageView")
+            bundle.frames.append(frame)
+
+        bundle.format = vulkan.VK_FORMAT_R8G8B8A8_UNORM
+        bundle.extent = extent
+        return bundle
+
+@pytest.fixture
+def stub_engine(monkeypatch):
+
+    # real Engines built on a FakeDriver: every vk* command in the project's
+    # modules is answered by the driver and the few setup steps that pick a
+    # gpu or read files return fake handles. Returns a factory taking the
+    # engine options plus the device procedure loader to use.
+    import device
+    import dispatch
+    import instance
+    import instrumentation
+    import main
+    import offscreen
+    import pipeline
+    import pipeline_cache
+    import queue_families
+    import swapchain
+
+    def make(headless = False, imageCount = 3, maxFramesInFlight = 2, loader = None,
+        **engineOptions
+    ):
+
+        driver = FakeDriver(imageCount)
+
+        for module in instrumentation.project_modules():
+            for name, value in list(vars(module).items()):
+                if name.startswith("vk") and callable(value):
+                    monkeypatch.setattr(module, name, driver.command(name))
+
+        monkeypatch.setattr(dispatch, "instanceTables", {})
+        monkeypatch.setattr(dispatch, "deviceTables", {})
+        monkeypatch.setattr(dispatch, "vkGetInstanceProcAddr", driver.load_procedure)
+        monkeypatch.setattr(dispatch, "vkGetDeviceProcAddr", loader or driver.load_procedure)
+
+        def create_window_surface(instance, window, allocator, surface):
+            surface[0] = driver.handle("VkSurfaceKHR")
+            return vulkan.VK_SUCCESS
+        monkeypatch.setattr(main.glfw, "create_window_surface", create_window_surface)
+
+        def find_queue_families(device, instance, surface):
+            indices = queue_families.QueueFamilyIndices()
+            indices.graphicsFamily = 0
+            indices.presentFamily = 0
+            return indices
+
+        monkeypatch.setattr(instance, "create_instance",
+            lambda *args, **kwargs: driver.handle("VkInstance"))
+        monkeypatch.setattr(device, "choose_physical_device",
+            lambda *args, **kwargs: driver.handle("VkPhysicalDevice"))
+        monkeypatch.setattr(device, "create_logical_device",
+            lambda *args, **kwargs: driver.handle("VkDevice"))
+        monkeypatch.setattr(device, "choose_device_features",
+            lambda *args, **kwargs: vulkan.VkPhysicalDeviceFeatures())
+        monkeypatch.setattr(device, "get_queues",
+            lambda *args, **kwargs: [driver.handle("VkQueue") for _ in range(3)])
+        monkeypatch.setattr(queue_families, "find_queue_families", find_queue_families)
+
+        def create_swapchain(instance, device, physicalDevice, surface, width, height, *args):
+            bundle = swapchain.SwapChainBundle()
+            bundle.swapchain = driver.handle("VkSwapchainKHR")
+            return driver.render_targets(bundle, vulkan.VkExtent2D(width, height))
+        monkeypatch.setattr(swapchain, "create_swapchain", create_swapchain)
+        monkeypatch.setattr(offscreen, "create_offscreen_targets",
+            lambda allocator, width, height, imageCount, *args:
+            driver.render_targets(offscreen.OffscreenBundle(), vulkan.VkExtent2D(width, height)))
+
+        def load_pipeline_cache(device, physicalDevice, filepath):
+            bundle = pipeline_cache.PipelineCacheBundle()
+            bundle.pipelineCache = driver.handle("VkPipelineCache")
+            bundle.filepath = filepath
+            return bundle
+        monkeypatch.setattr(pipeline_cache, "load_pipeline_cache", load_pipeline_cache)
+
+        # no spir-v is read, the pipeline is a handle like any other
+        monkeypatch.setattr(pipeline, "create_graphics_pipeline",
+            lambda inputBundle: pipeline.OuputBundle(
+                driver.handle("VkPipelineLayout"), inputBundle.renderPass,
+                driver.handle("VkPipeline")
+            ))
+
+        engine = main.Engine(
+            640, 480, None, "test", maxFramesInFlight = maxFramesInFlight,
+            headless = headless, offscreenImageCount = imageCount, **engineOptions
+        )
+        engine.driver = driver
+        return engine
+
+    return make
@@ -0,0 +1,137 @@
+import pytest
+
+import allocator
+from allocator import MIB
+from vulkan import (
+    VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT, VK_MEMORY_PROPERTY_HOST_COHERENT_BIT,
+    VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT,
+)
+
+HOST_VISIBLE = VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT | VK_MEMORY_PROPERTY_HOST_COHERENT_BIT
+
+class FakeBackend:
+
+
+    # type 0 is device local, type 1 host visible
+    def __init__(self, bufferImageGranularity = 1024):
+
+        self.memoryTypeFlags = [VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT, HOST_VISIBLE]
+        self.bufferImageGranularity = bufferImageGranularity
+
+        # memory handle -> size
+        self.memory = {}
+        self.nextMemory = 1
+
+    def allocate_memory(self, size, memoryTypeIndex):
+
+        memory = self.nextMemory
+        self.nextMemory += 1
+        self.memory[memory] = size
+        return memory
+
+    def free_memory(self, memory):
+
+        del self.memory[memory]
+
+    def map_memory(self, memory, size):
+
+        return bytearray(size)
+
+    def unmap_memory(self, memory):
+        pass
+
+class Requirements:
+
+
+    def __init__(self, size, alignment = 256, memoryTypeBits = 0b11):
+
+        self.size = size
+        self.alignment = alignment
+        self.memoryTypeBits = memoryTypeBits
+
+def make_allocator(strategy = "freelist", blockSize = MIB):
+
+    backend = FakeBackend()
+    return allocator.Allocator(
+        None, None, blockSize = blockSize, strategy = strategy, backend = backend
+    ), backend
+
+@pytest.mark.parametrize("strategy", sorted(allocator.STRATEGIES))
+def test_stats_count_used_bytes_and_allocations(strategy):
+
+    memoryAllocator,_ = make_allocator(strategy)
+
+    allocations = [
+        memoryAllocator.allocate(Requirements(1000), VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT)
+        for _ in range(4)
+    ]
+    memoryAllocator.allocate(Requirements(4096), HOST_VISIBLE)
+
+    stats = memoryAllocator.stats()
+    assert stats.blockCount == 2
+    assert stats.bytesAllocated == 2 * MIB
+    assert stats.bytesUsed == 4 * 1000 + 4096
+    assert stats.allocationCount == 5
+
+    memoryAllocator.free(allocations[0])
+    stats = memoryAllocator.stats()
+    assert stats.bytesUsed == 3 * 1000 + 4096
+    assert stats.allocationCount == 4
+
+@pytest.mark.parametrize("strategy", sorted(allocator.STRATEGIES))
+def test_idle_allocator_is_not_fragmented(strategy):
+
+    memoryAllocator,_ = make_allocator(strategy)
+
+    # one empty block for each (memory type, linear) kind
+    allocations = [
+        memoryAllocator.allocate(Requirements(1000), VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT, linear = True),
+        memoryAllocator.allocate(Requirements(1000), VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT, linear = False),
+        memoryAllocator.allocate(Requirements(1000), HOST_VISIBLE),
+    ]
+    for allocation in allocations:
+        memoryAllocator.free(allocation)
+
+    stats = memoryAllocator.stats()
+    assert stats.blockCount == 3
+    assert stats.bytesUsed == 0
+    assert stats.allocationCount == 0
+    assert stats.fragmentation == 0.0
+
+def test_fragmentation_is_weighted_by_block_size():
+
+    memoryAllocator,_ = make_allocator("freelist")
+    kilobyte = Requirements(1024, alignment = 1024)
+
+    # every other kilobyte of the first quarter freed: the block's free space
+    # is 128 ranges of 1 KiB plus the untouched rest of the block
+    allocations = [
+        memoryAllocator.allocate(kilobyte, VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT)
+        for _ in range(256)
+    ]
+    for allocation in allocations[::2]:
+        memoryAllocator.free(allocation)
+
+    freeSizes = allocations[0].block.strategy.free_sizes()
+    blockFragmentation = 1.0 - max(freeSizes) / sum(freeSizes)
+    assert len(freeSizes) == 129
+    assert memoryAllocator.stats().fragmentation == pytest.approx(blockFragmentation)
+
+    # an idle block of the same size halves it
+    memoryAllocator.free(memoryAllocator.allocate(Requirements(1000), HOST_VISIBLE))
+    assert memoryAllocator.stats().fragmentation == pytest.approx(blockFragmentation / 2)
+
+def test_empty_blocks_beyond_the_first_are_released():
+
+    memoryAllocator, backend = make_allocator("freelist", blockSize = 4096)
+
+    first = memoryAllocator.allocate(Requirements(4096), VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT)
+    second = memoryAllocator.allocate(Requirements(4096), VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT)
+    assert len(backend.memory) == 2
+
+    memoryAllocator.free(second)
+    memoryAllocator.free(first)
+    assert len(backend.memory) == 1
+
+    memoryAllocator.destroy()
+    assert not backend.memory
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+import benchmark
+import main
+from vulkan import UINT64_MAX, VkTimeout
+
+def test_device_name_is_a_string(stub_engine):
+
+    engine = stub_engine(headless = True)
+
+    assert benchmark.device_name(engine) == "Fake Device"
+
+def test_pipelines_scenario_cycles_through_its_variants(stub_engine, monkeypatch):
+
+    # the variants' shaders are read relative to the project directory
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    engine = stub_engine(headless = True)
+    enginePipeline = engine.pipeline
+
+    scenario = benchmark.PipelinesScenario(engine)
+    scenario.setup()
+    assert len(scenario.variants) > 1
+
+    for i in range(len(scenario.variants)):
+        scenario.before_frame(i)
+        engine.render()
+    assert engine.pipeline == scenario.variants[-1]
+
+    scenario.teardown()
+    assert engine.pipeline == enginePipeline
+
+def test_no_scenarios_given_runs_them_all():
+
+    assert benchmark.parse_arguments([]).scenarios == benchmark.SCENARIOS
+    assert benchmark.parse_arguments(["triangle", "pipelines"]).scenarios == ["triangle", "pipelines"]
+
+def test_unknown_scenarios_are_rejected():
+
+    with pytest.raises(SystemExit):
+        benchmark.parse_arguments(["triangles"])
+
+class FakeApp:
+
+
+    def __init__(self, engine):
+
+        self.graphicsEngine = engine
+        self.closed = False
+
+    def close(self):
+
+        self.closed = True
+
+def test_timed_out_scenarios_are_reported_as_failed(stub_engine, monkeypatch, tmp_path):
+
+    # every frame waits longer than the driver allows
+    def wait_for_fences(*args, **kwargs):
+        raise VkTimeout()
+
+    apps = []
+    def make_app(width, height, appName, **engineOptions):
+        apps.append(FakeApp(stub_engine(headless = True, **engineOptions)))
+        monkeypatch.setattr(main, "vkWaitForFences", wait_for_fences)
+        return apps[-1]
+    monkeypatch.setattr(benchmark, "HeadlessApp", make_app)
+
+    results = benchmark.run(
+        ["triangle", "pipelines"], frameCount = 2, warmupFrames = 1,
+        outputDirectory = str(tmp_path)
+    )
+
+    assert results["scenarios"] == {
+        "triangle": {"failed": "timed out"}, "pipelines": {"failed": "timed out"},
+    }
+    assert all(app.closed for app in apps)
+    assert all(app.graphicsEngine.frameTimeout == UINT64_MAX for app in apps)
@@ -0,0 +1,41 @@
+import dispatch
+
+def test_render_resolves_procedures_only_once(stub_engine):
+
+    engine = stub_engine()
+
+    engine.render()
+    lookups = dispatch.lookup_count()
+    assert lookups > 0
+
+    for _ in range(20):
+        engine.render()
+
+    assert dispatch.lookup_count() == lookups
+    assert engine.driver.calls.count("vkQueuePresentKHR") == 21
+
+def test_tables_are_shared_per_handle(monkeypatch):
+
+    monkeypatch.setattr(dispatch, "deviceTables", {})
+
+    first = dispatch.get_device_dispatch(1)
+    assert dispatch.get_device_dispatch(1) is first
+    assert dispatch.get_device_dispatch(2) is not first
+
+    dispatch.release_device_dispatch(1)
+    assert dispatch.get_device_dispatch(1) is not first
+
+def test_headless_render_needs_no_swapchain_procedures(stub_engine):
+
+    from vulkan import ProcedureNotFoundError
+
+    # headless devices don't enable VK_KHR_swapchain, looking it up fails
+    def loader(handle, name):
+        raise ProcedureNotFoundError()
+
+    engine = stub_engine(headless = True, loader = loader)
+    for _ in range(5):
+        engine.render()
+
+    assert engine.driver.calls.count("vkQueueSubmit") == 5
+    assert engine.deviceProcedures.lookupCount == 0
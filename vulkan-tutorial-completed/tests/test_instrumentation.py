@@ -0,0 +1,53 @@
+import types
+
+import numpy as np
+
+import instrumentation
+import vulkan
+
+class SpikyRenderer:
+
+
+    # one struct and one draw per frame, except for a single frame that
+    # builds and draws a lot more
+    def __init__(self, commands, spikeFrame):
+
+        self.commands = commands
+        self.spikeFrame = spikeFrame
+        self.frame = 0
+
+    def render(self):
+
+        count = 50 if self.frame == self.spikeFrame else 1
+        for _ in range(count):
+            vulkan.VkViewport(width = 1.0, height = 1.0)
+            self.commands.vkCmdDraw()
+        self.frame += 1
+
+def test_frames_are_recorded_one_by_one():
+
+    commands = types.ModuleType("commands")
+    commands.vkCmdDraw = lambda *args: None
+    renderer = SpikyRenderer(commands, spikeFrame = 7)
+
+    vulkanInstrumentation = instrumentation.Instrumentation()
+    vulkanInstrumentation.install(renderer, modules = [commands])
+    try:
+        # calls between frames, e.g. while loading, belong to no frame
+        commands.vkCmdDraw()
+        for _ in range(20):
+            renderer.render()
+    finally:
+        vulkanInstrumentation.uninstall()
+
+    calls, seconds = vulkanInstrumentation.per_frame_calls("vkCmdDraw")
+    assert calls.tolist() == [1] * 7 + [50] + [1] * 12
+    assert len(seconds) == 20
+
+    built = vulkanInstrumentation.per_frame_structs("VkViewport")
+    assert np.median(built) == 1 and built.max() == 50
+    assert vulkanInstrumentation.calls["vkCmdDraw"][0] == 70
+
+    report = vulkanInstrumentation.report()
+    assert "20 frames" in report
+    assert "structs built per frame: median 1.0, max 50" in report
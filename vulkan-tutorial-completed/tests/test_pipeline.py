@@ -0,0 +1,66 @@
+import gc
+
+import pytest
+
+import pipeline
+from vulkan import ffi, VK_FORMAT_B8G8R8A8_UNORM, VkErrorOutOfDeviceMemory
+
+class FakeRegistry:
+
+
+    def __init__(self):
+
+        self.refs = {}
+
+    def acquire(self, filepath):
+
+        module = ffi.cast("VkShaderModule", len(self.refs) + 1)
+        self.refs[filepath] = self.refs.get(filepath, 0) + 1
+        return module
+
+    def release(self, module):
+
+        filepath = list(self.refs)[int(ffi.cast("uintptr_t", module)) - 1]
+        self.refs[filepath] -= 1
+
+def test_failed_creation_releases_what_it_took(monkeypatch):
+
+    destroyed = []
+    monkeypatch.setattr(pipeline, "vkCreatePipelineLayout",
+        lambda **kwargs: ffi.cast("VkPipelineLayout", 7))
+    monkeypatch.setattr(pipeline, "vkDestroyPipelineLayout",
+        lambda device, layout, allocator: destroyed.append("layout"))
+    monkeypatch.setattr(pipeline, "vkDestroyRenderPass",
+        lambda device, renderPass, allocator: destroyed.append("renderPass"))
+
+    def create_graphics_pipelines(*args):
+        raise VkErrorOutOfDeviceMemory()
+    monkeypatch.setattr(pipeline, "vkCreateGraphicsPipelines", create_graphics_pipelines)
+
+    registry = FakeRegistry()
+    inputBundle = pipeline.InputBundle(
+        ffi.cast("VkDevice", 1), VK_FORMAT_B8G8R8A8_UNORM, "vert.spv", "frag.spv",
+        renderPass = ffi.cast("VkRenderPass", 5), shaderRegistry = registry
+    )
+
+    with pytest.raises(VkErrorOutOfDeviceMemory):
+        pipeline.create_graphics_pipeline(inputBundle)
+
+    assert registry.refs == {"vert.spv": 0, "frag.spv": 0}
+    # the render pass was the caller's, only the layout is destroyed
+    assert destroyed == ["layout"]
+
+def test_stage_entry_points_outlive_the_info_builder():
+
+    description = pipeline.PipelineDescription("vert.spv", "frag.spv")
+    pipelineInfo = pipeline.make_graphics_pipeline_info(
+        description, ffi.cast("VkPipelineLayout", 1), ffi.cast("VkRenderPass", 2),
+        ffi.cast("VkShaderModule", 3), ffi.cast("VkShaderModule", 4)
+    )
+    gc.collect()
+
+    # the stages were copied into the info's own array, their names have to
+    # point at memory that is still owned by something
+    for i in range(pipelineInfo.stageCount):
+        assert pipelineInfo.pStages[i].pName == ffi.cast("char*", pipeline.SHADER_ENTRY_POINT)
+        assert ffi.string(pipelineInfo.pStages[i].pName) == b"main"
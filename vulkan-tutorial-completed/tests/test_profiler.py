@@ -0,0 +1,76 @@
+import numpy as np
+
+import profiler
+from vulkan import ffi, VkErrorOutOfDateKhr, VkNotReady
+
+class Properties:
+
+
+    # just the fields the profiler reads
+    def __init__(self):
+
+        class Limits:
+            timestampPeriod = 1.0
+        self.limits = Limits()
+        self.timestampValidBits = 64
+
+def make_profiler(monkeypatch, slotCount = 2, timestampsReady = True):
+
+    monkeypatch.setattr(profiler, "vkGetPhysicalDeviceProperties", lambda *args: Properties())
+    monkeypatch.setattr(profiler, "vkGetPhysicalDeviceQueueFamilyProperties",
+        lambda *args: [Properties()])
+    monkeypatch.setattr(profiler, "vkCreateQueryPool",
+        lambda *args: ffi.cast("VkQueryPool", 1))
+    monkeypatch.setattr(profiler, "vkDestroyQueryPool", lambda *args: None)
+
+    def get_query_pool_results(*args):
+        if not timestampsReady:
+            raise VkNotReady()
+    monkeypatch.setattr(profiler, "vkGetQueryPoolResults", get_query_pool_results)
+
+    return profiler.Profiler(None, None, 0, slotCount)
+
+def test_unread_timestamps_are_counted(monkeypatch):
+
+    frameProfiler = make_profiler(monkeypatch, timestampsReady = False)
+
+    for slot in (0, 1, 0, 1):
+        frameProfiler.collect(slot)
+        frameProfiler.begin_frame()
+        frameProfiler.end_frame(slot)
+
+    records = frameProfiler.frame_records()
+    assert len(records) == 2
+    assert np.isnan(records["gpuTotal"]).all()
+    assert frameProfiler.missingTimestamps == 2
+
+def test_pending_frames_survive_a_slot_count_change(monkeypatch):
+
+    frameProfiler = make_profiler(monkeypatch)
+
+    for slot in (0, 1):
+        frameProfiler.begin_frame()
+        frameProfiler.end_frame(slot)
+    frameProfiler.set_slot_count(3)
+
+    assert len(frameProfiler.frame_records()) == 2
+    assert frameProfiler.missingTimestamps == 0
+
+def test_out_of_date_frames_are_counted_as_skipped(stub_engine, monkeypatch):
+
+    def loader(handle, name):
+        def procedure(*args, **kwargs):
+            raise VkErrorOutOfDateKhr()
+        return procedure
+
+    engine = stub_engine(loader = loader)
+    engine.profiler = make_profiler(monkeypatch)
+    recreated = []
+    engine.recreate_swapchain = lambda: recreated.append(True)
+
+    for _ in range(3):
+        engine.render()
+
+    assert len(recreated) == 3
+    assert engine.profiler.skippedFrames == 3
+    assert "vkQueueSubmit" not in engine.driver.calls
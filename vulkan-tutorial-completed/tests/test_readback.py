@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+import instance
+import main
+from vulkan import ffi, vkDestroyInstance, vkEnumeratePhysicalDevices, VkError
+
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def gpu_engine(monkeypatch, tmp_path):
+
+    # real headless engines on whatever driver is installed, a software one
+    # such as lavapipe or swiftshader is enough. Shaders are read relative
+    # to the project directory.
+    monkeypatch.chdir(PROJECT_DIRECTORY)
+
+    try:
+        probe = instance.create_instance("probe", headless = True)
+        physicalDevices = vkEnumeratePhysicalDevices(probe)
+        vkDestroyInstance(probe, None)
+    except (VkError, ffi.error) as error:
+        pytest.skip(f"no vulkan driver: {error!r}")
+    if not physicalDevices:
+        pytest.skip("no vulkan device")
+
+    engines = []
+    def make(width, height, **engineOptions):
+        engine = main.Engine(
+            width, height, None, "test", headless = True,
+            pipelineCacheFilepath = str(tmp_path / "pipeline_cache.bin"), **engineOptions
+        )
+        engines.append(engine)
+        return engine
+
+    yield make
+
+    for engine in engines:
+        engine.close()
+
+def test_readback_yields_every_frame(stub_engine):
+
+    engine = stub_engine(headless = True, readbackEnabled = True)
+
+    frames = [pixels.copy() for pixels in engine.readback_frames(5)]
+
+    assert len(frames) == 5
+    assert all(pixels.shape == (480, 640, 4) for pixels in frames)
+    assert engine.driver.calls.count("vkCmdCopyImageToBuffer") == 5
+
+def test_readback_returns_the_rendered_pixels(gpu_engine):
+
+    engine = gpu_engine(64, 64, readbackEnabled = True)
+    engine.set_clear_color([0.0, 0.0, 0.0, 1.0])
+
+    frames = [pixels.copy() for pixels in engine.readback_frames(3)]
+
+    assert len(frames) == 3
+    for pixels in frames:
+        # the corners are cleared, the default triangle covers the center
+        assert pixels[0, 0].tolist() == [0, 0, 0, 255]
+        assert pixels[-1, -1].tolist() == [0, 0, 0, 255]
+        assert pixels[32, 32, :3].any()
+        assert pixels[32, 32, 3] == 255
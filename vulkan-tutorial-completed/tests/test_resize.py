@@ -0,0 +1,46 @@
+import main
+
+def resize(engine, width, height):
+
+    # what App.on_framebuffer_resize does from the main thread of a threaded app
+    engine.windowSize = (width, height)
+    engine.framebufferResized = True
+
+def test_resize_during_recreation_is_not_lost(stub_engine, monkeypatch):
+
+    engine = stub_engine()
+    engine.render()
+    resize(engine, 800, 600)
+
+    # the window is resized again once the render thread has read the size,
+    # while it waits for the device
+    resizes = [(1024, 768)]
+    def vkDeviceWaitIdle(device):
+        if resizes:
+            resize(engine, *resizes.pop())
+    monkeypatch.setattr(main, "vkDeviceWaitIdle", vkDeviceWaitIdle)
+
+    engine.render()
+    assert (engine.swapchainExtent.width, engine.swapchainExtent.height) == (800, 600)
+    assert engine.framebufferResized
+
+    engine.render()
+    assert (engine.swapchainExtent.width, engine.swapchainExtent.height) == (1024, 768)
+    assert not engine.framebufferResized
+
+def test_minimized_window_is_recreated_once_restored(stub_engine):
+
+    engine = stub_engine()
+    engine.render()
+
+    resize(engine, 0, 0)
+    engine.render()
+    assert (engine.swapchainExtent.width, engine.swapchainExtent.height) == (640, 480)
+    assert engine.framebufferResized
+
+    # the flag kept from the minimized frame recreates once there is a size again
+    recreated = len(engine.recreateTimes)
+    engine.windowSize = (640, 480)
+    engine.render()
+    assert len(engine.recreateTimes) == recreated + 1
+    assert not engine.framebufferResized
@@ -0,0 +1,40 @@
+import pytest
+
+import shaders
+from vulkan import ffi, VkErrorOutOfDeviceMemory
+
+def write_spirv(tmp_path, name, words):
+
+    filepath = tmp_path / name
+    filepath.write_bytes(bytes(words))
+    return str(filepath)
+
+def test_modules_are_shared_by_content(tmp_path, monkeypatch):
+
+    created = []
+    def create_shader_module(device, createInfo, allocator):
+        created.append(createInfo.codeSize)
+        return ffi.cast("VkShaderModule", len(created))
+    monkeypatch.setattr(shaders, "vkCreateShaderModule", create_shader_module)
+    monkeypatch.setattr(shaders, "vkDestroyShaderModule", lambda *args: None)
+
+    first = write_spirv(tmp_path, "a.spv", range(16))
+    second = write_spirv(tmp_path, "b.spv", range(16))
+
+    registry = shaders.ShaderRegistry(None)
+    assert registry.acquire(first) == registry.acquire(second)
+    assert created == [16]
+
+def test_create_failure_raises_the_vulkan_error(tmp_path, monkeypatch):
+
+    def create_shader_module(device, createInfo, allocator):
+        raise VkErrorOutOfDeviceMemory()
+    monkeypatch.setattr(shaders, "vkCreateShaderModule", create_shader_module)
+
+    filepath = write_spirv(tmp_path, "a.spv", range(16))
+
+    # not a BufferError from closing a mapping that is still exported
+    registry = shaders.ShaderRegistry(None)
+    with pytest.raises(VkErrorOutOfDeviceMemory):
+        registry.acquire(filepath)
+    assert not registry.entries
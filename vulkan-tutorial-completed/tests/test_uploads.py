@@ -0,0 +1,43 @@
+import numpy as np
+
+import mesh
+import uploads
+
+def make_triangle():
+
+    vertices = np.zeros(3, dtype = mesh.VERTEX_DTYPE)
+    vertices["position"] = [[0.0, -0.5], [0.5, 0.5], [-0.5, 0.5]]
+    indices = np.array([0, 1, 2], dtype = np.uint32)
+
+    return vertices, indices
+
+def test_async_mesh_is_installed_and_drawn(stub_engine):
+
+    engine = stub_engine()
+
+    engine.load_mesh_async(*make_triangle())
+    assert engine.mesh is None
+
+    # the fake fences are always signaled, the next frame installs the mesh
+    engine.render()
+    assert engine.mesh is not None
+    assert not engine.pendingMeshes
+    assert engine.driver.calls.count("vkCmdDrawIndexed") == 1
+
+def test_ownership_transfer_barriers_cover_the_upload(stub_engine):
+
+    engine = stub_engine()
+    graphicsQueue, transferQueue = engine.driver.handle("VkQueue"), engine.driver.handle("VkQueue")
+    scheduler = uploads.UploadScheduler(engine.allocator, 0, graphicsQueue, 1, transferQueue)
+
+    vertices, indices = make_triangle()
+    tickets = [scheduler.upload_buffer(vertices, 0), scheduler.upload_buffer(indices, 0)]
+    scheduler.flush()
+
+    # released on the transfer queue, acquired on the graphics queue
+    assert engine.driver.calls.count("vkCmdPipelineBarrier") == 2
+    assert engine.driver.calls.count("vkQueueSubmit") == 2
+
+    assert [ticket.complete for ticket in scheduler.poll()] == [True, True]
+    assert scheduler.poll() == []
+    assert tickets[0].size == vertices.nbytes
@@ -0,0 +1,364 @@
+# statically load vulkan library
+from vulkan import *
+
+import collections
+import concurrent.futures
+import os
+import threading
+
+import numpy as np
+
+import commands
+
+# pillow is only needed to decode png, jpeg and the like, .npy files load without it
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+MIB = 1024 * 1024
+
+# set 1, binding 0: the texture sampled by shaders/textured.frag
+TEXTURE_SET_BINDINGS = [
+    (0, VK_DESCRIPTOR_TYPE_COMBINED_IMAGE_SAMPLER, 1, VK_SHADER_STAGE_FRAGMENT_BIT),
+]
+
+class Texture:
+
+
+    def __init__(self):
+
+        self.image = None
+        self.allocation = None
+        self.imageView = None
+        self.sampler = None
+
+        self.width = 0
+        self.height = 0
+        self.mipLevels = 1
+        self.format = VK_FORMAT_R8G8B8A8_SRGB
+
+        # set pointing at this texture, made the first time it is drawn
+        self.descriptorSet = None
+
+class DecodedImageCache:
+
+
+    # least recently used decoded images are dropped once the pixels held
+    # exceed maxBytes, shared by the decoding threads
+    def __init__(self, maxBytes = 256 * MIB):
+
+        self.maxBytes = maxBytes
+        self.usedBytes = 0
+        self.images = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+
+        with self.lock:
+            pixels = self.images.get(key)
+            if pixels is not None:
+                self.images.move_to_end(key)
+
+        return pixels
+
+    def put(self, key, pixels):
+
+        # an image bigger than the whole cache isn't worth evicting everything for
+        if pixels.nbytes > self.maxBytes:
+            return
+
+        with self.lock:
+            if key in self.images:
+                self.usedBytes -= self.images.pop(key).nbytes
+
+            self.images[key] = pixels
+            self.usedBytes += pixels.nbytes
+
+            while self.usedBytes > self.maxBytes:
+                _,evicted = self.images.popitem(last = False)
+                self.usedBytes -= evicted.nbytes
+
+def decode_image(filepath):
+
+    # always returns a (height, width, 4) uint8 array
+    if filepath.endswith(".npy"):
+        pixels = np.load(filepath)
+    elif Image is None:
+        raise ImportError(f"Pillow is required to decode {filepath}")
+    else:
+        with Image.open(filepath) as image:
+            pixels = np.asarray(image.convert("RGBA"))
+
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, np.newaxis]
+    if pixels.shape[2] < 4:
+        alpha = np.full(pixels.shape[:2] + (4 - pixels.shape[2],), 255, dtype = np.uint8)
+        pixels = np.concatenate([pixels, alpha], axis = 2)
+
+    return np.ascontiguousarray(pixels, dtype = np.uint8)
+
+class TextureLoader:
+
+
+    # decoding is mostly done outside the gil, so several images decode in parallel
+    def __init__(self, maxWorkers = None, cacheBytes = 256 * MIB):
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(maxWorkers)
+        self.cache = DecodedImageCache(cacheBytes)
+
+    def decode(self, filepath):
+
+        # a file changed on disk gets a new key, and is decoded again
+        key = (os.path.abspath(filepath), os.path.getmtime(filepath))
+
+        pixels = self.cache.get(key)
+        if pixels is None:
+            pixels = decode_image(filepath)
+            self.cache.put(key, pixels)
+
+        return pixels
+
+    def decode_all(self, filepaths):
+
+        return list(self.executor.map(self.decode, filepaths))
+
+    def shutdown(self):
+
+        self.executor.shutdown()
+
+class SamplerCache:
+
+
+    def __init__(self, device):
+
+        self.device = device
+
+        # parameters -> sampler, textures with the same parameters share one
+        self.samplers = {}
+
+    def get(self, magFilter = VK_FILTER_LINEAR, minFilter = VK_FILTER_LINEAR,
+        mipmapMode = VK_SAMPLER_MIPMAP_MODE_LINEAR,
+        addressMode = VK_SAMPLER_ADDRESS_MODE_REPEAT, maxLod = VK_LOD_CLAMP_NONE
+    ):
+
+        key = (magFilter, minFilter, mipmapMode, addressMode, maxLod)
+
+        sampler = self.samplers.get(key)
+        if sampler is not None:
+            return sampler
+
+        samplerInfo = VkSamplerCreateInfo(
+            magFilter = magFilter, minFilter = minFilter, mipmapMode = mipmapMode,
+            addressModeU = addressMode, addressModeV = addressMode,
+            addressModeW = addressMode,
+            anisotropyEnable = VK_FALSE, maxAnisotropy = 1.0,
+            compareEnable = VK_FALSE, compareOp = VK_COMPARE_OP_ALWAYS,
+            minLod = 0.0, maxLod = maxLod,
+            borderColor = VK_BORDER_COLOR_INT_OPAQUE_BLACK,
+            unnormalizedCoordinates = VK_FALSE
+        )
+
+        sampler = vkCreateSampler(self.device, samplerInfo, None)
+        self.samplers[key] = sampler
+
+        return sampler
+
+    def destroy(self):
+
+        for sampler in self.samplers.values():
+            vkDestroySampler(self.device, sampler, None)
+
+        self.samplers = {}
+
+def mip_level_count(width, height):
+
+    return max(width, height).bit_length()
+
+def supports_linear_blit(physicalDevice, format):
+
+    formatProperties = vkGetPhysicalDeviceFormatProperties(physicalDevice, format)
+
+    return bool(
+        formatProperties.optimalTilingFeatures
+        & VK_FORMAT_FEATURE_SAMPLED_IMAGE_FILTER_LINEAR_BIT
+    )
+
+def record_layout_transition(commandBuffer, image, baseMipLevel, levelCount,
+    oldLayout, newLayout, srcAccessMask, dstAccessMask, srcStageMask, dstStageMask
+):
+
+    barrier = VkImageMemoryBarrier(
+        srcAccessMask = srcAccessMask, dstAccessMask = dstAccessMask,
+        oldLayout = oldLayout, newLayout = newLayout,
+        srcQueueFamilyIndex = VK_QUEUE_FAMILY_IGNORED,
+        dstQueueFamilyIndex = VK_QUEUE_FAMILY_IGNORED,
+        image = image,
+        subresourceRange = VkImageSubresourceRange(
+            aspectMask = VK_IMAGE_ASPECT_COLOR_BIT,
+            baseMipLevel = baseMipLevel, levelCount = levelCount,
+            baseArrayLayer = 0, layerCount = 1
+        )
+    )
+
+    vkCmdPipelineBarrier(
+        commandBuffer, srcStageMask, dstStageMask, 0,
+        0, None, 0, None, 1, [barrier,]
+    )
+
+def record_mipmaps(commandBuffer, texture):
+
+    # every level is made from the one above it, which is then done and
+    # handed over to the fragment shader
+    width, height = texture.width, texture.height
+
+    for level in range(1, texture.mipLevels):
+
+        record_layout_transition(
+            commandBuffer, texture.image, level - 1, 1,
+            VK_IMAGE_LAYOUT_TRANSFER_DST_OPTIMAL, VK_IMAGE_LAYOUT_TRANSFER_SRC_OPTIMAL,
+            VK_ACCESS_TRANSFER_WRITE_BIT, VK_ACCESS_TRANSFER_READ_BIT,
+            VK_PIPELINE_STAGE_TRANSFER_BIT, VK_PIPELINE_STAGE_TRANSFER_BIT
+        )
+
+        nextWidth, nextHeight = max(width // 2, 1), max(height // 2, 1)
+        blit = VkImageBlit(
+            srcSubresource = VkImageSubresourceLayers(
+                aspectMask = VK_IMAGE_ASPECT_COLOR_BIT,
+                mipLevel = level - 1, baseArrayLayer = 0, layerCount = 1
+            ),
+            srcOffsets = [[0, 0, 0], [width, height, 1]],
+            dstSubresource = VkImageSubresourceLayers(
+                aspectMask = VK_IMAGE_ASPECT_COLOR_BIT,
+                mipLevel = level, baseArrayLayer = 0, layerCount = 1
+            ),
+            dstOffsets = [[0, 0, 0], [nextWidth, nextHeight, 1]]
+        )
+        vkCmdBlitImage(
+            commandBuffer,
+            texture.image, VK_IMAGE_LAYOUT_TRANSFER_SRC_OPTIMAL,
+            texture.image, VK_IMAGE_LAYOUT_TRANSFER_DST_OPTIMAL,
+            1, [blit,], VK_FILTER_LINEAR
+        )
+
+        record_layout_transition(
+            commandBuffer, texture.image, level - 1, 1,
+            VK_IMAGE_LAYOUT_TRANSFER_SRC_OPTIMAL, VK_IMAGE_LAYOUT_SHADER_READ_ONLY_OPTIMAL,
+            VK_ACCESS_TRANSFER_READ_BIT, VK_ACCESS_SHADER_READ_BIT,
+            VK_PIPELINE_STAGE_TRANSFER_BIT, VK_PIPELINE_STAGE_FRAGMENT_SHADER_BIT
+        )
+
+        width, height = nextWidth, nextHeight
+
+    # the last level was only ever written to
+    record_layout_transition(
+        commandBuffer, texture.image, texture.mipLevels - 1, 1,
+        VK_IMAGE_LAYOUT_TRANSFER_DST_OPTIMAL, VK_IMAGE_LAYOUT_SHADER_READ_ONLY_OPTIMAL,
+        VK_ACCESS_TRANSFER_WRITE_BIT, VK_ACCESS_SHADER_READ_BIT,
+        VK_PIPELINE_STAGE_TRANSFER_BIT, VK_PIPELINE_STAGE_FRAGMENT_SHADER_BIT
+    )
+
+def create_texture_image(allocator, physicalDevice, width, height, format, generateMipmaps):
+
+    texture = Texture()
+    texture.width = width
+    texture.height = height
+    texture.format = format
+
+    # without linear filtering support the blits would be invalid, keep one level
+    if generateMipmaps and supports_linear_blit(physicalDevice, format):
+        texture.mipLevels = mip_level_count(width, height)
+
+    imageInfo = VkImageCreateInfo(
+        imageType = VK_IMAGE_TYPE_2D, format = format,
+        extent = [width, height, 1], mipLevels = texture.mipLevels, arrayLayers = 1,
+        samples = VK_SAMPLE_COUNT_1_BIT, tiling = VK_IMAGE_TILING_OPTIMAL,
+        usage = (
+            VK_IMAGE_USAGE_TRANSFER_SRC_BIT | VK_IMAGE_USAGE_TRANSFER_DST_BIT
+            | VK_IMAGE_USAGE_SAMPLED_BIT
+        ),
+        sharingMode = VK_SHARING_MODE_EXCLUSIVE,
+        initialLayout = VK_IMAGE_LAYOUT_UNDEFINED
+    )
+    texture.image = vkCreateImage(allocator.device, imageInfo, None)
+    texture.allocation = allocator.allocate_image(
+        texture.image, VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT
+    )
+
+    viewInfo = VkImageViewCreateInfo(
+        image = texture.image, viewType = VK_IMAGE_VIEW_TYPE_2D, format = format,
+        components = VkComponentMapping(
+            r = VK_COMPONENT_SWIZZLE_IDENTITY, g = VK_COMPONENT_SWIZZLE_IDENTITY,
+            b = VK_COMPONENT_SWIZZLE_IDENTITY, a = VK_COMPONENT_SWIZZLE_IDENTITY
+        ),
+        subresourceRange = VkImageSubresourceRange(
+            aspectMask = VK_IMAGE_ASPECT_COLOR_BIT,
+            baseMipLevel = 0, levelCount = texture.mipLevels,
+            baseArrayLayer = 0, layerCount = 1
+        )
+    )
+    texture.imageView = vkCreateImageView(allocator.device, viewInfo, None)
+
+    return texture
+
+def create_textures(allocator, commandPool, queue, physicalDevice, images, sampler,
+    format = VK_FORMAT_R8G8B8A8_SRGB, generateMipmaps = True
+):
+
+    # images are (height, width, 4) uint8 arrays, they are all uploaded and
+    # mipmapped by a single command buffer
+    textures = []
+    stagingBuffers = []
+
+    commandBuffer = commands.begin_single_time_commands(allocator.device, commandPool)
+
+    for pixels in images:
+
+        height, width = pixels.shape[:2]
+        texture = create_texture_image(
+            allocator, physicalDevice, width, height, format, generateMipmaps
+        )
+        texture.sampler = sampler
+
+        stagingBuffer, stagingAllocation = allocator.create_buffer(
+            pixels.nbytes, VK_BUFFER_USAGE_TRANSFER_SRC_BIT,
+            VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT | VK_MEMORY_PROPERTY_HOST_COHERENT_BIT
+        )
+        ffi.memmove(stagingAllocation.mapped, np.ascontiguousarray(pixels), pixels.nbytes)
+        stagingBuffers.append((stagingBuffer, stagingAllocation))
+
+        record_layout_transition(
+            commandBuffer, texture.image, 0, texture.mipLevels,
+            VK_IMAGE_LAYOUT_UNDEFINED, VK_IMAGE_LAYOUT_TRANSFER_DST_OPTIMAL,
+            0, VK_ACCESS_TRANSFER_WRITE_BIT,
+            VK_PIPELINE_STAGE_TOP_OF_PIPE_BIT, VK_PIPELINE_STAGE_TRANSFER_BIT
+        )
+
+        region = VkBufferImageCopy(
+            bufferOffset = 0, bufferRowLength = 0, bufferImageHeight = 0,
+            imageSubresource = VkImageSubresourceLayers(
+                aspectMask = VK_IMAGE_ASPECT_COLOR_BIT,
+                mipLevel = 0, baseArrayLayer = 0, layerCount = 1
+            ),
+            imageOffset = [0, 0, 0],
+            imageExtent = [width, height, 1]
+        )
+        vkCmdCopyBufferToImage(
+            commandBuffer, stagingBuffer, texture.image,
+            VK_IMAGE_LAYOUT_TRANSFER_DST_OPTIMAL, 1, [region,]
+        )
+
+        record_mipmaps(commandBuffer, texture)
+        textures.append(texture)
+
+    commands.end_single_time_commands(allocator.device, commandPool, queue, commandBuffer)
+
+    for stagingBuffer, stagingAllocation in stagingBuffers:
+        allocator.destroy_buffer(stagingBuffer, stagingAllocation)
+
+    return textures
+
+def destroy_texture(allocator, texture):
+
+    vkDestroyImageView(allocator.device, texture.imageView, None)
+    allocator.destroy_image(texture.image, texture.allocation)
@@ -0,0 +1,100 @@
+# statically load vulkan library
+from vulkan import *
+
+import numpy as np
+
+import descriptors
+
+# layout of the FrameData uniform block in shaders/mesh.vert and
+# shaders/instanced.vert, matrices are column major like glsl expects
+FRAME_UNIFORM_DTYPE = np.dtype([
+    ("viewProjection", np.float32, (4, 4)),
+])
+
+# layout of the PushConstants block in the same shaders
+PUSH_CONSTANT_DTYPE = np.dtype([
+    ("model", np.float32, (4, 4)),
+])
+
+# set 0, binding 0: the frame's uniform buffer, read by the vertex shader
+FRAME_SET_BINDINGS = [
+    (0, VK_DESCRIPTOR_TYPE_UNIFORM_BUFFER, 1, VK_SHADER_STAGE_VERTEX_BIT),
+]
+
+class UniformRing:
+
+
+    def __init__(self):
+
+        self.buffer = None
+        self.allocation = None
+
+        # bytes between two slots, rounded up to minUniformBufferOffsetAlignment
+        self.slotSize = 0
+
+        # one numpy array per slot, each a view onto the persistently mapped buffer
+        self.views = []
+
+        # the viewProjection field of each view, indexing a field builds a new array
+        self.viewProjections = []
+
+        # the ring's sets live as long as the ring, so it keeps its own allocator
+        self.descriptorAllocator = None
+        self.descriptorSets = []
+
+def push_constant_ranges():
+
+    return [
+        VkPushConstantRange(
+            stageFlags = VK_SHADER_STAGE_VERTEX_BIT,
+            offset = 0, size = PUSH_CONSTANT_DTYPE.itemsize
+        ),
+    ]
+
+def create_uniform_ring(allocator, physicalDevice, descriptorSetLayout, slotCount):
+
+    device = allocator.device
+
+    ring = UniformRing()
+
+    limits = vkGetPhysicalDeviceProperties(physicalDevice).limits
+    alignment = limits.minUniformBufferOffsetAlignment
+    ring.slotSize = (FRAME_UNIFORM_DTYPE.itemsize + alignment - 1) // alignment * alignment
+
+    # host visible memory stays mapped, so updating a slot is a plain copy
+    # into its numpy view and nothing is mapped or allocated per frame
+    ring.buffer, ring.allocation = allocator.create_buffer(
+        ring.slotSize * slotCount, VK_BUFFER_USAGE_UNIFORM_BUFFER_BIT,
+        VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT | VK_MEMORY_PROPERTY_HOST_COHERENT_BIT
+    )
+    ring.views = [
+        np.frombuffer(
+            ring.allocation.mapped, dtype = FRAME_UNIFORM_DTYPE,
+            count = 1, offset = slot * ring.slotSize
+        )
+        for slot in range(slotCount)
+    ]
+    ring.viewProjections = [view["viewProjection"] for view in ring.views]
+    for viewProjection in ring.viewProjections:
+        viewProjection[...] = np.identity(4, dtype = np.float32)
+
+    ring.descriptorAllocator = descriptors.DescriptorAllocator(device, setsPerPool = slotCount)
+    ring.descriptorSets = ring.descriptorAllocator.allocate(descriptorSetLayout, slotCount)
+
+    # each set points at its own slot of the shared buffer
+    writer = descriptors.DescriptorWriter()
+    for slot,descriptorSet in enumerate(ring.descriptorSets):
+        writer.write_buffer(
+            descriptorSet, 0, VK_DESCRIPTOR_TYPE_UNIFORM_BUFFER,
+            ring.buffer, slot * ring.slotSize, FRAME_UNIFORM_DTYPE.itemsize
+        )
+    writer.flush(device)
+
+    return ring
+
+def destroy_uniform_ring(allocator, ring):
+
+    ring.views = []
+    ring.viewProjections = []
+    ring.descriptorAllocator.destroy()
+    allocator.destroy_buffer(ring.buffer, ring.allocation)
@@ -0,0 +1,288 @@
+# statically load vulkan library
+from vulkan import *
+
+import numpy as np
+
+class UploadTicket:
+
+
+    def __init__(self):
+
+        # device local destination, only safe to draw from once complete
+        self.buffer = None
+        self.allocation = None
+        self.size = 0
+
+        # how the graphics queue is going to read the buffer
+        self.dstStageMask = VK_PIPELINE_STAGE_VERTEX_INPUT_BIT
+        self.dstAccessMask = VK_ACCESS_VERTEX_ATTRIBUTE_READ_BIT
+
+        self.stagingBuffer = None
+        self.stagingAllocation = None
+
+        self.complete = False
+
+class UploadBatch:
+
+
+    def __init__(self):
+
+        self.tickets = []
+
+        self.transferCommandBuffer = None
+        self.acquireCommandBuffer = None
+
+        # signalled by the copies, waited on by the ownership acquire
+        self.semaphore = None
+
+        # signalled once the batch is usable by the graphics queue
+        self.fence = None
+
+class UploadScheduler:
+
+
+    # staging copies are queued, then submitted together to the transfer queue
+    # so large uploads run alongside rendering instead of stalling a frame.
+    # With a separate transfer family, ownership of every buffer is released
+    # by the copy batch and acquired on the graphics queue afterwards.
+    def __init__(self, allocator, graphicsFamily, graphicsQueue,
+        transferFamily = None, transferQueue = None
+    ):
+
+        self.allocator = allocator
+        self.device = allocator.device
+
+        self.graphicsFamily = graphicsFamily
+        self.graphicsQueue = graphicsQueue
+
+        if transferFamily is None:
+            transferFamily, transferQueue = graphicsFamily, graphicsQueue
+        self.transferFamily = transferFamily
+        self.transferQueue = transferQueue
+        self.ownershipTransfer = transferFamily != graphicsFamily
+
+        self.transferPool = self.make_command_pool(transferFamily)
+        self.graphicsPool = self.make_command_pool(graphicsFamily)
+
+        # tickets waiting for the next flush, and batches on the gpu
+        self.queued = []
+        self.inFlight = []
+
+    def make_command_pool(self, queueFamilyIndex):
+
+        poolInfo = VkCommandPoolCreateInfo(
+            queueFamilyIndex = queueFamilyIndex,
+            flags = VK_COMMAND_POOL_CREATE_TRANSIENT_BIT
+        )
+
+        return vkCreateCommandPool(self.device, poolInfo, None)
+
+    def allocate_command_buffer(self, commandPool):
+
+        allocInfo = VkCommandBufferAllocateInfo(
+            commandPool = commandPool,
+            level = VK_COMMAND_BUFFER_LEVEL_PRIMARY,
+            commandBufferCount = 1
+        )
+        commandBuffer = vkAllocateCommandBuffers(self.device, allocInfo)[0]
+
+        vkBeginCommandBuffer(
+            commandBuffer,
+            VkCommandBufferBeginInfo(flags = VK_COMMAND_BUFFER_USAGE_ONE_TIME_SUBMIT_BIT)
+        )
+
+        return commandBuffer
+
+    def upload_buffer(self, data, usage,
+        dstStageMask = VK_PIPELINE_STAGE_VERTEX_INPUT_BIT,
+        dstAccessMask = VK_ACCESS_VERTEX_ATTRIBUTE_READ_BIT
+    ):
+
+        # the destination buffer exists right away, its contents only once
+        # the ticket is complete
+        data = np.ascontiguousarray(data)
+
+        ticket = UploadTicket()
+        ticket.size = data.nbytes
+        ticket.dstStageMask = dstStageMask
+        ticket.dstAccessMask = dstAccessMask
+
+        ticket.stagingBuffer, ticket.stagingAllocation = self.allocator.create_buffer(
+            ticket.size, VK_BUFFER_USAGE_TRANSFER_SRC_BIT,
+            VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT | VK_MEMORY_PROPERTY_HOST_COHERENT_BIT
+        )
+        ffi.memmove(ticket.stagingAllocation.mapped, data, ticket.size)
+
+        ticket.buffer, ticket.allocation = self.allocator.create_buffer(
+            ticket.size, VK_BUFFER_USAGE_TRANSFER_DST_BIT | usage,
+            VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT
+        )
+
+        self.queued.append(ticket)
+
+        return ticket
+
+    def buffer_barrier(self, ticket, srcAccessMask, dstAccessMask,
+        srcQueueFamilyIndex = VK_QUEUE_FAMILY_IGNORED,
+        dstQueueFamilyIndex = VK_QUEUE_FAMILY_IGNORED
+    ):
+
+        # the uploaded region is the whole buffer, VK_WHOLE_SIZE is -1 in the
+        # bindings and can't be stored in a VkDeviceSize
+        return VkBufferMemoryBarrier(
+            srcAccessMask = srcAccessMask, dstAccessMask = dstAccessMask,
+            srcQueueFamilyIndex = srcQueueFamilyIndex,
+            dstQueueFamilyIndex = dstQueueFamilyIndex,
+            buffer = ticket.buffer, offset = 0, size = ticket.size
+        )
+
+    def flush(self):
+
+        # every queued copy goes to the gpu in one submission, nothing waits here
+        if not self.queued:
+            return
+
+        batch = UploadBatch()
+        batch.tickets = self.queued
+        self.queued = []
+
+        commandBuffer = self.allocate_command_buffer(self.transferPool)
+        batch.transferCommandBuffer = commandBuffer
+
+        for ticket in batch.tickets:
+            copyRegion = VkBufferCopy(srcOffset = 0, dstOffset = 0, size = ticket.size)
+            vkCmdCopyBuffer(commandBuffer, ticket.stagingBuffer, ticket.buffer, 1, [copyRegion,])
+
+        dstStageMask = 0
+        for ticket in batch.tickets:
+            dstStageMask |= ticket.dstStageMask
+
+        if self.ownershipTransfer:
+            # release half of the ownership transfer, the access masks of the
+            # destination side only matter in the acquire
+            barriers = [
+                self.buffer_barrier(
+                    ticket, VK_ACCESS_TRANSFER_WRITE_BIT, 0,
+                    self.transferFamily, self.graphicsFamily
+                )
+                for ticket in batch.tickets
+            ]
+            vkCmdPipelineBarrier(
+                commandBuffer, VK_PIPELINE_STAGE_TRANSFER_BIT,
+                VK_PIPELINE_STAGE_BOTTOM_OF_PIPE_BIT, 0,
+                0, None, len(barriers), barriers, 0, None
+            )
+        else:
+            # same queue as the draws, a plain barrier orders them after the copies
+            barriers = [
+                self.buffer_barrier(ticket, VK_ACCESS_TRANSFER_WRITE_BIT, ticket.dstAccessMask)
+                for ticket in batch.tickets
+            ]
+            vkCmdPipelineBarrier(
+                commandBuffer, VK_PIPELINE_STAGE_TRANSFER_BIT, dstStageMask, 0,
+                0, None, len(barriers), barriers, 0, None
+            )
+
+        vkEndCommandBuffer(commandBuffer)
+
+        batch.fence = vkCreateFence(self.device, VkFenceCreateInfo(), None)
+
+        if self.ownershipTransfer:
+            batch.semaphore = vkCreateSemaphore(self.device, VkSemaphoreCreateInfo(), None)
+            submitInfo = VkSubmitInfo(
+                commandBufferCount = 1, pCommandBuffers = [commandBuffer,],
+                signalSemaphoreCount = 1, pSignalSemaphores = [batch.semaphore,]
+            )
+            vkQueueSubmit(self.transferQueue, 1, submitInfo, VK_NULL_HANDLE)
+            self.submit_acquire(batch, dstStageMask)
+        else:
+            submitInfo = VkSubmitInfo(
+                commandBufferCount = 1, pCommandBuffers = [commandBuffer,]
+            )
+            vkQueueSubmit(self.transferQueue, 1, submitInfo, batch.fence)
+
+        self.inFlight.append(batch)
+
+    def submit_acquire(self, batch, dstStageMask):
+
+        # acquire half of the ownership transfer, on the graphics queue. It waits
+        # for the copies on the gpu, frames submitted meanwhile keep running.
+        commandBuffer = self.allocate_command_buffer(self.graphicsPool)
+        batch.acquireCommandBuffer = commandBuffer
+
+        barriers = [
+            self.buffer_barrier(
+                ticket, 0, ticket.dstAccessMask, self.transferFamily, self.graphicsFamily
+            )
+            for ticket in batch.tickets
+        ]
+        vkCmdPipelineBarrier(
+            commandBuffer, dstStageMask, dstStageMask, 0,
+            0, None, len(barriers), barriers, 0, None
+        )
+        vkEndCommandBuffer(commandBuffer)
+
+        submitInfo = VkSubmitInfo(
+            waitSemaphoreCount = 1, pWaitSemaphores = [batch.semaphore,],
+            pWaitDstStageMask = [dstStageMask,],
+            commandBufferCount = 1, pCommandBuffers = [commandBuffer,]
+        )
+        vkQueueSubmit(self.graphicsQueue, 1, submitInfo, batch.fence)
+
+    def poll(self):
+
+        # called between frames, returns the tickets completed since the last call
+        completed = []
+        stillInFlight = []
+
+        for batch in self.inFlight:
+            try:
+                vkGetFenceStatus(self.device, batch.fence)
+            except VkNotReady:
+                stillInFlight.append(batch)
+                continue
+
+            self.release_batch(batch)
+            for ticket in batch.tickets:
+                ticket.complete = True
+            completed.extend(batch.tickets)
+
+        self.inFlight = stillInFlight
+
+        return completed
+
+    def release_batch(self, batch):
+
+        for ticket in batch.tickets:
+            self.allocator.destroy_buffer(ticket.stagingBuffer, ticket.stagingAllocation)
+            ticket.stagingBuffer = None
+            ticket.stagingAllocation = None
+
+        vkFreeCommandBuffers(self.device, self.transferPool, 1, [batch.transferCommandBuffer,])
+        if batch.acquireCommandBuffer is not None:
+            vkFreeCommandBuffers(self.device, self.graphicsPool, 1, [batch.acquireCommandBuffer,])
+        if batch.semaphore is not None:
+            vkDestroySemaphore(self.device, batch.semaphore, None)
+        vkDestroyFence(self.device, batch.fence, None)
+
+    def wait_idle(self):
+
+        if self.inFlight:
+            vkWaitForFences(
+                self.device, len(self.inFlight), [batch.fence for batch in self.inFlight],
+                VK_TRUE, 0xFFFFFFFFFFFFFFFF
+            )
+
+        return self.poll()
+
+    def destroy(self):
+
+        # queued uploads never reached the gpu, their buffers belong to nobody
+        for ticket in self.queued:
+            self.allocator.destroy_buffer(ticket.stagingBuffer, ticket.stagingAllocation)
+            self.allocator.destroy_buffer(ticket.buffer, ticket.allocation)
+        self.queued = []
+
+        self.wait_idle()
+        vkDestroyCommandPool(self.device, self.transferPool, None)
+        vkDestroyCommandPool(self.device, self.graphicsPool, None)